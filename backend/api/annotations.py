@@ -1,15 +1,31 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse
+from sqlalchemy import update, values, column, Integer, String, DateTime
+from sqlalchemy import select, exists
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import get_db
+from starlette.concurrency import run_in_threadpool
+from database import get_db, get_async_db
 from models import Project, Annotation
 from core.security import get_current_user
-import shutil
 import os
-import csv
-from charset_normalizer import from_bytes, from_path
-from datetime import datetime
-from pathlib import Path
-from schemas import AnnotationSubmit
+import stat
+from datetime import datetime, timedelta
+from collections import deque
+import math
+from schemas import AnnotationSubmit, AnnotationBatchSubmit
+from core.upload import read_sample, detect_encoding, sniff_dialect
+from core.storage import blob_store, content_digest
+from core.row_store import open_row_store
+from core.jobs import ingestion_jobs, ensure_ingested, IngestionProgress
+from core.counters import record_annotations_async, project_progress
+from core.search import search_annotations, SearchMatch
+from core.events import project_events, project_event
+from core.leases import held_by_other
+from crud import (
+    get_user_project_async, get_annotator_project, get_annotator_project_async, annotator_access,
+    get_project_statistics, get_daily_counts_async
+)
 
 
 
@@ -20,13 +36,21 @@ router = APIRouter(
 
 
 
-UPLOAD_DIR = "uploads/"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+# Nombre maximum d'annotations renvoyées par page
+MAX_PAGE_SIZE = 500
+# Nombre maximum de jours de la moyenne glissante du rythme d'annotation
+MAX_VELOCITY_WINDOW = 90
+# Longueur maximale du texte recherché
+MAX_SEARCH_LENGTH = 200
+# Mise en cache des guidelines par le navigateur : un fichier stocké par contenu ne change jamais
+# pour une même adresse (empreinte dans le paramètre v), les autres sont revalidés à chaque ouverture
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
 
 
 
-@router.post("/create")
-async def create_project(
+@router.post("/create", status_code=202)
+def create_project(
     project_name: str = Form(...),
     due_date: str = Form(...),
     categories: str = Form(...),
@@ -36,11 +60,17 @@ async def create_project(
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
-    """Créé un nouveau projet pour un utilisateur:
-        - créer un projet avec les métadonnées nom, date limite, catégories, notes
-        - sauvegarder les fichiers uploadés (annotations (obligatoire), guidelines (facultatif))
-        - parser le fichier CSV d'annotation
-        - créer les entrées d'annotations en base de données
+    """Créé un nouveau projet pour un utilisateur et lance l'import de son fichier CSV en arrière-plan.
+    L'écriture des fichiers est bloquante : l'endpoint est synchrone pour être exécuté
+    dans le threadpool sans bloquer la boucle d'évènements.
+        - sauvegarder les fichiers uploadés (annotations (obligatoire), guidelines (facultatif)) dans le
+        stockage par contenu : un fichier déjà téléversé n'est pas stocké une seconde fois, et son stock
+        de lignes est réutilisé par l'import (voir core/storage.py)
+        - détecter l'encodage et le dialecte du CSV sur un échantillon et les enregistrer sur le projet
+        - créer un projet avec les métadonnées nom, date limite, catégories, notes et le statut ingesting
+        - soumettre l'import (parsing, stock de lignes, insertion en masse) à la file des tâches d'ingestion
+        - publier le nouveau projet aux connexions SSE de l'utilisateur (GET /dashboard/events)
+    La progression de l'import est renvoyée par GET /annotations/{project_id}/ingestion.
 
     Args:
         project_name (str, optional): nom du projet. Defaults to Form(...).
@@ -57,23 +87,9 @@ async def create_project(
         HTTPException: si l'encodage du csv ne peut pas être détecté
 
     Returns:
-        dict: message de confirmation et identifiant du projet
+        dict: message de confirmation, identifiant du projet, statut et adresse de la progression de l'import
     """    
 
-    # Sauvegarde du fichier d'annotations
-    annotation_file_path = None
-    if annotation_file:
-        annotation_file_path = os.path.join(UPLOAD_DIR, annotation_file.filename)
-        with open(annotation_file_path, "wb") as buffer:
-            shutil.copyfileobj(annotation_file.file, buffer)
-
-    # Sauvegarde du fichier guidelines si fournis
-    guidelines_file_path = None
-    if guidelines_file:
-        guidelines_file_path = os.path.join(UPLOAD_DIR, guidelines_file.filename)
-        with open(guidelines_file_path, "wb") as buffer:
-            shutil.copyfileobj(guidelines_file.file, buffer)
-
     # Validation et conversion de la date limite
     try:
         due_date_obj = datetime.strptime(due_date, "%Y-%m-%d").date()
@@ -83,70 +99,206 @@ async def create_project(
     # transforme les catégories données en liste
     category_list = [c.strip() for c in categories.split(',')] if categories else []
 
-    # Création du projet en base de données
-    new_project = Project(
-        user_id=current_user.id,
-        project_name=project_name,
-        due_date=due_date_obj,
-        notes=notes,
-        annotation_file_path=annotation_file_path,
-        guidelines_file_path=guidelines_file_path,
-        status="pending",
-        categories = category_list
+    # Détection de l'encodage sur un échantillon du début du fichier, avant toute écriture
+    sample = read_sample(annotation_file.file)
+    encoding = detect_encoding(sample)
+    if encoding is None:
+        raise HTTPException(status_code=400, detail="Impossible de détecter l'encodage du fichier")
+    # Détection du séparateur et du caractère de citation sur le même échantillon
+    delimiter, quotechar = sniff_dialect(sample, encoding)
+
+    # Réception des fichiers (l'échantillon déjà lu en tête du csv) et calcul de leur empreinte
+    staged_files = []
+    try:
+        staged_annotations = blob_store.stage(annotation_file.file, annotation_file.filename, prefix=sample)
+        staged_files.append(staged_annotations)
+        staged_guidelines = None
+        if guidelines_file:
+            staged_guidelines = blob_store.stage(guidelines_file.file, guidelines_file.filename)
+            staged_files.append(staged_guidelines)
+
+        # Création du projet en base de données, ses lignes sont créées par la tâche d'ingestion.
+        # Les références aux fichiers stockés sont validées dans la même transaction
+        new_project = Project(
+            user_id=current_user.id,
+            project_name=project_name,
+            due_date=due_date_obj,
+            notes=notes,
+            annotation_file_path=blob_store.acquire(db, staged_annotations),
+            guidelines_file_path=blob_store.acquire(db, staged_guidelines) if staged_guidelines else None,
+            status="ingesting",
+            categories = category_list,
+            source_encoding=encoding,
+            csv_delimiter=delimiter,
+            csv_quotechar=quotechar
+        )
+        db.add(new_project)
+        db.flush()
+        project_events.publish(db, project_event(new_project))
+        db.commit()
+    finally:
+        for staged in staged_files:
+            blob_store.discard(staged)
+
+    ingestion_jobs.submit(
+        new_project.id, new_project.annotation_file_path, encoding, delimiter, quotechar
     )
 
-    db.add(new_project)
-    db.commit()
+    return {
+        "message": "Projet créé avec succès, import du fichier en cours",
+        "project": new_project.id,
+        "status": new_project.status,
+        "progress_url": f"/annotations/{new_project.id}/ingestion"
+    }
 
-    # Lire le CSV uploadé d'annotations
-    annotation_file.file.seek(0)
-    contents = await annotation_file.read()
 
-    # Détection de l'encodage
-    result = from_bytes(contents).best()
-    if result is None:
-        raise HTTPException(status_code=400, detail="Impossible de détecter l'encodage du fichier")
-    
-    # Conversion de l'encodage en utf 8
-    utf8_text = result.output().decode('utf-8', errors="replace")
-
-    # parsing et création des annotations en base de données
-    lines = utf8_text.splitlines()
-    reader = csv.reader(lines)
-
-    for row_id, row in enumerate(reader):
-        print(row_id, row)
-        if row_id==0:
-            continue
-        annotation = Annotation(
-            row_id = row_id,
-            project_id = new_project.id,
-            content = None,
-            date = None
-        )
-        db.add(annotation)
 
-    db.commit()
+@router.get("/{project_id}/ingestion")
+async def get_ingestion_progress(
+    project_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Renvoie la progression de l'import du fichier CSV d'un projet.
+        - lignes insérées, part du fichier lue, débit et temps restant estimé
+        - progression en mémoire si l'import s'exécute dans ce processus, sinon la dernière
+          progression enregistrée sur le projet
+
+    Args:
+        project_id (int): identifiant du projet
+        db (AsyncSession, optional): session sqlalchemy asynchrone. Defaults to Depends(get_async_db).
+        current_user (dict, optional): utilisateur authentifié. Defaults to Depends(get_current_user).
+
+    Raises:
+        HTTPException: si le projet n'existe pas ou n'appartient pas à l'utilisateur
+
+    Returns:
+        dict: statut, lignes, octets lus, pourcentage, débit (lignes/s), temps restant estimé (secondes) et erreur éventuelle
+    """
+    project = await get_user_project_async(db, project_id, current_user.id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Projet non trouvé")
+
+    progress = ingestion_jobs.get(project_id)
+    if progress is None and project.ingestion:
+        progress = IngestionProgress.from_snapshot(project_id, project.ingestion)
+    if progress is None:
+        # projet importé avant les tâches d'ingestion, ou tâche pas encore démarrée ailleurs
+        return {"status": project.status, "rows": project.total_rows}
+    return progress.as_dict()
+
+
+
+def guidelines_url(project: Project) -> str | None:
+    """Adresse des guidelines d'un projet, versionnée par l'empreinte du fichier.
+
+    Returns:
+        str | None: adresse relative de GET /annotations/{project_id}/guidelines, None sans guidelines
+    """
+    if not project.guidelines_file_path:
+        return None
+    url = f"/annotations/{project.id}/guidelines"
+    digest = content_digest(project.guidelines_file_path)
+    return f"{url}?v={digest}" if digest else url
+
+
+def _stat_file(path: str) -> os.stat_result | None:
+    """Métadonnées d'un fichier, None s'il n'existe pas."""
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        return None
+    return stat_result if stat.S_ISREG(stat_result.st_mode) else None
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Vérifie si l'en-tête If-None-Match désigne la version courante (comparaison faible)."""
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+@router.get("/{project_id}/guidelines")
+async def get_guidelines(
+    project_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Envoie le pdf des guidelines d'un projet à son propriétaire et à ses membres.
+        - ETag fort : empreinte sha256 du contenu (stockage par contenu), réponse 304 si le
+          navigateur a déjà cette version (If-None-Match)
+        - Cache-Control immutable : l'adresse renvoyée par les autres routes (guidelines_url)
+          contient l'empreinte, le navigateur réutilise son cache sans requête
+        - requêtes partielles (Range, If-Range) : le lecteur pdf du navigateur peut afficher
+          les premières pages avant la fin du téléchargement
+    Le fichier est envoyé par FileResponse : sans recopie en mémoire (pathsend) si le serveur
+    le permet, par blocs lus dans un thread sinon.
+
+    Args:
+        project_id (int): identifiant du projet
+        request (Request): requête HTTP (en-têtes de validation du cache)
+        db (AsyncSession, optional): session sqlalchemy asynchrone. Defaults to Depends(get_async_db).
+        current_user (dict, optional): utilisateur authentifié. Defaults to Depends(get_current_user).
+
+    Raises:
+        HTTPException 404: si le projet n'existe pas, n'est pas accessible à l'utilisateur ou n'a pas de guidelines
 
-    return {"message": "Projet créé avec succès", "project": new_project.id}
+    Returns:
+        FileResponse | Response: le fichier (200 ou 206), ou 304 si la version en cache est à jour
+    """
+    project = await get_annotator_project_async(db, project_id, current_user.id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Projet non trouvé")
+    path = project.guidelines_file_path
+    stat_result = await run_in_threadpool(_stat_file, path) if path else None
+    if stat_result is None:
+        raise HTTPException(status_code=404, detail="Aucune guidelines pour ce projet")
+
+    digest = content_digest(path)
+    if digest:
+        headers = {"ETag": f'"{digest}"', "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    else:
+        # fichier enregistré avant le stockage par contenu : version dérivée de la date de modification
+        headers = {
+            "ETag": f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"',
+            "Cache-Control": REVALIDATE_CACHE_CONTROL
+        }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    return FileResponse(
+        path,
+        headers=headers,
+        stat_result=stat_result,
+        filename="guidelines" + os.path.splitext(path)[1],
+        content_disposition_type="inline"
+    )
 
 
 
 @router.get("/{project_id}")
 def get_project_details(
     project_id: int,
+    include_annotations: bool = False,
+    after: int = Query(0, ge=0),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Récupère les détails d'un projet appartenant à un utilisateur spécifique.
         - vérifier que le projet existe et appartient à l'utilisateur actuel
-        - récupérer les annotations associées au projet
-        - calculer le taux de complétion du projet
-        - calculer et stocker la moyenne d'annotations par jour une fois le projet terminé
-        - renvoyer les métadonnées du projet et la liste d'annotations
+        - calculer les statistiques du projet en base de données (complétion, répartition
+        par catégorie, annotations par jour), sans charger les annotations
+        - calculer la moyenne d'annotations par jour, stockée une fois le projet terminé
+        - si demandé, renvoyer une page d'annotations (pagination par clé sur row_id)
 
     Args:
         project_id (int): identifiant du projet à récupérer
+        include_annotations (bool, optional): renvoyer une page d'annotations. Defaults to False.
+        after (int, optional): row_id de la dernière annotation déjà reçue, 0 pour commencer au début. Defaults to 0.
+        limit (int, optional): nombre maximum d'annotations renvoyées. Defaults to MAX_PAGE_SIZE.
         db (Session, optional): session sqlalchemy. Defaults to Depends(get_db).
         current_user (dict, optional): utilisateur authentifié. Defaults to Depends(get_current_user).
 
@@ -154,7 +306,8 @@ def get_project_details(
         HTTPException: si le projet n'existe pas ou n'appartient pas à l'utilisateur
 
     Returns:
-        dict: informations sur le projet, les statistiques et les annotations
+        dict: informations sur le projet, les statistiques et, si demandé, une page d'annotations
+        avec le curseur de la page suivante (None s'il n'y en a plus)
     """    
 
     # Vérifier que le projet existe
@@ -162,46 +315,59 @@ def get_project_details(
     if not project:
         raise HTTPException(status_code=404, detail="Projet non trouvé")
 
-    # Récupérer toutes les annotations associées
-    annotations = db.query(Annotation).filter(Annotation.project_id == project_id).all()
+    # Statistiques calculées par des requêtes agrégées
+    stats = get_project_statistics(db, project_id)
 
     # Calcul du taux de complétion du projet
-    total = len(annotations)
-    done = sum(1 for a in annotations if a.content is not None)
+    total = stats["total"]
+    done = stats["done"]
     completion = round((done / total * 100), 2) if total > 0 else 0
 
-    # si projet terminé et rien en base de données, calcul du nombre moyen d'annotations
-    if project.status == "completed" and not project.mean_annotations:
-        # nombre total d'annotations
-        total_annotations = sum(1 for a in annotations if getattr(a, "content", None))
-        # date des annotations
-        annotated_dates = [a.date for a in annotations if getattr(a, "date", None)]
+    # nombre moyen d'annotations par jour, stocké en base de données une fois le projet terminé
+    mean_annotations = project.mean_annotations
+    if not (project.status == "completed" and mean_annotations):
         # date de début effective des annotations
-        if annotated_dates:
-            first_date = min(annotated_dates)
-        else:
-            first_date = datetime.utcnow()
+        first_date = stats["first_date"] or datetime.utcnow()
         # nombre de jour écoulés depuis (1 minimum pour éviter la division par 0)
         days_elapsed = max(
             (datetime.utcnow() - first_date).total_seconds() / 86400,
             1
         )
-        # calcul et sauvegarde de la moyenne
-        project.mean_annotations = round(total_annotations / days_elapsed)
-        db.commit()
-        db.refresh(project)
-
-    return {
+        mean_annotations = round(done / days_elapsed)
+        if project.status == "completed":
+            # sauvegarde de la moyenne
+            project.mean_annotations = mean_annotations
+            db.commit()
+            db.refresh(project)
+
+    details = {
         "id": project.id,
         "project_name": project.project_name,
         "due_date": project.due_date,
         "notes": project.notes,
-        "guidelines_file_path": project.guidelines_file_path,
+        "guidelines_url": guidelines_url(project),
         "categories": project.categories,
         "completion": completion,
         "status": project.status,
-        "mean_annotations": project.mean_annotations,
-        "annotations": [
+        "mean_annotations": mean_annotations,
+        "total_rows": total,
+        "annotated_rows": done,
+        "category_counts": stats["category_counts"],
+        "daily_counts": stats["daily_counts"]
+    }
+
+    if include_annotations:
+        # une ligne de plus est demandée pour savoir s'il en reste
+        annotations = db.execute(
+            select(Annotation)
+            .where(Annotation.project_id == project_id, Annotation.row_id > after)
+            .order_by(Annotation.row_id.asc())
+            .limit(limit + 1)
+        ).scalars().all()
+        has_more = len(annotations) > limit
+        annotations = annotations[:limit]
+        details["next_after"] = annotations[-1].row_id if has_more else None
+        details["annotations"] = [
             {
                 "id": a.id,
                 "row_id": a.row_id,
@@ -210,10 +376,126 @@ def get_project_details(
             }
             for a in annotations
         ]
+
+    return details
+
+
+
+@router.get("/{project_id}/velocity")
+async def get_project_velocity(
+    project_id: int,
+    window: int = Query(7, ge=1, le=MAX_VELOCITY_WINDOW),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Récupère le rythme d'annotation d'un projet et la date de fin projetée.
+        - vérifier que le projet existe et appartient à l'utilisateur authentifié
+        - lire le nombre d'annotations par jour dans la table annotation_daily_counts et les
+        compteurs en attente des annotateurs (la table annotations n'est pas parcourue)
+        - calculer la moyenne glissante des lignes annotées sur `window` jours
+        - projeter la date de fin au rythme actuel et la comparer à la date d'échéance
+
+    Args:
+        project_id (int): identifiant du projet
+        window (int, optional): nombre de jours de la moyenne glissante. Defaults to 7.
+        db (AsyncSession, optional): session sqlalchemy asynchrone. Defaults to Depends(get_async_db).
+        current_user (dict, optional): utilisateur authentifié. Defaults to Depends(get_current_user).
+
+    Raises:
+        HTTPException 404: le projet n'existe pas ou n'appartient pas à l'utilisateur authentifié
+
+    Returns:
+        dict: annotations et moyenne glissante par jour (jours sans annotation compris, depuis
+        la première annotation), lignes restantes, rythme actuel et nécessaire, date de fin projetée
+    """
+
+    # Vérifier que le projet existe
+    project = await get_user_project_async(db, project_id, current_user.id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Projet non trouvé")
+
+    progress = (await db.execute(
+        project_progress(Project.total_rows, Project.annotated_rows).where(Project.id == project_id)
+    )).one()
+    counts = {count.day: count for count in await get_daily_counts_async(db, project_id)}
+    today = datetime.utcnow().date()
+    first_day = min(counts, default=today)
+    last_day = max([today, *counts])
+
+    # Série continue des jours, moyenne glissante des nouvelles lignes annotées
+    days = []
+    recent = deque(maxlen=window)
+    for offset in range((last_day - first_day).days + 1):
+        day = first_day + timedelta(days=offset)
+        count = counts.get(day)
+        recent.append(count.new_rows if count else 0)
+        days.append({
+            "day": day,
+            "annotations": count.annotations if count else 0,
+            "new_rows": recent[-1],
+            "rolling_average": round(sum(recent) / len(recent), 2)
+        })
+
+    # Projection de la date de fin au rythme de la moyenne glissante actuelle
+    remaining = max(progress.total_rows - progress.annotated_rows, 0)
+    rate = days[-1]["rolling_average"]
+    if remaining == 0:
+        projected_completion_date = max(counts, default=today)
+    elif rate > 0:
+        projected_completion_date = today + timedelta(days=math.ceil(remaining / rate))
+    else:
+        projected_completion_date = None
+    days_left = (project.due_date - today).days
+
+    return {
+        "id": project.id,
+        "due_date": project.due_date,
+        "total_rows": progress.total_rows,
+        "annotated_rows": progress.annotated_rows,
+        "remaining_rows": remaining,
+        "window": window,
+        "rolling_average": rate,
+        "mean_per_day": round(sum(day["new_rows"] for day in days) / len(days), 2),
+        "required_per_day": round(remaining / max(days_left, 1), 2),
+        "projected_completion_date": projected_completion_date,
+        "on_track": projected_completion_date is not None and projected_completion_date <= project.due_date,
+        "days": days
     }
 
 
 
+def read_texts(project: Project, row_ids: list[int]) -> dict[int, str]:
+    """Lit le texte à annoter de plusieurs lignes dans le stock de lignes du projet.
+    Seules les lignes demandées sont lues, les row_id consécutifs d'un seul bloc.
+
+    Args:
+        project (Project): projet dont le stock de lignes est lu
+        row_ids (list[int]): row_id des lignes à lire, triés par ordre croissant
+
+    Raises:
+        HTTPException 400: le stock doit être construit et l'encodage du csv n'a pas pu être détecté
+
+    Returns:
+        dict[int, str]: texte de chaque ligne indexé par row_id ("fail" si la colonne text est absente)
+    """
+    texts = {}
+    try:
+        store = open_row_store(
+            project.annotation_file_path,
+            project.source_encoding, project.csv_delimiter, project.csv_quotechar
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Impossible de détecter l'encodage du fichier CSV")
+    if store is None:
+        return texts
+    with store:
+        text_index = store.column_index("text")
+        for row_id, row in store.select(row_ids):
+            texts[row_id] = row[text_index] if text_index is not None and text_index < len(row) else "fail"
+    return texts
+
+
+
 @router.get("/{project_id}/annotate")
 def get_project_annotations(
     project_id: int,
@@ -222,9 +504,9 @@ def get_project_annotations(
 ):
     """Récupère les annotations d'un projet avec le texte source associé.
     Cette route destinée à l'interface d'annotation permet : 
-        - vérifier que le projet existe et appartient à l'utilisateur authentifié
+        - vérifier que le projet existe et que l'utilisateur authentifié en est le propriétaire ou un membre
         - récupérer les annotations du projet dans l'ordre du fichier source
-        - lire le fichier csv d'origine pour associer chaque annotation à son texte
+        - lire le stock de lignes du projet pour associer chaque annotation à son texte
         - retourner les métadonnées du projet et les annotations enrichies du texte à annoter
 
     Args:
@@ -233,41 +515,32 @@ def get_project_annotations(
         current_user (dict, optional): utilisateur authentifié. Defaults to Depends(get_current_user).
 
     Raises:
-        HTTPException 404: le projet n'existe pas ou n'appartient pas à l'utilisateur authentifié
+        HTTPException 404: le projet n'existe pas ou n'est pas accessible à l'utilisateur authentifié
         HTTPException 400: l'encodage du csv n'a pas pu être détecté
+        HTTPException 409: si l'import du fichier csv est en cours ou a échoué
 
     Returns:
         dict: les informations du projet, les annotations et le texte source
     """    
 
     # Vérifier que le projet existe
-    project = db.query(Project).filter(Project.id == project_id, Project.user_id == current_user.id).first()
+    project = get_annotator_project(db, project_id, current_user.id)
     if not project:
         raise HTTPException(status_code=404, detail="Projet non trouvé")
+    ensure_ingested(project)
 
     # Récupérer toutes les annotations associées
     annotations = db.query(Annotation).filter(Annotation.project_id == project_id).order_by(Annotation.row_id.asc()).all()
 
-    # Lecture CSV pour voir le texte
-    texts = {}
-    csv_path = Path(project.annotation_file_path)
-    if csv_path.exists():
-        # détection de l'encodage
-        result = from_path(csv_path).best()
-        if result is None:
-            raise HTTPException(status_code=400, detail="Impossible de détecter l'encodage du fichier CSV")
-        with open(csv_path, newline="", encoding=result.encoding) as csv_file:
-            csv_reader = csv.DictReader(csv_file)
-            for idx, row in enumerate(csv_reader):
-                # idx+1 to skip header and have database and file correspond
-                texts[idx+1] = row.get("text", "fail")
+    # Lecture du stock de lignes pour voir le texte
+    texts = read_texts(project, [a.row_id for a in annotations])
 
     return {
         "id": project.id,
         "project_name": project.project_name,
         "due_date": project.due_date,
         "notes": project.notes,
-        "guidelines_file_path": project.guidelines_file_path,
+        "guidelines_url": guidelines_url(project),
         "categories": project.categories,
         "annotations": [
             {
@@ -282,19 +555,138 @@ def get_project_annotations(
     }
 
 
+@router.get("/{project_id}/annotate/page")
+async def get_project_annotations_page(
+    project_id: int,
+    after: int = Query(0, ge=0),
+    before: int | None = Query(None, ge=1),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    only_unannotated: bool = False,
+    first_unannotated: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Récupère une page d'annotations d'un projet avec le texte source associé.
+    Variante paginée de /{project_id}/annotate pour les gros projets :
+        - vérifier que le projet existe et que l'utilisateur authentifié en est le propriétaire ou un membre
+        - récupérer au plus `limit` annotations dont le row_id est supérieur à `after`, ou les
+        `limit` dernières dont le row_id est inférieur à `before` pour revenir en arrière
+        (pagination par clé sur (project_id, row_id), le coût ne dépend pas de la taille du projet)
+        - lire uniquement les lignes correspondantes dans le stock de lignes du projet
+        - renvoyer les curseurs à passer en `after` pour obtenir la page suivante et en `before`
+        pour obtenir la page précédente
+
+    Args:
+        project_id (int): identifiant du projet à annoter
+        after (int, optional): row_id de la dernière ligne déjà reçue, 0 pour commencer au début. Defaults to 0.
+        before (int | None, optional): row_id de la première ligne déjà reçue, pour la page précédente
+            (ignore `after` et `first_unannotated`). Defaults to None.
+        limit (int, optional): nombre maximum d'annotations renvoyées. Defaults to 50.
+        only_unannotated (bool, optional): ne renvoyer que les lignes sans annotation. Defaults to False.
+        first_unannotated (bool, optional): commencer à la première ligne non annotée (ignore `after`). Defaults to False.
+        db (AsyncSession, optional): session sqlalchemy asynchrone. Defaults to Depends(get_async_db).
+        current_user (dict, optional): utilisateur authentifié. Defaults to Depends(get_current_user).
+
+    Raises:
+        HTTPException 404: le projet n'existe pas ou n'est pas accessible à l'utilisateur authentifié
+        HTTPException 400: l'encodage du csv n'a pas pu être détecté
+        HTTPException 409: si l'import du fichier csv est en cours ou a échoué
+
+    Returns:
+        dict: les informations du projet, la page d'annotations avec leur texte (par row_id croissant),
+        les curseurs des pages suivante et précédente (None s'il n'y en a plus) et le row_id de la
+        première ligne non annotée
+    """    
+
+    # Vérifier que le projet existe
+    project = await get_annotator_project_async(db, project_id, current_user.id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Projet non trouvé")
+    ensure_ingested(project)
+
+    # Première ligne non annotée (index partiel sur les lignes sans contenu)
+    first_unannotated_row_id = await db.scalar(
+        select(Annotation.row_id)
+        .where(Annotation.project_id == project_id, Annotation.content.is_(None))
+        .order_by(Annotation.row_id.asc())
+        .limit(1)
+    )
+
+    if first_unannotated and before is None:
+        after = first_unannotated_row_id - 1 if first_unannotated_row_id is not None else after
+
+    page = [Annotation.project_id == project_id]
+    if only_unannotated:
+        page.append(Annotation.content.is_(None))
+
+    # Une ligne de plus est demandée pour savoir s'il en reste dans le sens de la page,
+    # l'existence d'une ligne dans l'autre sens est vérifiée par l'index (project_id, row_id)
+    if before is None:
+        result = await db.execute(
+            select(Annotation).where(*page, Annotation.row_id > after).order_by(Annotation.row_id.asc()).limit(limit + 1)
+        )
+        annotations = result.scalars().all()
+        has_next = len(annotations) > limit
+        annotations = annotations[:limit]
+        has_previous = bool(annotations) and await db.scalar(
+            select(exists().where(*page, Annotation.row_id < annotations[0].row_id))
+        )
+    else:
+        result = await db.execute(
+            select(Annotation).where(*page, Annotation.row_id < before).order_by(Annotation.row_id.desc()).limit(limit + 1)
+        )
+        annotations = result.scalars().all()
+        has_previous = len(annotations) > limit
+        annotations = annotations[:limit][::-1]
+        has_next = bool(annotations) and await db.scalar(
+            select(exists().where(*page, Annotation.row_id > annotations[-1].row_id))
+        )
+
+    # Lecture du stock de lignes pour les seules lignes de la page (lecture de fichiers : threadpool)
+    texts = await run_in_threadpool(read_texts, project, [a.row_id for a in annotations])
+
+    return {
+        "id": project.id,
+        "project_name": project.project_name,
+        "due_date": project.due_date,
+        "notes": project.notes,
+        "guidelines_url": guidelines_url(project),
+        "categories": project.categories,
+        "first_unannotated_row_id": first_unannotated_row_id,
+        "next_after": annotations[-1].row_id if has_next else None,
+        "previous_before": annotations[0].row_id if has_previous else None,
+        "annotations": [
+            {
+                "id": a.id,
+                "row_id": a.row_id,
+                "content": a.content,
+                "date": a.date,
+                "text": texts.get(a.row_id, "")
+            }
+            for a in annotations
+        ]
+    }
+
+
 
 @router.post("/{project_id}/submit")
-def update_annotations(
+async def update_annotations(
     project_id: int,
     payload: AnnotationSubmit,
-    db = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_user)
 ) :
     """Met à jour le contenu d'une annotation pour un projet donné.
     Cette route est utilisée lors de la soumission d'une annotation depuis l'interface utilisateur.
-        - vérifier que le projet appartient à l'utilisateur authentifié
+        - vérifier que l'utilisateur authentifié est le propriétaire ou un membre du projet
+        - vérifier que la catégorie fait partie des catégories du projet
         - vérufuer que l'annotation ciblée existe et est associée au projet
-        - enregistrer la catégorie choisie et la date d'annotation
+        - refuser la ligne si elle est attribuée à un autre annotateur par un bail en cours
+        - enregistrer la catégorie choisie, la date d'annotation et l'annotateur, et rendre le bail
+        - incrémenter les compteurs de l'annotateur pour le jour de l'annotation (lignes annotées,
+          annotations) et passer le projet à completed si besoin, voir core/counters.py
+        - publier le passage à completed aux connexions SSE de l'utilisateur, délivré au commit
+          (la progression est publiée par le report des compteurs, une fois par report)
         - mise à jour en base de données
 
     Args:
@@ -303,32 +695,241 @@ def update_annotations(
             - annotationID : identifiant de l'annotation à mettre à jour
             - category : valeur de l'annotation
             - date : date de validation de l'annotation
-        db (_type_, optional): session sqlalchemy. Defaults to Depends(get_db).
+        db (AsyncSession, optional): session sqlalchemy asynchrone. Defaults to Depends(get_async_db).
         current_user (_type_, optional): utilisateur authentifié. Defaults to Depends(get_current_user).
 
     Raises:
-        HTTPException: le projet n'existe pas ou appartient à un autre utilisateur
+        HTTPException: le projet n'existe pas ou n'est pas accessible à l'utilisateur
+        HTTPException 422: la catégorie ne fait pas partie des catégories du projet
         HTTPException: l'annotation n'existe pas ou n'est pas liée au projet
+        HTTPException 409: la ligne est attribuée à un autre annotateur
 
     Returns:
         dict: message de confirmation et identifiant de l'annotation mise à jour
     """    
 
-    # Vérifier que le projet appartient à l'utilisateur
-    project = db.query(Project).filter(Project.id == project_id, Project.user_id == current_user.id).first()
+    # Vérifier que l'utilisateur peut annoter le projet
+    project = (await db.execute(
+        select(Project.id, Project.categories).where(Project.id == project_id, annotator_access(current_user.id))
+    )).first()
     if not project:
         raise HTTPException(status_code=404, detail="Projet non trouvé")
+    if payload.category not in (project.categories or []):
+        raise HTTPException(status_code=422, detail=f"Catégorie inconnue : {payload.category}")
     
-    # Récupérer l'annotation à mettre à jour
-    annotation = db.query(Annotation).filter(Annotation.id == payload.annotationId, Annotation.project_id == project_id).first()
+    # Récupérer l'annotation à mettre à jour, verrouillée jusqu'au commit
+    # pour que deux soumissions simultanées ne comptent pas deux fois la même ligne
+    annotation = await db.scalar(
+        select(Annotation)
+        .where(Annotation.id == payload.annotationId, Annotation.project_id == project_id)
+        .with_for_update()
+    )
     if not annotation:
         raise HTTPException(status_code=404, detail="Annotation non trouvée")
+    if held_by_other(annotation.leased_by, annotation.lease_expires_at, current_user.id, datetime.now()):
+        raise HTTPException(status_code=409, detail="Ligne attribuée à un autre annotateur")
     
-    # mettre à jour l'annotation
+    # mettre à jour l'annotation et rendre le bail éventuel
+    newly_annotated = annotation.content is None
     annotation.content = payload.category
     annotation.date = payload.date
+    annotation.annotator_id = current_user.id
+    annotation.leased_by = None
+    annotation.lease_expires_at = None
+
+    # compteurs de l'annotateur (et statut completed du projet) dans la même transaction
+    await record_annotations_async(db, project_id, current_user.id, [(payload.date, newly_annotated)])
 
-    db.commit()
-    db.refresh(annotation)
+    await db.commit()
 
-    return {"message": "Annotation enregistrée", "annotation_id": annotation.id}
\ No newline at end of file
+    return {"message": "Annotation enregistrée", "annotation_id": payload.annotationId}
+
+
+
+@router.post("/{project_id}/submit/batch")
+async def update_annotations_batch(
+    project_id: int,
+    payload: AnnotationBatchSubmit,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    """Met à jour un lot d'annotations d'un projet en une seule transaction.
+    Variante de /{project_id}/submit pour les annotateurs rapides :
+        - vérifier une seule fois que l'utilisateur authentifié est le propriétaire ou un membre du projet
+        - refuser le lot si l'une des catégories ne fait pas partie des catégories du projet
+        - verrouiller les annotations du lot qui appartiennent au projet (par identifiant croissant)
+          et relever celles encore vides
+        - écarter les lignes attribuées à un autre annotateur par un bail en cours
+        - appliquer toutes les annotations avec un seul UPDATE ... FROM (VALUES ...), en enregistrant
+          l'annotateur et en rendant les baux
+        - incrémenter les compteurs de l'annotateur par jour, et valider le tout en un seul commit
+        - publier le passage à completed aux connexions SSE de l'utilisateur (la progression
+          est publiée par le report des compteurs)
+
+    Args:
+        project_id (int): identifiant du projet
+        payload (AnnotationBatchSubmit): lot d'annotations (annotationId, category, date)
+        db (AsyncSession, optional): session sqlalchemy asynchrone. Defaults to Depends(get_async_db).
+        current_user (_type_, optional): utilisateur authentifié. Defaults to Depends(get_current_user).
+
+    Raises:
+        HTTPException: le projet n'existe pas ou n'est pas accessible à l'utilisateur
+        HTTPException 422: une catégorie du lot ne fait pas partie des catégories du projet
+
+    Returns:
+        dict: nombre d'annotations enregistrées et résultat par annotation ("saved", "not_found"
+        ou "leased" si la ligne est attribuée à un autre annotateur)
+    """    
+
+    # Vérifier que l'utilisateur peut annoter le projet
+    project = (await db.execute(
+        select(Project.id, Project.categories).where(Project.id == project_id, annotator_access(current_user.id))
+    )).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Projet non trouvé")
+    # Le lot est refusé en entier si une catégorie n'appartient pas au projet
+    unknown = sorted({item.category for item in payload.annotations} - set(project.categories or []))
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Catégories inconnues : {', '.join(unknown)}")
+
+    # Dédoublonnage : la dernière valeur envoyée pour une annotation est retenue
+    items = {item.annotationId: item for item in payload.annotations}
+
+    # Verrouiller les annotations du lot liées au projet, en relevant celles qui étaient vides
+    # et en écartant celles qu'un autre annotateur tient par un bail en cours.
+    # Les verrous sont pris dans l'ordre des identifiants : deux lots qui se recouvrent
+    # s'attendent au lieu de s'interbloquer
+    result = await db.execute(
+        select(Annotation.id, Annotation.content.is_(None), Annotation.leased_by, Annotation.lease_expires_at)
+        .where(Annotation.project_id == project_id, Annotation.id.in_(items))
+        .order_by(Annotation.id)
+        .with_for_update()
+    )
+    now = datetime.now()
+    previous = {}
+    leased = set()
+    for annotation_id, empty, leased_by, lease_expires_at in result.all():
+        if held_by_other(leased_by, lease_expires_at, current_user.id, now):
+            leased.add(annotation_id)
+        else:
+            previous[annotation_id] = empty
+
+    rows = [(annotation_id, items[annotation_id].category, items[annotation_id].date) for annotation_id in previous]
+    if rows and db.bind.dialect.name == "postgresql":
+        # Une seule requête pour tout le lot : UPDATE annotations ... FROM (VALUES ...)
+        batch = values(
+            column("id", Integer), column("content", String), column("date", DateTime),
+            name="batch"
+        ).data(rows)
+        await db.execute(
+            update(Annotation)
+            .where(Annotation.id == batch.c.id)
+            .values(
+                content=batch.c.content, date=batch.c.date,
+                annotator_id=current_user.id, leased_by=None, lease_expires_at=None
+            )
+            .execution_options(synchronize_session=False)
+        )
+    elif rows:
+        # Les autres bases (SQLite) n'acceptent pas les alias de colonnes sur VALUES :
+        # UPDATE par clé primaire exécuté en executemany
+        await db.execute(
+            update(Annotation),
+            [
+                {
+                    "id": annotation_id, "content": content, "date": date,
+                    "annotator_id": current_user.id, "leased_by": None, "lease_expires_at": None
+                }
+                for annotation_id, content, date in rows
+            ]
+        )
+
+    # compteurs de l'annotateur (et statut completed du projet) dans la même transaction
+    await record_annotations_async(
+        db, project_id, current_user.id,
+        [(items[annotation_id].date, newly_annotated) for annotation_id, newly_annotated in previous.items()]
+    )
+
+    await db.commit()
+
+    return {
+        "message": "Annotations enregistrées",
+        "saved": len(previous),
+        "results": [
+            {
+                "annotation_id": annotation_id,
+                "status": "saved" if annotation_id in previous else "leased" if annotation_id in leased else "not_found"
+            }
+            for annotation_id in items
+        ]
+    }
+
+
+
+@router.get("/{project_id}/search")
+def search_project_rows(
+    project_id: int,
+    q: str | None = Query(None, max_length=MAX_SEARCH_LENGTH),
+    match: SearchMatch = "words",
+    label: str | None = None,
+    annotated: bool | None = None,
+    after: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Cherche des lignes d'un projet par texte, catégorie et état d'annotation.
+        - vérifier que le projet existe, appartient à l'utilisateur et que son import est terminé
+        - combiner les filtres : texte (q), catégorie (label), lignes annotées ou non (annotated)
+        - renvoyer une page de lignes triées par row_id, avec leur texte et leur annotation
+        - renvoyer le curseur à passer en `after` pour obtenir la page suivante
+    Sous PostgreSQL, le texte est cherché avec les index GIN de row_texts (plein texte et trigrammes),
+    sous SQLite avec un index inversé construit en mémoire à la première recherche (voir core/search.py).
+
+    Args:
+        project_id (int): identifiant du projet
+        q (str | None, optional): texte recherché. Defaults to Query(None).
+        match (SearchMatch, optional): "words" (tous les mots) ou "contains" (sous-chaîne). Defaults to "words".
+        label (str | None, optional): catégorie des lignes. Defaults to None.
+        annotated (bool | None, optional): lignes annotées (true) ou non annotées (false). Defaults to None.
+        after (int, optional): row_id de la dernière ligne déjà reçue, 0 pour commencer au début. Defaults to 0.
+        limit (int, optional): nombre maximum de lignes renvoyées. Defaults to 50.
+        db (Session, optional): session sqlalchemy. Defaults to Depends(get_db).
+        current_user (dict, optional): utilisateur authentifié. Defaults to Depends(get_current_user).
+
+    Raises:
+        HTTPException 404: le projet n'existe pas ou n'appartient pas à l'utilisateur authentifié
+        HTTPException 400: l'encodage du csv n'a pas pu être détecté
+        HTTPException 409: si l'import du fichier csv est en cours ou a échoué
+
+    Returns:
+        dict: lignes trouvées (annotation et texte) et curseur de la page suivante (None à la fin)
+    """
+    project = db.query(Project).filter(Project.id == project_id, Project.user_id == current_user.id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Projet non trouvé")
+    ensure_ingested(project)
+
+    query = q.strip() if q else None
+    try:
+        annotations = search_annotations(db, project, query, match, label, annotated, after, limit + 1)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Impossible de détecter l'encodage du fichier CSV")
+    has_more = len(annotations) > limit
+    annotations = annotations[:limit]
+    texts = read_texts(project, [a.row_id for a in annotations])
+
+    return {
+        "id": project.id,
+        "next_after": annotations[-1].row_id if has_more else None,
+        "annotations": [
+            {
+                "id": a.id,
+                "row_id": a.row_id,
+                "content": a.content,
+                "date": a.date,
+                "text": texts.get(a.row_id, "")
+            }
+            for a in annotations
+        ]
+    }
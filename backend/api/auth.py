@@ -1,13 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, Response
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
+import asyncio
 
-from database import get_db
-from crud import get_user_by_email
+from database import get_async_db
+from crud import get_user_by_email_async
 from schemas import LoginRequest
 from core.security import verify_password, create_access_token, get_current_user
 from core.config import settings
+from core.hashing import password_hasher
 
 
 router = APIRouter(
@@ -48,7 +50,7 @@ def protected_route(current_user: str = Depends(get_current_user)):
 
 
 @router.post("/login")
-def login(request: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Authentifie un utilisateur et génère un jeton d'accès JWT stocké dans un cookie HTTPOnly.
 
@@ -68,16 +70,17 @@ def login(request: LoginRequest, db: Session = Depends(get_db)):
 
     Paramètres : 
         request (LoginRequest) : Object contenant l'email et le mot de passe de l'utilisateur.
-        db (Session) : Session SQLAlchemy injectée via Depends(get_db)
+        db (AsyncSession) : Session SQLAlchemy asynchrone injectée via Depends(get_async_db)
 
     Exceptions : 
         HTTPException(401) : Identifiants incorrects (email inexistant ou mauvais mot de passe)
         HTTPException(403) : Compte vérouillé suite à trop de tentatives échouées.
+        HTTPException(503) : Pool de hachage des mots de passe saturé (en-tête Retry-After).
 
     Returns:
         JSONResponse : {sucess:True} avec un cookie HTTPOnly "access_token" valide pendant 1h.
     """
-    user = get_user_by_email(db, request.email)
+    user = await get_user_by_email_async(db, request.email)
     if not user :
         raise HTTPException(status_code = 401, detail = "Identifiants incorrects.")
     
@@ -86,19 +89,21 @@ def login(request: LoginRequest, db: Session = Depends(get_db)):
         remaining = int((user.lock_until - datetime.now()).total_seconds() // 60)
         raise HTTPException(status_code=403, detail = f'Trop de tentatives. Réessayez dans {remaining} minutes.')
 
-    # Vérifier le mot de passe
-    if not verify_password(request.password, user.password):
+    # Vérifier le mot de passe (bcrypt exécuté sur le pool de hachage dédié)
+    # l'attente se fait sans bloquer ni la boucle d'évènements ni le threadpool
+    password_ok = await asyncio.wrap_future(password_hasher.submit(verify_password, request.password, user.password))
+    if not password_ok:
         user.failed_attempts += 1
         if user.failed_attempts >= settings.MAX_ATTEMPTS:
             user.lock_until = datetime.now() + settings.LOCK_TIME
             user.failed_attempts = 0 # on remet à 0 pour repartir après le délai
-        db.commit()
+        await db.commit()
         raise HTTPException(status_code = 401, detail = "Identifiants incorrects.")
 
     # Connexion réussie : on reset le compteur
     user.failed_attempts = 0
     user.lock_until = None
-    db.commit()
+    await db.commit()
 
     # Création du JWT
     access_token = create_access_token({"sub": user.email})
@@ -1,16 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from core.security import get_current_user
-from database import get_db
-from crud import get_projects_by_user
-from models import User, Project, Annotation
+from database import get_db, get_async_db
+from models import User, Project
 import os
-from sqlalchemy import func
-from pathlib import Path
-from charset_normalizer import from_path
-import csv
-import io
+from core.row_store import open_row_store, row_store_paths
+from core.export import export_project_file, EXPORT_FORMATS
+from core.export_cache import export_cache
+from core.storage import blob_store
+from core.search import search_indexes
+from core.jobs import ensure_ingested
+from core.counters import project_progress
+from core.events import (
+    PROJECT_EVENT_COLUMNS, project_events, project_summary, project_deleted_event, HEARTBEAT_SECONDS, RETRY_MILLISECONDS
+)
+from typing import Literal
 
 
 
@@ -22,19 +30,19 @@ router = APIRouter(
 
 
 @router.get("/")
-def get_user_projects(
+async def get_user_projects(
     current_user : User = Depends(get_current_user), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Récupère la liste des projets appartenant à l'utilisateur authentifié.
-        - récupérer tous les projets associés à l'utilisateur 
-        - calculer le taux de complétion de chaque projet
-        - mettre automatiquement à jour le statut d'un projet à completed
+        - récupérer tous les projets associés à l'utilisateur en une seule requête, avec leurs
+        compteurs à jour (compteurs en attente des annotateurs compris, voir core/counters.py)
+        - calculer le taux de complétion de chaque projet à partir de ses compteurs
         - retourner une vue synthétique des projets dans le tableau de bord utilisateur
 
     Args:
         current_user (User, optional): utilisateur authentifié. Defaults to Depends(get_current_user).
-        db (Session, optional): session sqlalchemy. Defaults to Depends(get_db).
+        db (AsyncSession, optional): session sqlalchemy asynchrone. Defaults to Depends(get_async_db).
 
     Returns:
         dict: 
@@ -43,45 +51,64 @@ def get_user_projects(
     """    
 
     # Récupérer les projets de l'utilisateur
-    projects = get_projects_by_user(db, current_user.id)
+    projects = (await db.execute(
+        project_progress(*PROJECT_EVENT_COLUMNS).where(Project.user_id == current_user.id).order_by(Project.id)
+    )).all()
     if not projects:
         return {"has_projects": False, "projects": []}
     
-    project_list = []
-    # Calcul des statistiques pour chaque projet
-    for project in projects:
-        # nombre total d'annotation du projet
-        total_rows = db.query(func.count(Annotation.id)).filter(
-            Annotation.project_id == project.id
-        ).scalar()
-        # nombre d'annotation complétée
-        annotated_rows = db.query(func.count(Annotation.id)).filter(
-            Annotation.project_id == project.id,
-            Annotation.content.isnot(None)
-        ).scalar()
-        # calcul du taux de complétion
-        completion = 0
-        if total_rows > 0:
-            completion = round((annotated_rows / total_rows) * 100)
-
-        # mise à jour du statut so le projet est terminé
-        if completion == 100 and project.status == "pending":
-            project.status = "completed"
-            db.commit()
-            db.refresh(project)
-
-        project_list.append({
-            "id": project.id,
-            "project_name": project.project_name,
-            "due_date": project.due_date,
-            "status": project.status,
-            "completion": completion
-        })
+    # Les compteurs sont maintenus à l'écriture : aucune requête supplémentaire par projet
+    project_list = [project_summary(project) for project in projects]
 
     return {"has_projects": True, "projects": project_list}
 
 
 
+@router.get("/events")
+async def stream_project_events(current_user: User = Depends(get_current_user)):
+    """Flux Server-Sent Events des projets de l'utilisateur authentifié.
+    Remplace l'interrogation répétée de GET /dashboard : chaque message (champ data, JSON) est
+        - project : nouvel état d'un projet (création, progression, changement de statut),
+          mêmes champs qu'un projet de GET /dashboard
+        - deleted : projet supprimé (id)
+        - resync : des évènements ont été perdus, la liste doit être rechargée avec GET /dashboard
+    Les évènements sont délivrés au commit des modifications, par tous les workers sous
+    PostgreSQL (LISTEN/NOTIFY, voir core/events.py). Un commentaire est envoyé toutes les
+    HEARTBEAT_SECONDS secondes sur un flux inactif. Le navigateur (EventSource) se reconnecte
+    seul après une coupure, par exemple à l'arrêt d'un worker.
+
+    Args:
+        current_user (User, optional): utilisateur authentifié. Defaults to Depends(get_current_user).
+
+    Returns:
+        StreamingResponse: flux text/event-stream, ouvert jusqu'à la déconnexion du client
+    """
+    user_id = current_user.id
+
+    async def events():
+        queue = project_events.subscribe(user_id)
+        try:
+            yield f"retry: {RETRY_MILLISECONDS}\n\n"
+            while True:
+                try:
+                    payload = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                data = {key: value for key, value in payload.items() if key != "user_id"}
+                yield f"data: {json.dumps(data)}\n\n"
+        finally:
+            project_events.unsubscribe(user_id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # pas de mise en tampon par un proxy (nginx) ni de mise en cache
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+
 @router.delete("/annotations/{project_id}")
 def delete_user_project(
     project_id: int, 
@@ -89,9 +116,12 @@ def delete_user_project(
     db: Session = Depends(get_db)
 ):
     """Supprime un projet appartenant à l'utilisateur.
-        - vérifier que le projet existe et appartient à l'utilisateur
-        - supprimer les fichiers associés au projet (annotations et guidelines)
+        - vérifier que le projet existe et appartient à l'utilisateur, et que son import est terminé
+        - libérer les fichiers associés au projet (annotations et guidelines) : un fichier partagé
+        avec d'autres projets n'est supprimé qu'avec sa dernière référence
         - supprimer le projet et ses dépendances en base de données
+        - publier la suppression aux connexions SSE de l'utilisateur
+        - après le commit, supprimer les fichiers qui ne sont plus référencés
 
     Args:
         project_id (int): identifiant du projet à supprimer
@@ -100,123 +130,74 @@ def delete_user_project(
 
     Raises:
         HTTPException 404: si le projet n'existe pas
-        HTTPException 500: si une erreur survient lors de la supression du projet
+        HTTPException 409: si l'import du fichier csv est en cours
 
     Returns:
         dict: message de confirmation
     """    
 
-    # Vérifier et récupérer le projet
-    project = db.query(Project).filter(Project.id == project_id, Project.user_id == current_user.id).first()
+    # Vérifier et récupérer le projet, verrouillé jusqu'au commit : l'import ne peut pas se terminer entre temps
+    project = db.query(Project).filter(
+        Project.id == project_id, Project.user_id == current_user.id
+    ).with_for_update().first()
     if not project:
         raise HTTPException(status_code=404, detail="Projet non trouvé")
-
-    # Supprimer les fichiers stockés
-    for file_path in [project.annotation_file_path, project.guidelines_file_path]:
-        if file_path and os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"Erreur lors de la suppression du fichier: {e}")
+    # l'import en arrière-plan écrit les lignes du projet : il doit se terminer avant la suppression
+    if project.status == "ingesting":
+        raise HTTPException(status_code=409, detail="Import du fichier en cours")
+
+    # Libérer les fichiers stockés : ceux qui ne sont plus référencés, y compris le stock de lignes,
+    # sont supprimés après le commit, pour qu'une suppression annulée ne perde aucun fichier
+    unreferenced = []
+    if project.guidelines_file_path and blob_store.release(db, project.guidelines_file_path):
+        unreferenced.append((project.guidelines_file_path, ()))
+    if project.annotation_file_path and blob_store.release(db, project.annotation_file_path):
+        unreferenced.append((project.annotation_file_path, row_store_paths(project.annotation_file_path)))
+    export_cache.purge(project.id)
+    search_indexes.discard(project.id)
 
     # Supprimer le projet dans la base de données
+    project_events.publish(db, project_deleted_event(project))
     db.delete(project)
     db.commit()
 
-    return {"message": "Projet supprimé avec succès"}
-
-
-
-def generate_csv(
-        project: Project, 
-        annotations_by_row: dict[Annotation]
-):
-    """Génère un fichier CSV enrichi avec les annotations du projet.
-    Cette fonction lit le fichier CSV d'origine du projet et y ajoute 2 colonnes : 
-        - annotation : contenu de l'annotation associé à chaque ligne
-        - date : date de validation de l'annotation
-
-    Le CSV est généré sous forme de flux avec un générateur pour faire un envoie
-    progressif vers le client (streaming), sans charger l'intégralité du fichier
-    en mémoire.
-
-    Args:
-        project (Project): projet contenant le chemin vers le fichier CSV d'origine
-        annotations_by_row (dict[Annotation]): dictionnaire associant un row_id (index de la ligne
-        du csv commençant à 1) à l'object Annotation correspondant.
-
-    Raises:
-        HTTPException 400: si l'encodage du fichier ne peut pas être détecté
-
-    Yields:
-        str: portions du fichier CSV généré prêtes à être envoyées au client
-    """    
-    # Chargement du fichier csv d'origine
-    csv_path = Path(project.annotation_file_path)
-    if csv_path.exists():
-        # détection automatique de l'encodage du fichier
-        result = from_path(csv_path).best()
-        if result is None:
-            raise HTTPException(status_code=400, detail="Impossible de détecter l'encodage du fichier CSV")
-        with open(csv_path, newline="", encoding=result.encoding) as csv_file:
-            reader = csv.DictReader(csv_file)
-
-            # New header enrichi
-            fieldnames = reader.fieldnames + ["annotation", "date"]
-
-            # Créer un fichier en mémoire pour le streaming
-            output = io.StringIO()
-            writer = csv.DictWriter(output, fieldnames=fieldnames)
+    for file_path, derived_paths in unreferenced:
+        blob_store.delete_unreferenced(db, file_path, derived_paths)
 
-            # Ecrire la première ligne et envoyer au client
-            writer.writeheader()
-            yield output.getvalue()
-
-            # Nettoyer le buffer mémoire
-            output.seek(0)
-            output.truncate(0)
-
-            # ajout des annotations ligne par ligne
-            for idx, row in enumerate(reader):
-                # /!\ row_id commence à 1
-                ann = annotations_by_row.get(idx+1)
-
-                row["annotation"] = ann.content if ann else ""
-                row["date"] = ann.date if ann else ""
-
-                writer.writerow(row)
-                # envoi de la ligne au client
-                yield output.getvalue()
-
-                # Nettoyage du buffer mémoire
-                output.seek(0)
-                output.truncate(0)
+    return {"message": "Projet supprimé avec succès"}
 
 
 
 @router.get("/annotations/{project_id}/export")
-async def export_project(
+def export_project(
     project_id: int, 
+    export_format: Literal["csv", "parquet", "arrow", "jsonl"] = Query("csv", alias="format"),
+    gzip: bool = False,
     current_user: User = Depends(get_current_user), 
     db: Session = Depends(get_db)
 ):
-    """Exporte les annotations d'un projet au format csv.
+    """Exporte les annotations d'un projet au format csv, parquet, arrow (flux IPC) ou jsonl.
         - vérifier que le projet existe et qu'il appartient à l'utilisateur
-        - récupérer toutes les annotations associées au projet
-        - générer un fichier csv enrichi (annotations et dates)
-        - envoyer le fichier au client sous forme de flux (streaming)
+        - envoyer directement le fichier en cache s'il a déjà été généré pour la version courante
+        - ouvrir le stock de lignes du projet
+        - fusionner les lignes et les annotations, lues par lots triés par row_id
+        - envoyer le fichier au client sous forme de flux (streaming), compressé si demandé
     Le fichier exporté reprend le fichier d'origine et ajoute 2 colonnes annotation et date
 
     Args:
         project_id (int): identifiant du projet à exporter
+        export_format (str, optional): paramètre format, format du fichier exporté. Defaults to "csv".
+        gzip (bool, optional): compresse le fichier à la volée (.gz), sauf parquet déjà compressé. Defaults to False.
         current_user (User, optional): utilisateur authentifié. Defaults to Depends(get_current_user).
         db (Session, optional): session sqlalchemy. Defaults to Depends(get_db).
 
     Raises:
         HTTPException: si le projet n'existe pas
+        HTTPException 400: si l'encodage du fichier ne peut pas être détecté ou si gzip est demandé pour parquet
+        HTTPException 409: si l'import du fichier csv est en cours ou a échoué
 
     Returns:
-        StreamingResponse: réponse http contenant le fichier csv généré dynamiquement, envoyée en streaming 
+        StreamingResponse: fichier en cache, ou fichier généré dynamiquement, envoyé en streaming
         pour optimiser l'utilisation mémoire
     """    
 
@@ -224,20 +205,38 @@ async def export_project(
     project = db.query(Project).filter(Project.id == project_id, Project.user_id == current_user.id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Projet non trouvé")
-    
-    # Récupérer toutes les annotations associées
-    annotations = db.query(Annotation).filter(Annotation.project_id == project_id).all()
-
-    # Faire un dict pour itérer avec le row_id d'annotations
-    annotations_by_row = {
-        ann.row_id: ann for ann in annotations
-    }
-
-    # génération et envoi du csv en streaming
+    ensure_ingested(project)
+
+    # parquet compresse déjà ses colonnes
+    if gzip and export_format == "parquet":
+        raise HTTPException(status_code=400, detail="Le format parquet est déjà compressé")
+
+    media_type = "application/gzip" if gzip else EXPORT_FORMATS[export_format][0]
+    filename = f"project_{project_id}export.{EXPORT_FORMATS[export_format][1]}" + (".gz" if gzip else "")
+    headers = {"Content-disposition": f"attachement; filename={filename}"}
+
+    # export déjà généré pour cette version des annotations : envoi direct du fichier en cache
+    # (version à jour : compteurs en attente des annotateurs compris)
+    version = db.scalar(project_progress(Project.annotation_version).where(Project.id == project_id))
+    # Le fichier est ouvert par le cache : il reste lisible même s'il est évincé pendant l'envoi
+    cached = export_cache.get(project_id, version, export_format, gzip)
+    if cached is not None:
+        headers["Content-Length"] = str(os.fstat(cached.fileno()).st_size)
+        return StreamingResponse(export_cache.stream(cached), media_type=media_type, headers=headers)
+
+    # Chargement du stock de lignes du projet, avant le début de l'envoi pour pouvoir renvoyer une erreur
+    try:
+        store = open_row_store(
+            project.annotation_file_path,
+            project.source_encoding, project.csv_delimiter, project.csv_quotechar
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Impossible de détecter l'encodage du fichier CSV")
+
+    # génération et envoi du fichier en streaming, écrit en même temps dans le cache
+    chunks = export_project_file(store, project_id, export_format, project.categories, compress=gzip)
     return StreamingResponse(
-        generate_csv(project = project, annotations_by_row=annotations_by_row),
-        media_type="text/csv",
-        headers={
-            "Content-disposition": f"attachement; filename=project_{project_id}export.csv"
-        }
-    )
\ No newline at end of file
+        export_cache.fill(project_id, version, export_format, gzip, chunks),
+        media_type=media_type,
+        headers=headers
+    )
@@ -0,0 +1,109 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+import secrets
+
+from core.config import settings
+from core.export_cache import export_cache
+from core.hashing import password_hasher
+from core.jobs import ingestion_jobs
+from core.metrics import render_metrics
+from core.pool import pool_stats
+from core.security import principal_cache
+from core.storage import blob_store
+from core.search import search_indexes
+from core.events import project_events
+from core.counters import counter_folder
+from database import engine, async_engine
+
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["internal"]
+)
+
+# Endpoints /metrics et /health, à la racine comme l'attendent Prometheus et les sondes
+metrics_router = APIRouter(
+    tags=["internal"]
+)
+
+
+def check_internal_token(x_internal_token: str | None = Header(default=None)):
+    """Vérifie le jeton des endpoints internes (/internal/stats, /metrics).
+
+    Les endpoints sont fermés par défaut : tant que INTERNAL_STATS_TOKEN n'est pas défini,
+    ils répondent 404 comme s'ils n'existaient pas.
+
+    Args:
+        x_internal_token (str | None, optional): valeur de l'en-tête X-Internal-Token
+
+    Raises:
+        HTTPException (404): si aucun jeton n'est configuré
+        HTTPException (403): si le jeton est absent ou incorrect
+    """
+    if not settings.INTERNAL_STATS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_internal_token is None or not secrets.compare_digest(x_internal_token, settings.INTERNAL_STATS_TOKEN):
+        raise HTTPException(status_code=403, detail="Accès refusé")
+
+
+@router.get("/stats", dependencies=[Depends(check_internal_token)])
+def get_internal_stats():
+    """Expose les métriques internes du processus pour dimensionner le déploiement.
+        - pools de connexions : emprunts, connexions utilisées, saturation et durée d'attente
+        - cache des utilisateurs authentifiés
+        - pool de hachage des mots de passe
+        - cache des exports
+        - tâches d'ingestion des fichiers CSV
+        - déduplication des fichiers téléversés
+        - index de recherche en mémoire (SQLite)
+        - évènements de projet poussés aux navigateurs (SSE)
+        - report des compteurs des annotateurs sur les projets
+
+    Les métriques sont propres au worker qui répond à la requête.
+
+    Returns:
+        dict:
+            - pools : métriques par moteur ("sync", "async")
+            - auth_cache : compteurs du cache d'authentification
+            - hashing : métriques du pool de hachage
+            - export_cache : taille, taux de succès et octets servis par le cache des exports
+            - ingestion : tâches d'import en cours, terminées et en échec
+            - storage : fichiers téléversés, fichiers déjà stockés et octets économisés
+            - search_index : projets indexés en mémoire, index réutilisés et construits
+            - events : connexions SSE ouvertes, évènements publiés, délivrés et files remplacées par resync
+            - counters : reports des compteurs effectués, lignes reportées et reports en échec
+    """
+    return {
+        "pools": pool_stats({"sync": engine, "async": async_engine.sync_engine}),
+        "auth_cache": principal_cache.stats(),
+        "hashing": password_hasher.stats(),
+        "export_cache": export_cache.stats(),
+        "ingestion": ingestion_jobs.stats(),
+        "storage": blob_store.stats(),
+        "search_index": search_indexes.stats(),
+        "events": project_events.stats(),
+        "counters": counter_folder.stats()
+    }
+
+
+@metrics_router.get("/metrics", dependencies=[Depends(check_internal_token)], include_in_schema=False)
+def get_metrics():
+    """Expose les métriques des requêtes HTTP au format texte de Prometheus.
+        - durée des requêtes par route, méthode et code de statut
+        - taille des réponses
+        - nombre de requêtes SQL et temps passé en base de données par requête
+
+    Returns:
+        Response: métriques au format texte de Prometheus
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@metrics_router.get("/health", include_in_schema=False)
+def get_health():
+    """Sonde de disponibilité : répond dès que le worker a terminé son démarrage (lifespan).
+
+    Returns:
+        dict: {"status": "ok"}
+    """
+    return {"status": "ok"}
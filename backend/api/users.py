@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
 
-from database import get_db
+from database import get_async_db
 from models import User
 from schemas import SignupRequest
 from core.security import hashpassword
-from crud import get_user_by_email
+from crud import get_user_by_email_async
+from core.hashing import password_hasher
 
 router = APIRouter(
     prefix = "/users",
@@ -14,7 +16,7 @@ router = APIRouter(
 )
 
 @router.post("/signup")
-def signup(request: SignupRequest, db: Session = Depends(get_db)):
+async def signup(request: SignupRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Endpoint pour l'inscription d'un nouvel utilisateur.
 
@@ -22,7 +24,7 @@ def signup(request: SignupRequest, db: Session = Depends(get_db)):
     1. Vérifie si un utilisateur avec l'email fourni existe déjà.
         - Si oui, envoie une exception HTTP 400 avec un message d'erreur.
     2. Crée un nouvel utilisateur avec les informations fournies.
-        - Le mot de passe est hashé avant d'être stocké.
+        - Le mot de passe est hashé avant d'être stocké, sur le pool de hachage dédié.
     3. Ajoute le nouvel utilisateur à la session et tente de le commit dans la base.
         - Si une erreur d'intégrité survient (ex: doublon de clé unique), rollback et renvoie
             HTTP 500.
@@ -35,11 +37,12 @@ def signup(request: SignupRequest, db: Session = Depends(get_db)):
             - email: str
             - password: str
             - company: Optional[str]
-        db (Session, optional): Session SQLAlchemy, injectée via Depends(get_db)
+        db (AsyncSession, optional): Session SQLAlchemy asynchrone, injectée via Depends(get_async_db)
 
     Raises:
         HTTPException 400 : si un utilisateur avec cet email existe déjà
         HTTPException 500 : si une erreur survient de la création de l'utilisateur en base
+        HTTPException 503 : si le pool de hachage des mots de passe est saturé
 
     Returns:
         dict: Dictionnaire avec {success: true} si la création a réussi.
@@ -59,25 +62,28 @@ def signup(request: SignupRequest, db: Session = Depends(get_db)):
     }
     """
     # Vérification si l'utilisateur existe déjà
-    user = get_user_by_email(db, request.email)
+    user = await get_user_by_email_async(db, request.email)
     if user:
         raise HTTPException(status_code=400, detail = "Un utilisateur avec cet email existe déjà.")
     
+    # Hachage du mot de passe sur le pool dédié, sans bloquer la boucle d'évènements
+    hashed_password = await asyncio.wrap_future(password_hasher.submit(hashpassword, request.password))
+
     # Création de l'utilisateur
     new_user = User(
         first_name = request.first_name,
         last_name = request.last_name,
         email = request.email,
-        password = hashpassword(request.password),
+        password = hashed_password,
         company = request.company
     )
 
     # Ajout à la session et commit
     db.add(new_user)
     try:
-        db.commit()
+        await db.commit()
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail = "Erreur lors de la création de l'utilisateur.")
     
     return {"success": True}
\ No newline at end of file
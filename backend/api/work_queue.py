@@ -0,0 +1,262 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from database import get_async_db
+from models import User, Annotation, ProjectMember
+from schemas import ProjectMemberAdd
+from core.config import settings
+from core.security import get_current_user
+from core.jobs import ensure_ingested
+from core.leases import claim_rows_async, release_rows_async
+from crud import get_user_by_email_async, get_user_project_async, get_annotator_project_async
+from api.annotations import read_texts, MAX_PAGE_SIZE
+
+
+
+router = APIRouter(
+    prefix="/annotations",
+    tags=["work queue"]
+)
+
+
+
+def _member_view(user: User, role: str, annotated: dict[int, int], leased: dict[int, int]) -> dict:
+    """Vue d'un annotateur du projet avec ses lignes annotées et ses baux en cours."""
+    return {
+        "user_id": user.id,
+        "email": user.email,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "role": role,
+        "annotated_rows": annotated.get(user.id, 0),
+        "leased_rows": leased.get(user.id, 0)
+    }
+
+
+
+@router.get("/{project_id}/members")
+async def get_project_members(
+    project_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Liste les annotateurs d'un projet : son propriétaire et les membres invités.
+        - vérifier que le projet appartient à l'utilisateur authentifié
+        - compter les lignes annotées par chaque annotateur (index sur project_id, annotator_id)
+        - compter les lignes attribuées à chaque annotateur par un bail en cours (index partiel sur les baux)
+
+    Args:
+        project_id (int): identifiant du projet
+        db (AsyncSession, optional): session sqlalchemy asynchrone. Defaults to Depends(get_async_db).
+        current_user (dict, optional): utilisateur authentifié. Defaults to Depends(get_current_user).
+
+    Raises:
+        HTTPException 404: le projet n'existe pas ou n'appartient pas à l'utilisateur authentifié
+
+    Returns:
+        dict: annotateurs du projet, propriétaire en premier
+    """
+    project = await get_user_project_async(db, project_id, current_user.id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Projet non trouvé")
+
+    annotated = dict((await db.execute(
+        select(Annotation.annotator_id, func.count())
+        .where(Annotation.project_id == project_id, Annotation.annotator_id.is_not(None))
+        .group_by(Annotation.annotator_id)
+    )).all())
+    leased = dict((await db.execute(
+        select(Annotation.leased_by, func.count())
+        .where(
+            Annotation.project_id == project_id,
+            Annotation.leased_by.is_not(None),
+            Annotation.lease_expires_at > datetime.now()
+        )
+        .group_by(Annotation.leased_by)
+    )).all())
+
+    owner = await db.get(User, project.user_id)
+    members = (await db.scalars(
+        select(User)
+        .join(ProjectMember, ProjectMember.user_id == User.id)
+        .where(ProjectMember.project_id == project_id)
+        .order_by(ProjectMember.created_at, User.id)
+    )).all()
+
+    return {
+        "id": project.id,
+        "members": [
+            _member_view(owner, "owner", annotated, leased),
+            *(_member_view(member, "member", annotated, leased) for member in members)
+        ]
+    }
+
+
+
+@router.post("/{project_id}/members", status_code=201)
+async def add_project_member(
+    project_id: int,
+    payload: ProjectMemberAdd,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Invite un utilisateur inscrit à annoter un projet.
+    Le membre peut ensuite lire le projet, demander des lignes (POST /{project_id}/leases)
+    et soumettre des annotations. L'invitation d'un membre existant ne change rien.
+
+    Args:
+        project_id (int): identifiant du projet
+        payload (ProjectMemberAdd): adresse email de l'utilisateur invité
+        db (AsyncSession, optional): session sqlalchemy asynchrone. Defaults to Depends(get_async_db).
+        current_user (dict, optional): utilisateur authentifié. Defaults to Depends(get_current_user).
+
+    Raises:
+        HTTPException 404: le projet n'existe pas ou n'appartient pas à l'utilisateur, ou aucun utilisateur n'a cette adresse
+        HTTPException 400: l'utilisateur invité est le propriétaire du projet
+
+    Returns:
+        dict: message de confirmation et identifiant du membre
+    """
+    project = await get_user_project_async(db, project_id, current_user.id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Projet non trouvé")
+
+    user = await get_user_by_email_async(db, payload.email)
+    if not user:
+        raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
+    if user.id == project.user_id:
+        raise HTTPException(status_code=400, detail="Le propriétaire annote déjà le projet")
+
+    if await db.get(ProjectMember, (project_id, user.id)) is None:
+        db.add(ProjectMember(project_id=project_id, user_id=user.id))
+        await db.commit()
+
+    return {"message": "Membre ajouté", "user_id": user.id}
+
+
+
+@router.delete("/{project_id}/members/{user_id}")
+async def remove_project_member(
+    project_id: int,
+    user_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Retire un membre d'un projet.
+    Ses annotations sont conservées, ses lignes non soumises sont rendues aussitôt aux autres annotateurs.
+
+    Args:
+        project_id (int): identifiant du projet
+        user_id (int): identifiant du membre
+        db (AsyncSession, optional): session sqlalchemy asynchrone. Defaults to Depends(get_async_db).
+        current_user (dict, optional): utilisateur authentifié. Defaults to Depends(get_current_user).
+
+    Raises:
+        HTTPException 404: le projet n'existe pas ou n'appartient pas à l'utilisateur, ou l'utilisateur n'en est pas membre
+
+    Returns:
+        dict: message de confirmation et nombre de lignes rendues
+    """
+    project = await get_user_project_async(db, project_id, current_user.id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Projet non trouvé")
+
+    member = await db.get(ProjectMember, (project_id, user_id))
+    if member is None:
+        raise HTTPException(status_code=404, detail="Membre non trouvé")
+    await db.delete(member)
+    released = await release_rows_async(db, project_id, user_id)
+    await db.commit()
+
+    return {"message": "Membre retiré", "released": released}
+
+
+
+@router.post("/{project_id}/leases")
+async def claim_project_rows(
+    project_id: int,
+    size: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Attribue à l'annotateur authentifié un lot de lignes non annotées du projet.
+    Plusieurs annotateurs (propriétaire et membres) se partagent ainsi un même projet sans
+    annoter deux fois la même ligne :
+        - les lignes sont attribuées par bail pour LEASE_SECONDS secondes, avec
+          SELECT ... FOR UPDATE SKIP LOCKED sous PostgreSQL (voir core/leases.py) : deux
+          demandes simultanées reçoivent des lignes différentes, sans s'attendre
+        - les lignes déjà attribuées à l'annotateur sont renvoyées en premier et leur bail est
+          prolongé : rappeler cette route renouvelle le lot en cours
+        - les lignes d'un bail expiré sont attribuées à nouveau
+        - la soumission d'une ligne (submit, submit/batch) rend son bail, une ligne tenue par
+          un autre annotateur est refusée
+    Un lot vide signifie qu'il ne reste aucune ligne libre.
+
+    Args:
+        project_id (int): identifiant du projet
+        size (int, optional): nombre de lignes demandées. Defaults to 50.
+        db (AsyncSession, optional): session sqlalchemy asynchrone. Defaults to Depends(get_async_db).
+        current_user (dict, optional): utilisateur authentifié. Defaults to Depends(get_current_user).
+
+    Raises:
+        HTTPException 404: le projet n'existe pas ou n'est pas accessible à l'utilisateur authentifié
+        HTTPException 400: l'encodage du csv n'a pas pu être détecté
+        HTTPException 409: si l'import du fichier csv est en cours ou a échoué
+
+    Returns:
+        dict: fin des baux et lignes attribuées avec leur texte, par row_id croissant
+    """
+    project = await get_annotator_project_async(db, project_id, current_user.id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Projet non trouvé")
+    ensure_ingested(project)
+
+    lease_expires_at, rows = await claim_rows_async(db, project_id, current_user.id, size)
+    await db.commit()
+
+    # Lecture du stock de lignes pour les seules lignes attribuées (lecture de fichiers : threadpool)
+    texts = await run_in_threadpool(read_texts, project, [row.row_id for row in rows])
+
+    return {
+        "id": project.id,
+        "categories": project.categories,
+        "lease_expires_at": lease_expires_at,
+        "lease_seconds": settings.LEASE_SECONDS,
+        "annotations": [
+            {"id": row.id, "row_id": row.row_id, "text": texts.get(row.row_id, "")}
+            for row in rows
+        ]
+    }
+
+
+
+@router.delete("/{project_id}/leases")
+async def release_project_rows(
+    project_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Rend les lignes non soumises de l'annotateur authentifié (fin de session d'annotation).
+    Elles sont attribuées aussitôt aux autres annotateurs, sans attendre l'expiration des baux.
+
+    Args:
+        project_id (int): identifiant du projet
+        db (AsyncSession, optional): session sqlalchemy asynchrone. Defaults to Depends(get_async_db).
+        current_user (dict, optional): utilisateur authentifié. Defaults to Depends(get_current_user).
+
+    Raises:
+        HTTPException 404: le projet n'existe pas ou n'est pas accessible à l'utilisateur authentifié
+
+    Returns:
+        dict: nombre de lignes rendues
+    """
+    project = await get_annotator_project_async(db, project_id, current_user.id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Projet non trouvé")
+
+    released = await release_rows_async(db, project_id, current_user.id)
+    await db.commit()
+
+    return {"released": released}
@@ -0,0 +1,126 @@
+# Benchmark : soumission d'annotations, session synchrone (threadpool) contre session asynchrone
+#
+# Utilisation (depuis le dossier backend, DATABASE_URL pointant vers une base de test) :
+#   python -m benchmarks.bench_async_db --rows 20000 --submits 5000 --concurrency 50
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime
+
+from sqlalchemy import select, delete
+from starlette.concurrency import run_in_threadpool
+
+from database import engine, async_engine, SessionLocal, AsyncSessionLocal, Base
+from models import User, Project, Annotation
+from core.ingestion import bulk_insert_annotations
+from core.counters import record_annotations, record_annotations_async
+
+
+def setup(rows: int) -> tuple[int, int, list[int]]:
+    """Crée un utilisateur et un projet de test avec `rows` lignes à annoter."""
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user = User(email=f"bench-{time.time_ns()}@exemple.fr", password="x", first_name="Bench", last_name="Mark")
+        db.add(user)
+        db.flush()
+        project = Project(
+            user_id=user.id, project_name="bench", due_date=datetime.now().date(),
+            annotation_file_path="bench.csv", guidelines_file_path="", categories=["a", "b"],
+            created_at=datetime.now()
+        )
+        db.add(project)
+        db.flush()
+        bulk_insert_annotations(db, project.id, range(1, rows + 1))
+        project.total_rows = rows
+        db.commit()
+        annotation_ids = list(db.scalars(select(Annotation.id).where(Annotation.project_id == project.id)))
+        return user.id, project.id, annotation_ids
+
+
+def teardown(user_id: int) -> None:
+    with SessionLocal() as db:
+        db.execute(delete(User).where(User.id == user_id))
+        db.commit()
+
+
+def submit_sync(user_id: int, project_id: int, annotation_id: int) -> None:
+    """Chemin synchrone : même séquence de requêtes que update_annotations avant la session asynchrone."""
+    with SessionLocal() as db:
+        db.query(Project.id).filter(Project.id == project_id, Project.user_id == user_id).first()
+        annotation = db.query(Annotation).filter(
+            Annotation.id == annotation_id, Annotation.project_id == project_id
+        ).with_for_update().first()
+        newly_annotated = annotation.content is None
+        annotation.content = random.choice(["a", "b"])
+        annotation.date = datetime.now()
+        record_annotations(db, project_id, user_id, [(annotation.date, newly_annotated)])
+        db.commit()
+
+
+async def submit_async(user_id: int, project_id: int, annotation_id: int) -> None:
+    """Chemin asynchrone : séquence de requêtes de update_annotations avec AsyncSession."""
+    async with AsyncSessionLocal() as db:
+        await db.scalar(select(Project.id).where(Project.id == project_id, Project.user_id == user_id))
+        annotation = await db.scalar(
+            select(Annotation)
+            .where(Annotation.id == annotation_id, Annotation.project_id == project_id)
+            .with_for_update()
+        )
+        newly_annotated = annotation.content is None
+        annotation.content = random.choice(["a", "b"])
+        annotation.date = datetime.now()
+        await record_annotations_async(db, project_id, user_id, [(annotation.date, newly_annotated)])
+        await db.commit()
+
+
+async def run(mode: str, user_id: int, project_id: int, annotation_ids: list[int], submits: int, concurrency: int) -> dict:
+    """Lance `submits` soumissions avec au plus `concurrency` soumissions simultanées."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(annotation_id: int):
+        async with semaphore:
+            start = time.perf_counter()
+            if mode == "sync":
+                await run_in_threadpool(submit_sync, user_id, project_id, annotation_id)
+            else:
+                await submit_async(user_id, project_id, annotation_id)
+            latencies.append(time.perf_counter() - start)
+
+    targets = [random.choice(annotation_ids) for _ in range(submits)]
+    start = time.perf_counter()
+    await asyncio.gather(*(one(annotation_id) for annotation_id in targets))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "mode": mode,
+        "submits": submits,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "submits_per_second": round(submits / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+
+
+async def main(args) -> None:
+    user_id, project_id, annotation_ids = await run_in_threadpool(setup, args.rows)
+    try:
+        results = []
+        for mode in ("sync", "async"):
+            results.append(await run(mode, user_id, project_id, annotation_ids, args.submits, args.concurrency))
+        print(json.dumps(results, indent=2))
+    finally:
+        await run_in_threadpool(teardown, user_id)
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Soumissions synchrones contre asynchrones")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--submits", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,363 @@
+# Benchmark des routes principales sur des fichiers CSV synthétiques, avec baselines JSON
+#
+# L'application est appelée dans le processus (TestClient), contre la base de DATABASE_URL
+# (PostgreSQL local) ou, à défaut, une base SQLite créée dans le dossier de travail.
+#
+# Utilisation (depuis le dossier backend) :
+#   python -m benchmarks.bench_endpoints --sizes 10000,100000 --encodings utf_8,latin_1 \
+#       --output benchmarks/baselines/local.json
+#   python -m benchmarks.bench_endpoints --sizes 10000,100000 --encodings utf_8,latin_1 \
+#       --compare benchmarks/baselines/local.json
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmarks.synthetic import ENCODINGS, generate_csv
+
+BENCH_EMAIL = "bench@exemple.fr"
+BENCH_PASSWORD = "Bench-mark1!"
+# Intervalle d'interrogation de la progression de l'import
+POLL_SECONDS = 0.05
+# Taille des pages lues par le flux d'annotation
+PAGE_SIZE = 500
+# Métriques comparées aux baselines : latences (plus haut = régression) et débits (plus bas = régression)
+LATENCY_KEYS = ("p50_ms", "p90_ms", "p99_ms")
+THROUGHPUT_KEYS = ("rows_per_second", "mb_per_second")
+
+
+def percentile(values: list[float], rank: float) -> float:
+    """Percentile par rang le plus proche d'une liste de durées (en secondes), en millisecondes."""
+    ordered = sorted(values)
+    index = min(max(int(round(rank / 100 * len(ordered))) - 1, 0), len(ordered) - 1)
+    return round(ordered[index] * 1000, 2)
+
+
+def _reset_peak_rss() -> None:
+    """Remet à zéro le pic de mémoire du processus (Linux), pour mesurer chaque scénario séparément."""
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+    except OSError:
+        # autres systèmes : le pic mesuré est celui du processus depuis son démarrage
+        pass
+
+
+def peak_rss_mb() -> float:
+    """Pic de mémoire résidente du processus en Mio (VmHWM sous Linux, getrusage sinon)."""
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en octets sous macOS, en Kio ailleurs
+    return round(peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024, 1)
+
+
+class Scenario:
+    """Mesures d'un scénario : durée de chaque requête, lignes et octets traités, pic de mémoire.
+
+    Exemple d'utilisation:
+        with Scenario("get_user_projects", "GET /dashboard/") as scenario:
+            for _ in range(20):
+                with scenario.request():
+                    client.get("/dashboard/")
+        results[scenario.name] = scenario.result()
+    """
+
+    def __init__(self, name: str, endpoint: str):
+        self.name = name
+        self.endpoint = endpoint
+        self.latencies: list[float] = []
+        self.rows = 0
+        self.bytes = 0
+        self.elapsed = 0.0
+        self.rss = 0.0
+
+    def __enter__(self):
+        _reset_peak_rss()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self._start
+        self.rss = peak_rss_mb()
+
+    def request(self):
+        return _Timer(self.latencies)
+
+    def result(self) -> dict:
+        result = {
+            "endpoint": self.endpoint,
+            "requests": len(self.latencies),
+            "seconds": round(self.elapsed, 3),
+            "peak_rss_mb": self.rss
+        }
+        if self.latencies:
+            result.update({
+                "p50_ms": percentile(self.latencies, 50),
+                "p90_ms": percentile(self.latencies, 90),
+                "p99_ms": percentile(self.latencies, 99),
+                "max_ms": round(max(self.latencies) * 1000, 2)
+            })
+        if self.rows and self.elapsed:
+            result["rows_per_second"] = round(self.rows / self.elapsed, 1)
+        if self.bytes and self.elapsed:
+            result["mb_per_second"] = round(self.bytes / 1024 ** 2 / self.elapsed, 2)
+        return result
+
+
+class _Timer:
+    def __init__(self, latencies: list[float]):
+        self._latencies = latencies
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self._latencies.append(time.perf_counter() - self._start)
+
+
+def _check(response, expected: int = 200):
+    if response.status_code != expected:
+        raise RuntimeError(f"{response.request.method} {response.request.url} : {response.status_code} {response.text[:200]}")
+    return response
+
+
+def bench_project(client, csv_path: str, rows: int, args) -> dict:
+    """Enchaîne les scénarios sur un projet créé à partir de `csv_path`, puis le supprime."""
+    results = {}
+    generator = random.Random(args.seed)
+
+    # create_project : envoi du fichier (réponse 202) puis import en arrière-plan jusqu'au statut pending
+    with Scenario("create_project", "POST /annotations/create") as scenario:
+        with scenario.request(), open(csv_path, "rb") as file:
+            response = _check(client.post(
+                "/annotations/create",
+                data={"project_name": f"bench {rows}", "due_date": "2099-12-31", "categories": "positif,négatif,neutre"},
+                files={"annotation_file": (os.path.basename(csv_path), file, "text/csv")}
+            ), 202)
+        project_id = response.json()["project"]
+        while True:
+            progress = _check(client.get(f"/annotations/{project_id}/ingestion")).json()
+            if progress["status"] != "ingesting":
+                break
+            time.sleep(POLL_SECONDS)
+        if progress["status"] != "pending":
+            raise RuntimeError(f"Import du projet {project_id} en échec : {progress}")
+        scenario.rows = rows
+        scenario.bytes = os.path.getsize(csv_path)
+    results["create_project"] = scenario.result()
+
+    try:
+        with Scenario("get_project_details", "GET /annotations/{project_id}") as scenario:
+            for _ in range(args.repeat):
+                with scenario.request():
+                    _check(client.get(f"/annotations/{project_id}"))
+        results["get_project_details"] = scenario.result()
+
+        # get_project_annotations : liste complète avec les textes, limitée aux projets de taille raisonnable
+        if rows <= args.full_list_max_rows:
+            with Scenario("get_project_annotations", "GET /annotations/{project_id}/annotate") as scenario:
+                for _ in range(max(args.repeat // 10, 1)):
+                    with scenario.request():
+                        scenario.bytes += len(_check(client.get(f"/annotations/{project_id}/annotate")).content)
+                    scenario.rows += rows
+            results["get_project_annotations"] = scenario.result()
+
+        annotation_ids = []
+        with Scenario("get_project_annotations_page", "GET /annotations/{project_id}/annotate/page") as scenario:
+            after = 0
+            for _ in range(args.pages):
+                with scenario.request():
+                    page = _check(client.get(
+                        f"/annotations/{project_id}/annotate/page", params={"after": after, "limit": PAGE_SIZE}
+                    )).json()
+                scenario.rows += len(page["annotations"])
+                annotation_ids.extend(annotation["id"] for annotation in page["annotations"])
+                if page["next_after"] is None:
+                    break
+                after = page["next_after"]
+        results["get_project_annotations_page"] = scenario.result()
+
+        with Scenario("update_annotations", "POST /annotations/{project_id}/submit") as scenario:
+            for _ in range(args.submits):
+                payload = {
+                    "annotationId": generator.choice(annotation_ids),
+                    "category": generator.choice(("positif", "négatif", "neutre")),
+                    "date": datetime.now().isoformat()
+                }
+                with scenario.request():
+                    _check(client.post(f"/annotations/{project_id}/submit", json=payload))
+            scenario.rows = args.submits
+        results["update_annotations"] = scenario.result()
+
+        with Scenario("update_annotations_batch", "POST /annotations/{project_id}/submit/batch") as scenario:
+            for _ in range(max(args.submits // args.batch_size, 1)):
+                payload = {"annotations": [
+                    {
+                        "annotationId": generator.choice(annotation_ids),
+                        "category": generator.choice(("positif", "négatif", "neutre")),
+                        "date": datetime.now().isoformat()
+                    }
+                    for _ in range(args.batch_size)
+                ]}
+                with scenario.request():
+                    _check(client.post(f"/annotations/{project_id}/submit/batch", json=payload))
+                scenario.rows += args.batch_size
+        results["update_annotations_batch"] = scenario.result()
+
+        with Scenario("get_user_projects", "GET /dashboard/") as scenario:
+            for _ in range(args.repeat):
+                with scenario.request():
+                    _check(client.get("/dashboard/"))
+        results["get_user_projects"] = scenario.result()
+
+        # export_project : premier téléchargement généré (cache vide), le second servi depuis le cache
+        for export_format in args.export_formats:
+            for cache in ("miss", "hit"):
+                name = f"export_project_{export_format}_{cache}"
+                with Scenario(name, "GET /dashboard/annotations/{project_id}/export") as scenario:
+                    with scenario.request():
+                        with client.stream(
+                            "GET", f"/dashboard/annotations/{project_id}/export", params={"format": export_format}
+                        ) as response:
+                            _check(response)
+                            for chunk in response.iter_bytes():
+                                scenario.bytes += len(chunk)
+                    scenario.rows = rows
+                results[name] = scenario.result()
+    finally:
+        _check(client.delete(f"/dashboard/annotations/{project_id}"))
+    return results
+
+
+def metadata(database_url: str) -> dict:
+    """Contexte d'exécution enregistré avec les résultats : deux baselines ne se comparent
+    que sur la même machine et la même base de données."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "database": database_url.split(":", 1)[0]
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list[str]:
+    """Compare les résultats à une baseline et affiche les écarts.
+
+    Args:
+        baseline (dict): résultats de référence (fichier JSON écrit avec --output)
+        current (dict): résultats de l'exécution
+        tolerance (float): écart relatif toléré avant de signaler une régression (0.2 = 20 %)
+
+    Returns:
+        list[str]: régressions détectées, une par métrique
+    """
+    regressions = []
+    for key, result in current["results"].items():
+        reference = baseline["results"].get(key)
+        if reference is None:
+            print(f"{key} : absent de la baseline")
+            continue
+        for metric in (*LATENCY_KEYS, *THROUGHPUT_KEYS):
+            if metric not in result or not reference.get(metric):
+                continue
+            change = result[metric] / reference[metric] - 1
+            regressed = change > tolerance if metric in LATENCY_KEYS else change < -tolerance
+            line = f"{key} {metric} : {reference[metric]} -> {result[metric]} ({change:+.1%})"
+            print(("RÉGRESSION " if regressed else "") + line)
+            if regressed:
+                regressions.append(line)
+    return regressions
+
+
+def main(args) -> int:
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="labelia-bench-"))
+    os.makedirs(workdir, exist_ok=True)
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+
+    # l'application crée ses dossiers (uploads, cache des exports) dans le dossier courant
+    # et lit sa configuration à l'import : l'environnement est préparé avant d'importer main
+    os.chdir(workdir)
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    from fastapi.testclient import TestClient
+    from main import app
+
+    current = {"meta": metadata(os.environ["DATABASE_URL"]), "results": {}}
+    with TestClient(app) as client:
+        response = client.post("/users/signup", json={
+            "first_name": "Bench", "last_name": "Mark", "email": BENCH_EMAIL, "password": BENCH_PASSWORD
+        })
+        if response.status_code not in (200, 400):
+            _check(response)
+        _check(client.post("/auth/login", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD}))
+
+        for encoding in args.encodings:
+            for rows in args.sizes:
+                csv_path = os.path.join(workdir, f"synthetic_{rows}_{encoding}.csv")
+                if not os.path.exists(csv_path):
+                    generate_csv(csv_path, rows, encoding, long_text_ratio=args.long_text_ratio, seed=args.seed)
+                print(f"{encoding}, {rows} lignes...", file=sys.stderr)
+                for name, result in bench_project(client, csv_path, rows, args).items():
+                    current["results"][f"{name}[{encoding},{rows}]"] = result
+
+    print(json.dumps(current, indent=2, ensure_ascii=False))
+    if output:
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        with open(output, "w") as file:
+            json.dump(current, file, indent=2, ensure_ascii=False)
+    if baseline_path:
+        with open(baseline_path) as file:
+            regressions = compare(json.load(file), current, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} régression(s) au-delà de {args.tolerance:.0%}", file=sys.stderr)
+            return 1
+    return 0
+
+
+def _integers(value: str) -> list[int]:
+    return [int(item) for item in value.split(",")]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latences et débits des routes principales")
+    parser.add_argument("--sizes", type=_integers, default=[10_000, 100_000], help="nombres de lignes, ex. 10000,1000000")
+    parser.add_argument("--encodings", type=lambda value: value.split(","), default=["utf_8"],
+                        help=f"encodages parmi {','.join(ENCODINGS)}")
+    parser.add_argument("--long-text-ratio", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=50, help="requêtes par scénario de lecture")
+    parser.add_argument("--pages", type=int, default=50, help="pages lues dans le flux d'annotation")
+    parser.add_argument("--submits", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--full-list-max-rows", type=int, default=200_000,
+                        help="taille maximale des projets pour lesquels la liste complète est demandée")
+    parser.add_argument("--export-formats", type=lambda value: value.split(","), default=["csv"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="dossier des fichiers générés et de la base SQLite (temporaire par défaut)")
+    parser.add_argument("--output", help="fichier JSON où enregistrer les résultats (baseline)")
+    parser.add_argument("--compare", help="baseline JSON à comparer aux résultats")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,169 @@
+# Test de charge : plusieurs annotateurs se partagent un projet par baux (core/leases.py)
+#
+# Chaque annotateur demande un lot de lignes, les "lit" (--think-ms par ligne) puis soumet le lot,
+# jusqu'à ce qu'il ne reste plus de ligne libre. Le débit est mesuré pour chaque nombre
+# d'annotateurs : il doit croître linéairement tant que la base n'est pas saturée, et aucune
+# ligne ne doit être annotée deux fois. Avec --think-ms 0, le test mesure la contention en base.
+#
+# Utilisation (depuis le dossier backend, DATABASE_URL pointant vers une base de test) :
+#   python -m benchmarks.bench_leases --rows 20000 --annotators 1,2,4,8,16 --batch-size 50 --think-ms 2
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime
+
+from sqlalchemy import select, update, delete, func
+from starlette.concurrency import run_in_threadpool
+
+from database import engine, async_engine, SessionLocal, AsyncSessionLocal, Base
+from models import User, Project, Annotation, AnnotationDailyCount, AnnotationCountDelta, ProjectMember
+from core.ingestion import bulk_insert_annotations
+from core.counters import record_annotations_async, project_progress
+from core.leases import claim_rows_async
+from benchmarks.bench_endpoints import percentile
+
+
+def setup(rows: int, annotators: int) -> tuple[list[int], int]:
+    """Crée un projet de test avec `rows` lignes, son propriétaire et `annotators - 1` membres.
+
+    Returns:
+        tuple[list[int], int]: identifiants des annotateurs (propriétaire en premier) et du projet
+    """
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        users = [
+            User(email=f"bench-{time.time_ns()}-{index}@exemple.fr", password="x", first_name="Bench", last_name="Mark")
+            for index in range(annotators)
+        ]
+        db.add_all(users)
+        db.flush()
+        project = Project(
+            user_id=users[0].id, project_name="bench leases", due_date=datetime.now().date(),
+            annotation_file_path="bench.csv", guidelines_file_path="", categories=["a", "b"],
+            created_at=datetime.now()
+        )
+        db.add(project)
+        db.flush()
+        db.add_all(ProjectMember(project_id=project.id, user_id=user.id) for user in users[1:])
+        bulk_insert_annotations(db, project.id, range(1, rows + 1))
+        project.total_rows = rows
+        db.commit()
+        return [user.id for user in users], project.id
+
+
+def teardown(user_ids: list[int], project_id: int) -> None:
+    """Supprime le projet de test et ses annotateurs (dépendances supprimées une à une : SQLite
+    n'applique pas les ON DELETE CASCADE sans PRAGMA foreign_keys)."""
+    with SessionLocal() as db:
+        for model in (Annotation, AnnotationDailyCount, AnnotationCountDelta, ProjectMember):
+            db.execute(delete(model).where(model.project_id == project_id))
+        db.execute(delete(Project).where(Project.id == project_id))
+        db.execute(delete(User).where(User.id.in_(user_ids)))
+        db.commit()
+
+
+def check(project_id: int) -> dict:
+    """Vérifie l'état final du projet : toutes les lignes annotées, aucun bail restant."""
+    with SessionLocal() as db:
+        annotated, leased, annotators = db.execute(
+            select(
+                func.count(Annotation.content),
+                func.count(Annotation.leased_by),
+                func.count(func.distinct(Annotation.annotator_id))
+            ).where(Annotation.project_id == project_id)
+        ).one()
+        counter = db.scalar(project_progress(Project.annotated_rows).where(Project.id == project_id))
+    return {"annotated_rows": annotated, "counter": counter, "remaining_leases": leased, "annotators_seen": annotators}
+
+
+async def annotate(user_id: int, project_id: int, batch_size: int, think_seconds: float, stats: dict) -> None:
+    """Boucle d'un annotateur : demande un lot, le lit, le soumet, jusqu'à épuisement des lignes."""
+    while True:
+        start = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            _, rows = await claim_rows_async(db, project_id, user_id, batch_size)
+            await db.commit()
+        stats["claims"].append(time.perf_counter() - start)
+        if not rows:
+            return
+
+        await asyncio.sleep(think_seconds * len(rows))
+
+        # même séquence de requêtes que update_annotations_batch (SQLite : UPDATE en executemany)
+        start = time.perf_counter()
+        now = datetime.now()
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Annotation.id, Annotation.leased_by)
+                .where(Annotation.project_id == project_id, Annotation.id.in_([row.id for row in rows]))
+                .order_by(Annotation.id)
+                .with_for_update()
+            )
+            owned = [annotation_id for annotation_id, leased_by in result.all() if leased_by == user_id]
+            if owned:
+                await db.execute(update(Annotation), [
+                    {
+                        "id": annotation_id, "content": random.choice(("a", "b")), "date": now,
+                        "annotator_id": user_id, "leased_by": None, "lease_expires_at": None
+                    }
+                    for annotation_id in owned
+                ])
+            await record_annotations_async(db, project_id, user_id, [(now, True)] * len(owned))
+            await db.commit()
+        stats["submits"].append(time.perf_counter() - start)
+        stats["rows"] += len(owned)
+        stats["lost"] += len(rows) - len(owned)
+
+
+async def run(rows: int, annotators: int, batch_size: int, think_seconds: float) -> dict:
+    """Fait annoter un nouveau projet de `rows` lignes par `annotators` annotateurs simultanés."""
+    user_ids, project_id = await run_in_threadpool(setup, rows, annotators)
+    try:
+        stats = {"claims": [], "submits": [], "rows": 0, "lost": 0}
+        start = time.perf_counter()
+        await asyncio.gather(*(annotate(user_id, project_id, batch_size, think_seconds, stats) for user_id in user_ids))
+        elapsed = time.perf_counter() - start
+        final = await run_in_threadpool(check, project_id)
+    finally:
+        await run_in_threadpool(teardown, user_ids, project_id)
+    return {
+        "annotators": annotators,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(stats["rows"] / elapsed, 1),
+        "claim_p50_ms": percentile(stats["claims"], 50),
+        "claim_p99_ms": percentile(stats["claims"], 99),
+        "submit_p50_ms": percentile(stats["submits"], 50),
+        "submit_p99_ms": percentile(stats["submits"], 99),
+        # lignes soumises plus d'une fois (doit rester à 0) et lignes perdues par expiration d'un bail
+        "collisions": stats["rows"] - final["annotated_rows"],
+        "lost_leases": stats["lost"],
+        **final
+    }
+
+
+async def main(args) -> None:
+    try:
+        results = []
+        for annotators in args.annotators:
+            results.append(await run(args.rows, annotators, args.batch_size, args.think_ms / 1000))
+        # accélération par rapport au premier nombre d'annotateurs et efficacité (1.0 = linéaire)
+        reference = results[0]
+        for result in results:
+            speedup = result["rows_per_second"] / reference["rows_per_second"]
+            result["speedup"] = round(speedup, 2)
+            result["efficiency"] = round(speedup * reference["annotators"] / result["annotators"], 2)
+        print(json.dumps(results, indent=2))
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Annotateurs simultanés sur un même projet (baux)")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--annotators", type=lambda value: [int(item) for item in value.split(",")], default=[1, 2, 4, 8])
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--think-ms", type=float, default=2, help="temps de lecture d'une ligne par l'annotateur")
+    asyncio.run(main(parser.parse_args()))
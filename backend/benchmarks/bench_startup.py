@@ -0,0 +1,200 @@
+# Benchmark du démarrage : durée d'import de l'application, démarrage du serveur et mémoire par worker
+#
+# Utilisation (depuis le dossier backend, DATABASE_URL pointant vers une base de test,
+# SQLite dans un dossier temporaire sinon) :
+#   python -m benchmarks.bench_startup --imports 5 --workers 1,2,4 --output benchmarks/baselines/startup.json
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from benchmarks.bench_endpoints import metadata, percentile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Délai maximum de démarrage du serveur avant abandon
+STARTUP_TIMEOUT = 60
+POLL_SECONDS = 0.02
+# Modules affichés dans le détail des imports
+TOP_IMPORTS = 10
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+
+
+def measure_import(env: dict, workdir: str) -> tuple[float, list[tuple[str, float]]]:
+    """Importe main dans un nouveau processus Python.
+
+    Returns:
+        tuple[float, list[tuple[str, float]]]: durée du processus en secondes et durée cumulée
+        des imports directs de main (en millisecondes), du plus lent au plus rapide
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=workdir, env=env, capture_output=True, text=True, check=True
+    )
+    elapsed = time.perf_counter() - start
+    imports = []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        # deux espaces d'indentation : modules importés directement par main
+        if match and len(match.group(3)) == 3:
+            imports.append((match.group(4), round(int(match.group(2)) / 1000, 1)))
+    return elapsed, sorted(imports, key=lambda item: -item[1])[:TOP_IMPORTS]
+
+
+def _children(pid: int) -> list[int]:
+    """Processus fils d'un processus (workers gunicorn)."""
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as file:
+                # le nom du processus est entre parenthèses et peut contenir des espaces
+                fields = file.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return children
+
+
+def memory_mb(pid: int) -> dict:
+    """Mémoire d'un processus en Mio : résidente (RSS), proportionnelle (PSS, les pages partagées
+    sont divisées entre les processus qui les partagent) et privée (USS)."""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as file:
+            for line in file:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                    values[key] = int(rest.split()[0])
+    except OSError:
+        return {}
+    return {
+        "rss_mb": round(values.get("Rss", 0) / 1024, 1),
+        "pss_mb": round(values.get("Pss", 0) / 1024, 1),
+        "uss_mb": round((values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)) / 1024, 1)
+    }
+
+
+def _get(url: str) -> bool:
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status == 200
+    except OSError:
+        return False
+
+
+def measure_server(workers: int, port: int, env: dict, workdir: str, requests: int) -> dict:
+    """Démarre gunicorn.conf.py avec `workers` workers et mesure le démarrage et la mémoire.
+
+    Returns:
+        dict: durée jusqu'à la première réponse et jusqu'au démarrage de tous les workers,
+        mémoire du maître et moyenne par worker après `requests` requêtes
+    """
+    log_path = os.path.join(workdir, f"gunicorn_{workers}.log")
+    env = {**env, "WEB_CONCURRENCY": str(workers), "BIND": f"127.0.0.1:{port}"}
+    url = f"http://127.0.0.1:{port}/health"
+    with open(log_path, "w") as log:
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", os.path.join(BACKEND_DIR, "gunicorn.conf.py")],
+            cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+    try:
+        first_response = None
+        all_ready = None
+        while time.perf_counter() - start < STARTUP_TIMEOUT and all_ready is None:
+            if first_response is None and _get(url):
+                first_response = time.perf_counter() - start
+            with open(log_path) as log:
+                if log.read().count("Application startup complete") >= workers:
+                    all_ready = time.perf_counter() - start
+            time.sleep(POLL_SECONDS)
+        if first_response is None or all_ready is None:
+            raise RuntimeError(f"Le serveur n'a pas démarré en {STARTUP_TIMEOUT} s, voir {log_path}")
+
+        for _ in range(requests):
+            _get(url)
+        worker_memory = [memory_mb(pid) for pid in _children(process.pid)]
+        worker_memory = [memory for memory in worker_memory if memory]
+        result = {
+            "workers": workers,
+            "first_response_seconds": round(first_response, 3),
+            "all_workers_ready_seconds": round(all_ready, 3),
+            "master": memory_mb(process.pid)
+        }
+        if worker_memory:
+            result["per_worker"] = {
+                key: round(sum(memory[key] for memory in worker_memory) / len(worker_memory), 1)
+                for key in ("rss_mb", "pss_mb", "uss_mb")
+            }
+            result["total_pss_mb"] = round(
+                result["master"].get("pss_mb", 0) + sum(memory["pss_mb"] for memory in worker_memory), 1
+            )
+    finally:
+        # arrêt propre (SIGTERM) : mesure aussi la durée de l'arrêt
+        stop = time.perf_counter()
+        process.terminate()
+        try:
+            process.wait(timeout=STARTUP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    result["shutdown_seconds"] = round(time.perf_counter() - stop, 3)
+    return result
+
+
+def main(args) -> int:
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="labelia-startup-"))
+    os.makedirs(workdir, exist_ok=True)
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [BACKEND_DIR, os.environ.get("PYTHONPATH")])),
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "benchmark"),
+        "DATABASE_URL": os.environ.get("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'startup.db')}")
+    }
+
+    durations = []
+    imports = []
+    for _ in range(args.imports):
+        elapsed, imports = measure_import(env, workdir)
+        durations.append(elapsed)
+    results = {
+        "import_main": {
+            "runs": len(durations),
+            "p50_ms": percentile(durations, 50),
+            "max_ms": round(max(durations) * 1000, 2),
+            "slowest_imports_ms": dict(imports)
+        }
+    }
+    for workers in args.workers:
+        print(f"gunicorn, {workers} worker(s)...", file=sys.stderr)
+        results[f"server[{workers}]"] = measure_server(workers, args.port, env, workdir, args.requests)
+
+    current = {"meta": metadata(env["DATABASE_URL"]), "results": results}
+    print(json.dumps(current, indent=2, ensure_ascii=False))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as file:
+            json.dump(current, file, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Démarrage de l'application et mémoire par worker")
+    parser.add_argument("--imports", type=int, default=5, help="nombre d'imports de main mesurés")
+    parser.add_argument("--workers", type=lambda value: [int(item) for item in value.split(",")],
+                        default=[1, os.cpu_count() or 1], help="nombres de workers gunicorn, ex. 1,2,4")
+    parser.add_argument("--requests", type=int, default=50, help="requêtes envoyées avant la mesure de la mémoire")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workdir", help="dossier de travail du serveur (temporaire par défaut)")
+    parser.add_argument("--output", help="fichier JSON où enregistrer les résultats")
+    sys.exit(main(parser.parse_args()))
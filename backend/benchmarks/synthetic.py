@@ -0,0 +1,103 @@
+# Générateur de fichiers CSV synthétiques pour les benchmarks
+#
+# Utilisation (depuis le dossier backend) :
+#   python -m benchmarks.synthetic bench.csv --rows 1000000 --encoding latin_1 --long-text-ratio 0.05
+
+import argparse
+import csv
+import os
+import random
+
+# Encodages acceptés par la création de projet (détection par charset_normalizer)
+ENCODINGS = ("utf_8", "utf_8_sig", "latin_1", "cp1252")
+
+# Vocabulaire des textes : mots accentués, ponctuation et caractères propres à cp1252 (œ, €)
+WORDS = (
+    "le", "la", "les", "un", "une", "des", "et", "ou", "mais", "donc", "pour", "avec", "sans",
+    "annotation", "projet", "catégorie", "échéance", "données", "fichier", "ligne", "très",
+    "été", "où", "déjà", "à", "ça", "être", "forêt", "noël", "garçon", "hôpital", "élève",
+    "qualité", "réponse", "problème", "côté", "intérêt", "cœur", "œuvre", "coût", "prix", "10€",
+    "client", "service", "livraison", "commande", "produit", "retour", "délai", "satisfait",
+    "«", "»", "!", "?", ";", ",", "'", "\"", "(", ")", "-", "…"
+)
+
+# Longueur des textes en mots : courts pour la plupart, longs (plusieurs Ko) pour une part des lignes
+SHORT_TEXT_WORDS = (5, 60)
+LONG_TEXT_WORDS = (500, 3000)
+
+
+def _vocabulary(encoding: str) -> list[str]:
+    """Mots du vocabulaire représentables dans l'encodage (latin_1 n'a ni œ ni €)."""
+    vocabulary = []
+    for word in WORDS:
+        try:
+            word.encode(encoding)
+        except UnicodeEncodeError:
+            continue
+        vocabulary.append(word)
+    return vocabulary
+
+
+def generate_csv(
+    path: str,
+    rows: int,
+    encoding: str = "utf_8",
+    delimiter: str = ",",
+    long_text_ratio: float = 0.01,
+    multiline_ratio: float = 0.02,
+    seed: int = 0
+) -> int:
+    """Écrit un fichier CSV synthétique (text_id, text, source) de `rows` lignes.
+
+    Les textes mélangent accents, guillemets, séparateurs et retours à la ligne pour
+    couvrir les cas coûteux du parsing ; une part des lignes contient des textes longs.
+    Le fichier est écrit en flux et ne dépend que de `seed` : deux appels avec les mêmes
+    paramètres produisent le même fichier.
+
+    Args:
+        path (str): chemin du fichier à écrire
+        rows (int): nombre de lignes de données (hors header)
+        encoding (str, optional): encodage du fichier, voir ENCODINGS. Defaults to "utf_8".
+        delimiter (str, optional): séparateur. Defaults to ",".
+        long_text_ratio (float, optional): part des lignes avec un texte long. Defaults to 0.01.
+        multiline_ratio (float, optional): part des lignes avec un retour à la ligne dans le texte. Defaults to 0.02.
+        seed (int, optional): graine du générateur aléatoire. Defaults to 0.
+
+    Raises:
+        ValueError: si l'encodage n'est pas dans ENCODINGS
+
+    Returns:
+        int: taille du fichier écrit en octets
+    """
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Encodage non supporté : {encoding}")
+    generator = random.Random(seed)
+    vocabulary = _vocabulary(encoding)
+
+    with open(path, "w", encoding=encoding, newline="") as file:
+        writer = csv.writer(file, delimiter=delimiter)
+        writer.writerow(["text_id", "text", "source"])
+        for row_id in range(1, rows + 1):
+            bounds = LONG_TEXT_WORDS if generator.random() < long_text_ratio else SHORT_TEXT_WORDS
+            words = generator.choices(vocabulary, k=generator.randint(*bounds))
+            if generator.random() < multiline_ratio:
+                words.insert(len(words) // 2, "\n")
+            writer.writerow([row_id, " ".join(words), generator.choice(("web", "mail", "appel", "avis"))])
+    return os.path.getsize(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Génère un fichier CSV synthétique")
+    parser.add_argument("path")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--encoding", choices=ENCODINGS, default="utf_8")
+    parser.add_argument("--delimiter", default=",")
+    parser.add_argument("--long-text-ratio", type=float, default=0.01)
+    parser.add_argument("--multiline-ratio", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    size = generate_csv(
+        args.path, args.rows, args.encoding, args.delimiter,
+        args.long_text_ratio, args.multiline_ratio, args.seed
+    )
+    print(f"{args.path} : {args.rows} lignes, {size / 1024 ** 2:.1f} Mio")
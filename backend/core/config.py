@@ -14,14 +14,63 @@ class Settings(BaseSettings):
         ALGORITHM: Algorithme de signature des JWT (par défaut, HS256)
         ACCESS_TOKEN_EXPIRE_MINUTES : Durée de validité des tokens en minutes (par défaut, 60)
         DATABASE_URL : Châine de connexion à la base de données PostgreSQL
+        ASYNC_DATABASE_URL : Chaîne de connexion asynchrone (par défaut, dérivée de DATABASE_URL avec asyncpg)
         MAX_ATTEMPTS (int): Nombre maximum de tentatives de conexion avant verrouillage.
         LOCK_TIME: Durée de verrouillage après trop de tentatives (par défaut 60 minutes)
+        AUTH_CACHE_TTL_SECONDS (int): Durée de conservation d'un utilisateur authentifié en cache (par défaut 60 secondes)
+        AUTH_CACHE_MAX_ENTRIES (int): Nombre maximum de jetons gardés en cache (par défaut 10000)
+        HASH_WORKERS (int): Nombre de threads dédiés au hachage des mots de passe (par défaut 2)
+        HASH_MAX_PENDING (int): Nombre maximum de hachages en attente avant de répondre 503 (par défaut 16)
+        HASH_RETRY_AFTER_SECONDS (int): Valeur de l'en-tête Retry-After renvoyé en cas de saturation (par défaut 1)
+        WEB_CONCURRENCY (int): Nombre de workers uvicorn/gunicorn lancés (par défaut 1)
+        DB_MAX_CONNECTIONS (int): Budget de connexions PostgreSQL pour tous les workers (par défaut 80)
+        DB_POOL_SIZE (int | None): Connexions gardées ouvertes par pool (par défaut, calculé à partir du budget)
+        DB_MAX_OVERFLOW (int): Connexions supplémentaires ouvertes en cas de pic (par défaut 5)
+        DB_POOL_TIMEOUT (float): Attente maximale d'une connexion libre en secondes (par défaut 30)
+        DB_POOL_PRE_PING (bool): Vérifie la connexion avant chaque emprunt (par défaut True)
+        DB_POOL_RECYCLE (int): Durée de vie maximale d'une connexion en secondes (par défaut 1800)
+        EXPORT_CHUNK_SIZE (int): Taille des blocs envoyés pendant un export en octets (par défaut 1 Mio)
+        INGESTION_WORKERS (int): Nombre de threads dédiés à l'import des fichiers CSV (par défaut 1)
+        INGESTION_PROGRESS_INTERVAL_SECONDS (float): Intervalle d'enregistrement de la progression d'un import (par défaut 1)
+        EXPORT_CACHE_DIR (str): Dossier du cache des exports (par défaut export_cache)
+        EXPORT_CACHE_MAX_BYTES (int): Taille maximale du cache des exports en octets (par défaut 5 Gio)
+        INTERNAL_STATS_TOKEN (str | None): Jeton exigé par /internal/stats et /metrics dans l'en-tête X-Internal-Token. Sans jeton (par défaut), ces endpoints répondent 404
+        SEARCH_INDEX_CACHE_PROJECTS (int): Nombre de projets dont l'index de recherche en mémoire est gardé, sous SQLite (par défaut 4)
+        EVENTS_NOTIFY (bool): Diffuse les évènements de projet entre les workers par LISTEN/NOTIFY sous PostgreSQL (par défaut True)
+        LEASE_SECONDS (int): Durée d'un bail sur des lignes à annoter avant qu'elles soient attribuées à un autre annotateur (par défaut 900 secondes)
+        COUNTER_FOLD_SECONDS (float): Intervalle du report des compteurs des annotateurs sur les projets, voir core/counters.py (par défaut 5 secondes)
+        RUN_STARTUP_TASKS (bool): Crée le schéma et marque les imports interrompus au démarrage de l'application (par défaut True, 
+            gunicorn.conf.py les exécute une seule fois dans le processus maître et les désactive dans les workers)
     """
     SECRET_KEY: str
     ALGORITHM : str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES : int = 60
     DATABASE_URL : str
+    ASYNC_DATABASE_URL : str | None = None
     MAX_ATTEMPTS : int = 5
     LOCK_TIME : ClassVar[timedelta] = timedelta(minutes=60)
+    AUTH_CACHE_TTL_SECONDS : int = 60
+    AUTH_CACHE_MAX_ENTRIES : int = 10000
+    HASH_WORKERS : int = 2
+    HASH_MAX_PENDING : int = 16
+    HASH_RETRY_AFTER_SECONDS : int = 1
+    WEB_CONCURRENCY : int = 1
+    DB_MAX_CONNECTIONS : int = 80
+    DB_POOL_SIZE : int | None = None
+    DB_MAX_OVERFLOW : int = 5
+    DB_POOL_TIMEOUT : float = 30
+    DB_POOL_PRE_PING : bool = True
+    DB_POOL_RECYCLE : int = 1800
+    EXPORT_CHUNK_SIZE : int = 1024 * 1024
+    INGESTION_WORKERS : int = 1
+    INGESTION_PROGRESS_INTERVAL_SECONDS : float = 1
+    EXPORT_CACHE_DIR : str = "export_cache"
+    EXPORT_CACHE_MAX_BYTES : int = 5 * 1024 ** 3
+    INTERNAL_STATS_TOKEN : str | None = None
+    SEARCH_INDEX_CACHE_PROJECTS : int = 4
+    EVENTS_NOTIFY : bool = True
+    LEASE_SECONDS : int = 900
+    COUNTER_FOLD_SECONDS : float = 5
+    RUN_STARTUP_TASKS : bool = True
 
 settings = Settings()
\ No newline at end of file
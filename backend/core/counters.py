@@ -0,0 +1,425 @@
+# Compteurs de progression des projets (total_rows / annotated_rows) et nombre d'annotations par jour
+
+import asyncio
+import logging
+import threading
+from datetime import date, datetime
+
+from sqlalchemy import Row, Select, update, select, insert, func, case, and_, or_, exists, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from core.config import settings
+from database import SessionLocal
+from models import Project, Annotation, AnnotationDailyCount, AnnotationCountDelta
+from core.events import PROJECT_EVENT_COLUMNS, project_events, project_event
+
+logger = logging.getLogger(__name__)
+
+
+def _completed_status(annotated_rows, total_rows):
+    """Expression SQL du statut : passe de pending à completed lorsque toutes les lignes sont annotées."""
+    return case(
+        (and_(Project.status == "pending", total_rows > 0, annotated_rows >= total_rows), "completed"),
+        else_=Project.status
+    )
+
+
+def _pending(column):
+    """Somme des compteurs en attente d'un projet (sous-requête corrélée sur la clé primaire des deltas)."""
+    return (
+        select(func.coalesce(func.sum(column), 0))
+        .where(AnnotationCountDelta.project_id == Project.id)
+        .scalar_subquery()
+    )
+
+
+def project_progress(*columns) -> Select:
+    """SELECT de colonnes des projets avec leurs compteurs à jour.
+
+    annotated_rows, annotation_version et status sont calculés à partir du projet et de ses
+    compteurs en attente (annotation_count_deltas) : la lecture est exacte sans attendre le
+    report des compteurs, et sans verrou.
+
+    Exemple d'utilisation:
+        row = db.execute(project_progress(Project.id, Project.annotated_rows).where(Project.id == 1)).one()
+
+    Returns:
+        Select: requête des colonnes demandées, sans condition
+    """
+    annotated_rows = Project.annotated_rows + _pending(AnnotationCountDelta.new_rows)
+    current = {
+        "annotated_rows": annotated_rows,
+        "annotation_version": Project.annotation_version + _pending(AnnotationCountDelta.annotations),
+        "status": _completed_status(annotated_rows, Project.total_rows),
+    }
+    return select(*(current[column.key].label(column.key) if column.key in current else column for column in columns))
+
+
+def _daily_counts(annotations: list[tuple[datetime, bool]]) -> dict[date, tuple[int, int]]:
+    """Regroupe des annotations soumises par jour : nombre d'annotations et de nouvelles lignes annotées."""
+    counts = {}
+    for annotation_date, newly_annotated in annotations:
+        day = annotation_date.date()
+        labels, new_rows = counts.get(day, (0, 0))
+        counts[day] = (labels + 1, new_rows + int(newly_annotated))
+    return counts
+
+
+def _upsert_statement(dialect_name: str, model, keys: dict, counts: dict[date, tuple[int, int]]):
+    """Requête INSERT ... ON CONFLICT DO UPDATE qui incrémente des compteurs journaliers.
+
+    Les jours sont insérés dans l'ordre : deux requêtes concurrentes verrouillent les lignes
+    dans le même ordre et ne peuvent pas s'interbloquer.
+
+    Args:
+        dialect_name (str): nom du dialecte de la base
+        model: AnnotationDailyCount ou AnnotationCountDelta
+        keys (dict): colonnes de la clé primaire autres que day
+        counts (dict[date, tuple[int, int]]): annotations et nouvelles lignes par jour
+    """
+    dialect_insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    statement = dialect_insert(model).values([
+        {**keys, "day": day, "annotations": labels, "new_rows": new_rows}
+        for day, (labels, new_rows) in sorted(counts.items())
+    ])
+    return statement.on_conflict_do_update(
+        index_elements=[*keys, "day"],
+        set_={
+            "annotations": model.annotations + statement.excluded.annotations,
+            "new_rows": model.new_rows + statement.excluded.new_rows
+        }
+    )
+
+
+def _delta_statement(dialect_name: str, project_id: int, annotator_id: int, annotations: list[tuple[datetime, bool]]):
+    """Upsert des compteurs en attente de l'annotateur pour les jours des annotations."""
+    keys = {"project_id": project_id, "annotator_id": annotator_id}
+    return _upsert_statement(dialect_name, AnnotationCountDelta, keys, _daily_counts(annotations))
+
+
+def _mark_completed(project_id: int):
+    """Requête UPDATE qui passe le projet de pending à completed."""
+    return (
+        update(Project)
+        .where(Project.id == project_id, Project.status == "pending")
+        .values(status="completed")
+        .execution_options(synchronize_session=False)
+    )
+
+
+def record_annotations(
+    db: Session,
+    project_id: int,
+    annotator_id: int,
+    annotations: list[tuple[datetime, bool]]
+) -> Row | None:
+    """Enregistre des annotations soumises dans les compteurs d'un projet.
+
+    Chaque annotateur incrémente sa propre ligne de annotation_count_deltas pour le jour des
+    annotations (upsert) : des annotateurs simultanés ne modifient jamais la même ligne et
+    ne s'attendent pas jusqu'au commit, contrairement à un UPDATE de la ligne du projet.
+    Les compteurs en attente sont reportés sur le projet et sur annotation_daily_counts
+    par fold_counter_deltas. Le nouvel état du projet est relu avec project_progress.
+    Le projet n'est verrouillé qu'une fois, lorsque la dernière ligne est annotée (passage à completed) :
+    ce changement de statut est publié tout de suite aux connexions SSE du propriétaire. La
+    progression seule est publiée par fold_counter_deltas, une fois par report et par projet,
+    pour ne pas ajouter un NOTIFY (et son verrou global au commit) à chaque soumission.
+    Aucun commit n'est fait : les compteurs sont validés avec les annotations.
+
+    Args:
+        db (Session): session sqlalchemy
+        project_id (int): identifiant du projet
+        annotator_id (int): annotateur qui a soumis les annotations
+        annotations (list[tuple[datetime, bool]]): date de chaque annotation enregistrée et
+            indicateur de ligne annotée pour la première fois
+
+    Returns:
+        Row | None: nouvel état du projet (colonnes PROJECT_EVENT_COLUMNS), None si rien n'a été enregistré
+    """
+    if not annotations:
+        return None
+    db.execute(_delta_statement(db.get_bind().dialect.name, project_id, annotator_id, annotations))
+    progress = db.execute(project_progress(*PROJECT_EVENT_COLUMNS).where(Project.id == project_id)).first()
+    if progress is not None and progress.status == "completed":
+        if db.execute(_mark_completed(project_id)).rowcount:
+            project_events.publish(db, project_event(progress))
+    return progress
+
+
+async def record_annotations_async(
+    db: AsyncSession,
+    project_id: int,
+    annotator_id: int,
+    annotations: list[tuple[datetime, bool]]
+) -> Row | None:
+    """Équivalent asynchrone de record_annotations.
+
+    Args:
+        db (AsyncSession): session sqlalchemy asynchrone
+        project_id (int): identifiant du projet
+        annotator_id (int): annotateur qui a soumis les annotations
+        annotations (list[tuple[datetime, bool]]): date de chaque annotation enregistrée et
+            indicateur de ligne annotée pour la première fois
+
+    Returns:
+        Row | None: nouvel état du projet (colonnes PROJECT_EVENT_COLUMNS), None si rien n'a été enregistré
+    """
+    if not annotations:
+        return None
+    await db.execute(_delta_statement(db.bind.dialect.name, project_id, annotator_id, annotations))
+    progress = (await db.execute(project_progress(*PROJECT_EVENT_COLUMNS).where(Project.id == project_id))).first()
+    if progress is not None and progress.status == "completed":
+        if (await db.execute(_mark_completed(project_id))).rowcount:
+            await project_events.publish_async(db, project_event(progress))
+    return progress
+
+
+def fold_counter_deltas(db: Session, project_ids: list[int] | None = None, skip_locked: bool = True) -> int:
+    """Reporte les compteurs en attente sur les projets et sur annotation_daily_counts.
+
+    Les lignes de annotation_count_deltas sont verrouillées dans l'ordre de leur clé, ajoutées
+    à annotated_rows, annotation_version (et au statut) des projets et au nombre d'annotations
+    par jour, puis supprimées, dans la transaction de l'appelant : les lectures de
+    project_progress voient les compteurs avant ou après le report, jamais les deux.
+    La progression de chaque projet reporté est publiée aux connexions SSE de son propriétaire
+    (un évènement par projet et par report), délivrée au commit.
+    Avec skip_locked, les lignes qu'une soumission est en train de modifier sont sautées
+    (SKIP LOCKED sous PostgreSQL) et reportées au passage suivant : le report n'attend jamais
+    un annotateur. Aucun commit n'est fait.
+
+    Args:
+        db (Session): session sqlalchemy
+        project_ids (list[int] | None, optional): projets à reporter, tous si None. Defaults to None.
+        skip_locked (bool, optional): sauter les lignes verrouillées au lieu de les attendre. Defaults to True.
+
+    Returns:
+        int: nombre de lignes de compteurs reportées
+    """
+    statement = (
+        select(AnnotationCountDelta)
+        .order_by(AnnotationCountDelta.project_id, AnnotationCountDelta.annotator_id, AnnotationCountDelta.day)
+        .with_for_update(skip_locked=skip_locked)
+    )
+    if project_ids is not None:
+        statement = statement.where(AnnotationCountDelta.project_id.in_(project_ids))
+    deltas = db.scalars(statement).all()
+
+    counts: dict[int, dict[date, tuple[int, int]]] = {}
+    for delta in deltas:
+        days = counts.setdefault(delta.project_id, {})
+        labels, new_rows = days.get(delta.day, (0, 0))
+        days[delta.day] = (labels + delta.annotations, new_rows + delta.new_rows)
+        db.delete(delta)
+    db.flush()
+
+    dialect_name = db.get_bind().dialect.name
+    for project_id, days in sorted(counts.items()):
+        annotated_rows = Project.annotated_rows + sum(new_rows for _, new_rows in days.values())
+        db.execute(
+            update(Project)
+            .where(Project.id == project_id)
+            .values(
+                annotated_rows=annotated_rows,
+                annotation_version=Project.annotation_version + sum(labels for labels, _ in days.values()),
+                status=_completed_status(annotated_rows, Project.total_rows)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.execute(_upsert_statement(dialect_name, AnnotationDailyCount, {"project_id": project_id}, days))
+
+    if counts:
+        for progress in db.execute(
+            project_progress(*PROJECT_EVENT_COLUMNS).where(Project.id.in_(counts)).order_by(Project.id)
+        ):
+            project_events.publish(db, project_event(progress))
+    return len(deltas)
+
+
+def _rebuild_daily_counts(db: Session, project_ids: list[int] | None = None) -> None:
+    """Reconstruit le nombre d'annotations par jour des projets qui n'en ont pas encore.
+
+    Seule la date actuelle de chaque annotation est connue : chaque ligne annotée compte
+    pour une annotation et une nouvelle ligne le jour de sa dernière modification. Les projets
+    qui ont déjà des lignes dans annotation_daily_counts les gardent : elles contiennent les
+    modifications successives des lignes, que la table annotations ne permet pas de retrouver.
+    Les compteurs en attente écrits pendant le recalcul sont retirés de leur jour dans la même
+    requête que le comptage des annotations : une fois reportés, le cumul est celui d'une
+    reconstruction faite après le report, sans compter deux fois ces annotations.
+    """
+    day = func.date(Annotation.date)
+    annotated = (
+        select(Annotation.project_id, day.label("day"), func.count().label("annotations"), func.count().label("new_rows"))
+        .where(Annotation.content.is_not(None), Annotation.date.is_not(None))
+        .group_by(Annotation.project_id, day)
+    )
+    pending = select(
+        AnnotationCountDelta.project_id, AnnotationCountDelta.day,
+        -AnnotationCountDelta.annotations, -AnnotationCountDelta.new_rows
+    )
+    if project_ids is not None:
+        annotated = annotated.where(Annotation.project_id.in_(project_ids))
+        pending = pending.where(AnnotationCountDelta.project_id.in_(project_ids))
+    counts = union_all(annotated, pending).subquery()
+
+    annotations, new_rows = func.sum(counts.c.annotations), func.sum(counts.c.new_rows)
+    rebuilt = (
+        select(counts.c.project_id, counts.c.day, annotations, new_rows)
+        .where(~exists().where(AnnotationDailyCount.project_id == counts.c.project_id))
+        .group_by(counts.c.project_id, counts.c.day)
+        .having(or_(annotations != 0, new_rows != 0))
+    )
+    db.execute(
+        insert(AnnotationDailyCount).from_select(
+            ["project_id", "day", "annotations", "new_rows"], rebuilt
+        )
+    )
+
+
+def reconcile_project_counters(db: Session, project_ids: list[int] | None = None) -> int:
+    """Recalcule en masse les compteurs des projets à partir de la table annotations.
+
+    Utilisé pour initialiser les compteurs des projets existants ou pour corriger une
+    dérive : une seule agrégation GROUP BY sur les annotations, suivie d'un UPDATE ... FROM.
+    Le nombre d'annotations par jour est reconstruit de la même manière, pour les seuls
+    projets qui n'en ont pas encore (projets antérieurs aux compteurs).
+    Les compteurs en attente sont d'abord reportés (en attendant les soumissions en cours) ;
+    ceux écrits pendant le recalcul sont retirés de annotated_rows dans la même requête que
+    le comptage des annotations, pour ne pas être comptés deux fois.
+
+    Args:
+        db (Session): session sqlalchemy
+        project_ids (list[int] | None, optional): projets à recalculer, tous si None. Defaults to None.
+
+    Returns:
+        int: nombre de projets mis à jour
+    """
+    fold_counter_deltas(db, project_ids, skip_locked=False)
+
+    counts = select(
+        Annotation.project_id.label("project_id"),
+        func.count(Annotation.id).label("total_rows"),
+        func.count(Annotation.content).label("annotated_rows")
+    ).group_by(Annotation.project_id)
+    if project_ids is not None:
+        counts = counts.where(Annotation.project_id.in_(project_ids))
+    counts = counts.subquery()
+    pending_rows = (
+        select(func.coalesce(func.sum(AnnotationCountDelta.new_rows), 0))
+        .where(AnnotationCountDelta.project_id == counts.c.project_id)
+        .scalar_subquery()
+    )
+
+    result = db.execute(
+        update(Project)
+        .where(Project.id == counts.c.project_id)
+        .values(total_rows=counts.c.total_rows, annotated_rows=counts.c.annotated_rows - pending_rows)
+        .execution_options(synchronize_session=False)
+    )
+
+    # le statut est calculé après coup pour utiliser les nouvelles valeurs des compteurs
+    status_update = update(Project).values(
+        status=_completed_status(Project.annotated_rows + _pending(AnnotationCountDelta.new_rows), Project.total_rows)
+    )
+    if project_ids is not None:
+        status_update = status_update.where(Project.id.in_(project_ids))
+    db.execute(status_update.execution_options(synchronize_session=False))
+
+    _rebuild_daily_counts(db, project_ids)
+
+    db.commit()
+    return result.rowcount
+
+
+class CounterFolder:
+    """Report périodique des compteurs en attente sur les projets, dans chaque worker.
+
+    Toutes les COUNTER_FOLD_SECONDS secondes, fold_counter_deltas est exécuté dans le threadpool.
+    Les lignes verrouillées par une soumission ou par le report d'un autre worker sont
+    sautées : plusieurs workers reportent en même temps sans s'attendre. Un dernier report
+    est fait à l'arrêt du worker. Le report ne change pas les valeurs lues (project_progress) :
+    il garde la table des compteurs en attente petite.
+
+    Exemple d'utilisation:
+        await counter_folder.start()  # lifespan
+        await counter_folder.stop()
+
+    Attributs:
+        interval (float): délai entre deux reports, en secondes
+        folds (int): reports effectués par ce processus
+        folded (int): lignes de compteurs reportées
+        errors (int): reports en échec
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._task: asyncio.Task | None = None
+        self.folds = 0
+        self.folded = 0
+        self.errors = 0
+
+    async def start(self) -> None:
+        """Démarre le report périodique dans la boucle d'évènements du worker."""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Arrête le report périodique puis reporte les compteurs restants."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._fold_logged()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self._fold_logged()
+
+    async def _fold_logged(self) -> None:
+        try:
+            await run_in_threadpool(self.fold)
+        except Exception:
+            logger.exception("Échec du report des compteurs")
+            with self._lock:
+                self.errors += 1
+
+    def fold(self) -> int:
+        """Reporte les compteurs en attente de tous les projets et valide le report.
+
+        Returns:
+            int: nombre de lignes de compteurs reportées
+        """
+        with SessionLocal() as db:
+            folded = fold_counter_deltas(db)
+            db.commit()
+        with self._lock:
+            self.folds += 1
+            self.folded += folded
+        return folded
+
+    def stats(self) -> dict:
+        """Compteurs du report des compteurs du processus."""
+        with self._lock:
+            return {
+                "interval_seconds": self.interval,
+                "folds": self.folds,
+                "folded": self.folded,
+                "errors": self.errors
+            }
+
+
+# Report des compteurs en attente, démarré par le lifespan de chaque worker
+counter_folder = CounterFolder(settings.COUNTER_FOLD_SECONDS)
+
+
+if __name__ == "__main__":
+    # Tâche de réconciliation : python -m core.counters (depuis le dossier backend)
+    with SessionLocal() as session:
+        updated = reconcile_project_counters(session)
+    print(f"{updated} projet(s) mis à jour")
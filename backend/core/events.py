@@ -0,0 +1,349 @@
+# Évènements de progression des projets poussés aux navigateurs (Server-Sent Events)
+
+import asyncio
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+from sqlalchemy import Connection, event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from database import AsyncSessionLocal
+from models import Project
+
+logger = logging.getLogger(__name__)
+
+# Canal PostgreSQL (LISTEN/NOTIFY) partagé par les workers
+CHANNEL = "project_events"
+# Évènements gardés en attente par connexion avant de demander au navigateur de tout recharger
+SUBSCRIBER_QUEUE_SIZE = 100
+# Intervalle des commentaires envoyés sur un flux inactif (garde la connexion ouverte derrière un proxy)
+HEARTBEAT_SECONDS = 15
+# Délai de reconnexion indiqué au navigateur, en millisecondes
+RETRY_MILLISECONDS = 3000
+# Délai avant une nouvelle tentative de connexion du LISTEN après une erreur
+LISTEN_RETRY_SECONDS = 5
+# Clé de Session.info où sont gardés les évènements jusqu'au commit
+_PENDING_KEY = "project_events"
+# Champs d'un évènement envoyés par pg_notify (charge utile limitée à 8000 octets) : identifiants,
+# statut et compteurs, de taille bornée. Le nom et la date limite sont relus par les workers
+NOTIFY_FIELDS = ("type", "user_id", "id", "status", "completion")
+# Nombre de projets dont le nom et la date limite sont gardés en mémoire par worker
+PROJECT_DETAILS_CACHE_SIZE = 1024
+
+# Colonnes du projet lues par RETURNING pour construire un évènement sans requête supplémentaire
+PROJECT_EVENT_COLUMNS = (
+    Project.id, Project.user_id, Project.project_name, Project.due_date,
+    Project.status, Project.total_rows, Project.annotated_rows
+)
+
+
+def project_summary(project) -> dict:
+    """Vue synthétique d'un projet affichée par le tableau de bord.
+
+    Args:
+        project (Project | Row): projet, ou ligne contenant les colonnes PROJECT_EVENT_COLUMNS
+
+    Returns:
+        dict: identifiant, nom, date limite, statut et taux de complétion
+    """
+    completion = 0
+    if project.total_rows > 0:
+        completion = round((project.annotated_rows / project.total_rows) * 100)
+    return {
+        "id": project.id,
+        "project_name": project.project_name,
+        "due_date": project.due_date,
+        "status": project.status,
+        "completion": completion
+    }
+
+
+def project_event(project) -> dict:
+    """Évènement "project" : nouvel état d'un projet (création, progression, changement de statut)."""
+    summary = project_summary(project)
+    summary["due_date"] = summary["due_date"].isoformat() if summary["due_date"] else None
+    return {"type": "project", "user_id": project.user_id, **summary}
+
+
+def project_deleted_event(project: Project) -> dict:
+    """Évènement "deleted" : projet supprimé."""
+    return {"type": "deleted", "user_id": project.user_id, "id": project.id}
+
+
+def _notify_payload(payload: dict) -> str:
+    """Charge utile pg_notify d'un évènement : champs NOTIFY_FIELDS seulement."""
+    return json.dumps({key: payload[key] for key in NOTIFY_FIELDS if key in payload})
+
+
+class ProjectEventBroker:
+    """Diffusion des évènements de projet aux connexions SSE de leur propriétaire.
+
+    Les évènements sont publiés dans la transaction qui modifie le projet et ne sont
+    délivrés qu'à son commit (jamais pour une transaction annulée) :
+        - sous PostgreSQL (EVENTS_NOTIFY), par pg_notify : chaque worker écoute le canal
+          avec sa propre connexion (LISTEN) et délivre les évènements de ses connexions SSE,
+          quel que soit le worker qui a validé la modification. Seuls les champs NOTIFY_FIELDS
+          sont envoyés : le nom et la date limite du projet, qui ne changent pas, sont relus
+          par le worker qui reçoit l'évènement et gardés en cache
+        - sinon, en mémoire : seules les connexions SSE du processus sont prévenues
+    Chaque connexion SSE a sa file d'attente bornée : une connexion trop lente reçoit un
+    évènement "resync" à la place des évènements perdus et recharge le tableau de bord.
+
+    Exemple d'utilisation:
+        await project_events.publish_async(db, project_event(row))
+        await db.commit()  # l'évènement est délivré ici
+
+    Attributs:
+        published (int): évènements publiés par ce processus
+        delivered (int): évènements ajoutés aux files des connexions de ce processus
+        dropped (int): files remplacées par un évènement resync
+    """
+
+    def __init__(self, notify: bool):
+        self.notify = notify
+        self._lock = threading.Lock()
+        self._subscribers: dict[int, set[asyncio.Queue]] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._listener: asyncio.Task | None = None
+        self._completer: asyncio.Task | None = None
+        self._received: asyncio.Queue | None = None
+        self._details: OrderedDict[int, dict] = OrderedDict()
+        self._callbacks: dict[str, Callable[[str], None]] = {}
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def _uses_notify(self, dialect_name: str) -> bool:
+        return self.notify and dialect_name == "postgresql"
+
+    async def start(self, dsn: str | None = None) -> None:
+        """Démarre la diffusion dans la boucle d'évènements du worker (lifespan).
+
+        Args:
+            dsn (str | None, optional): url PostgreSQL de la connexion LISTEN, None sans LISTEN/NOTIFY. Defaults to None.
+        """
+        self._loop = asyncio.get_running_loop()
+        if dsn is not None:
+            # les notifications sont complétées puis délivrées une à une, dans leur ordre d'arrivée
+            self._received = asyncio.Queue()
+            self._completer = asyncio.create_task(self._complete_received())
+            self._listener = asyncio.create_task(self._listen(dsn))
+
+    async def stop(self) -> None:
+        """Arrête l'écoute du canal PostgreSQL."""
+        for task in (self._listener, self._completer):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._listener = self._completer = None
+        self._loop = None
+
+    async def _listen(self, dsn: str) -> None:
+        """Écoute le canal PostgreSQL avec une connexion dédiée, reconnectée en cas de coupure."""
+        import asyncpg
+
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(CHANNEL, self._on_notification)
+                for channel, callback in self._callbacks.items():
+                    await connection.add_listener(channel, lambda *args, callback=callback: callback(args[-1]))
+                await closed.wait()
+                logger.warning("Connexion LISTEN %s fermée, reconnexion", CHANNEL)
+            except asyncio.CancelledError:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+                raise
+            except Exception:
+                logger.exception("Impossible d'écouter le canal %s", CHANNEL)
+                await asyncio.sleep(LISTEN_RETRY_SECONDS)
+
+    def on_notify(self, channel: str, callback: Callable[[str], None]) -> None:
+        """Écoute un canal PostgreSQL supplémentaire avec la connexion LISTEN du worker.
+
+        callback est appelé dans la boucle d'évènements avec la charge utile de chaque
+        notification, quel que soit le worker qui l'a envoyée (voir broadcast). À enregistrer
+        avant start ; sans LISTEN (SQLite, EVENTS_NOTIFY désactivé) il n'est jamais appelé.
+
+        Args:
+            channel (str): canal PostgreSQL
+            callback (Callable[[str], None]): fonction appelée avec la charge utile
+        """
+        self._callbacks[channel] = callback
+
+    def broadcast(self, connection: Connection, channel: str, payload: str) -> None:
+        """Envoie une notification aux workers qui écoutent channel (on_notify), au commit de la
+        transaction de connection. Sans effet sans LISTEN/NOTIFY.
+
+        Args:
+            connection (Connection): connexion de la transaction en cours
+            channel (str): canal PostgreSQL
+            payload (str): charge utile (moins de 8000 octets)
+        """
+        if self._uses_notify(connection.dialect.name):
+            connection.execute(select(func.pg_notify(channel, payload)))
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str) -> None:
+        self._received.put_nowait(json.loads(payload))
+
+    async def _complete_received(self) -> None:
+        """Délivre les notifications reçues, complétées du nom et de la date limite du projet."""
+        while True:
+            payload = await self._received.get()
+            try:
+                payload = await self._complete(payload)
+            except Exception:
+                logger.exception("Impossible de compléter l'évènement du projet %s", payload.get("id"))
+                payload = {"type": "resync", "user_id": payload["user_id"]}
+            if payload is not None:
+                self._dispatch(payload)
+
+    async def _complete(self, payload: dict) -> dict | None:
+        """Ajoute à un évènement "project" reçu par pg_notify les champs qui n'y sont pas envoyés.
+
+        Returns:
+            dict | None: évènement complet, None si le projet a été supprimé entre temps
+        """
+        if payload["type"] == "deleted":
+            self._details.pop(payload["id"], None)
+            return payload
+        if payload["type"] != "project":
+            return payload
+        details = self._details.get(payload["id"])
+        if details is None:
+            async with AsyncSessionLocal() as db:
+                row = (await db.execute(
+                    select(Project.project_name, Project.due_date).where(Project.id == payload["id"])
+                )).first()
+            if row is None:
+                return None
+            details = {
+                "project_name": row.project_name,
+                "due_date": row.due_date.isoformat() if row.due_date else None
+            }
+            self._details[payload["id"]] = details
+            if len(self._details) > PROJECT_DETAILS_CACHE_SIZE:
+                self._details.popitem(last=False)
+        else:
+            self._details.move_to_end(payload["id"])
+        return {**payload, **details}
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        """Ouvre la file d'évènements d'une connexion SSE."""
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue) -> None:
+        """Ferme la file d'évènements d'une connexion SSE."""
+        with self._lock:
+            queues = self._subscribers.get(user_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[user_id]
+
+    def _dispatch(self, payload: dict) -> None:
+        """Ajoute un évènement aux files des connexions de son propriétaire (boucle d'évènements)."""
+        with self._lock:
+            queues = list(self._subscribers.get(payload["user_id"], ()))
+        for queue in queues:
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                # connexion trop lente : les évènements en attente sont remplacés par un rechargement
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": "resync", "user_id": payload["user_id"]})
+                with self._lock:
+                    self.dropped += 1
+                continue
+            with self._lock:
+                self.delivered += 1
+
+    def _deliver(self, payloads: list[dict]) -> None:
+        """Délivre des évènements validés, depuis n'importe quel thread."""
+        loop = self._loop
+        if loop is None:
+            return
+        for payload in payloads:
+            try:
+                loop.call_soon_threadsafe(self._dispatch, payload)
+            except RuntimeError:
+                # boucle fermée pendant l'arrêt du worker
+                return
+
+    def _stage(self, session: Session, payload: dict) -> None:
+        session.info.setdefault(_PENDING_KEY, []).append(payload)
+        with self._lock:
+            self.published += 1
+
+    def publish(self, db: Session, payload: dict) -> None:
+        """Publie un évènement, délivré au commit de la transaction de db.
+
+        Args:
+            db (Session): session sqlalchemy de la transaction qui modifie le projet
+            payload (dict): évènement (project_event, project_deleted_event)
+        """
+        if self._uses_notify(db.get_bind().dialect.name):
+            db.execute(select(func.pg_notify(CHANNEL, _notify_payload(payload))))
+            with self._lock:
+                self.published += 1
+        else:
+            self._stage(db, payload)
+
+    async def publish_async(self, db: AsyncSession, payload: dict) -> None:
+        """Équivalent asynchrone de publish.
+
+        Args:
+            db (AsyncSession): session sqlalchemy asynchrone de la transaction qui modifie le projet
+            payload (dict): évènement (project_event, project_deleted_event)
+        """
+        if self._uses_notify(db.bind.dialect.name):
+            await db.execute(select(func.pg_notify(CHANNEL, _notify_payload(payload))))
+            with self._lock:
+                self.published += 1
+        else:
+            self._stage(db.sync_session, payload)
+
+    def stats(self) -> dict:
+        """Compteurs de la diffusion des évènements du processus."""
+        with self._lock:
+            return {
+                "notify": self.notify,
+                "listening": self._listener is not None and not self._listener.done(),
+                "connections": sum(len(queues) for queues in self._subscribers.values()),
+                "published": self.published,
+                "delivered": self.delivered,
+                "dropped": self.dropped
+            }
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_pending(session: Session) -> None:
+    """Délivre les évènements publiés en mémoire dans la transaction validée."""
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        project_events._deliver(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    """Oublie les évènements d'une transaction annulée."""
+    session.info.pop(_PENDING_KEY, None)
+
+
+# Diffusion des évènements de projet du processus
+project_events = ProjectEventBroker(settings.EVENTS_NOTIFY)
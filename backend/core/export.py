@@ -0,0 +1,356 @@
+# Export des projets : fusion du stock de lignes et des annotations
+
+import csv
+import io
+from json.encoder import encode_basestring
+import zlib
+from typing import Iterator
+
+from sqlalchemy import select
+
+from core.config import settings
+from core.row_store import RowStore
+from database import SessionLocal
+from models import Annotation
+
+# Nombre d'annotations lues par aller-retour sur le curseur serveur
+EXPORT_YIELD_PER = 10_000
+# Nombre de lignes du stock lues d'un seul bloc
+EXPORT_ROW_BATCH = 10_000
+# Nombre de lignes par row group des exports Parquet
+EXPORT_PARQUET_ROW_GROUP = 100_000
+# Formats d'export : type de contenu et extension du fichier
+# pyarrow n'est importé qu'au premier export Arrow, Parquet ou JSONL
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+}
+# Colonnes annotation et date vides, suivies de la fin de ligne
+EMPTY_SUFFIX = b",,\r\n"
+# Niveau de compression gzip : 6 est le compromis par défaut de gzip
+EXPORT_GZIP_LEVEL = 6
+# wbits=31 : flux deflate avec en-tête et somme de contrôle gzip
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def _annotated_rows(project_id: int) -> Iterator[tuple]:
+    """Parcourt les annotations remplies d'un projet par row_id croissant.
+
+    La lecture utilise sa propre session : la réponse est envoyée après la fermeture
+    de la session de la requête. yield_per active un curseur côté serveur sous PostgreSQL,
+    seules EXPORT_YIELD_PER annotations sont donc en mémoire à un instant donné.
+    """
+    with SessionLocal() as db:
+        result = db.execute(
+            select(Annotation.row_id, Annotation.content, Annotation.date)
+            .where(Annotation.project_id == project_id, Annotation.content.is_not(None))
+            .order_by(Annotation.row_id)
+            .execution_options(yield_per=EXPORT_YIELD_PER)
+        )
+        yield from result
+
+
+def _csv_field(value: str) -> bytes:
+    """Encode un champ au format csv standard, entre guillemets si nécessaire."""
+    if any(char in value for char in ',"\r\n'):
+        value = '"' + value.replace('"', '""') + '"'
+    return value.encode("utf-8")
+
+
+def _windows(store: RowStore, project_id: int, batch_rows: int) -> Iterator[tuple[int, int, dict]]:
+    """Découpe le stock en fenêtres de row_id et associe à chacune ses annotations.
+
+    Le stock et les annotations sont parcourus ensemble, comme une fusion de deux listes
+    triées par row_id : seules les annotations de la fenêtre courante sont en mémoire.
+
+    Yields:
+        tuple[int, int, dict]: premier row_id, row_id de fin (exclu), annotations par row_id
+    """
+    annotations = _annotated_rows(project_id)
+    try:
+        next_annotation = next(annotations, None)
+        for start in range(1, len(store) + 1, batch_rows):
+            stop = min(start + batch_rows, len(store) + 1)
+            window = {}
+            while next_annotation is not None and next_annotation.row_id < stop:
+                if next_annotation.row_id >= start:
+                    window[next_annotation.row_id] = next_annotation
+                next_annotation = next(annotations, None)
+            yield start, stop, window
+    finally:
+        # libère le curseur et la session, y compris si le client interrompt le téléchargement
+        annotations.close()
+
+
+def _csv_chunks(store: RowStore, project_id: int, chunk_size: int) -> Iterator[bytes]:
+    """Produit le csv exporté en blocs d'environ chunk_size octets encodés en UTF-8.
+
+    Les lignes du stock sont déjà au format csv standard en UTF-8 et ont au moins autant
+    de champs que le header : chaque ligne est recopiée telle quelle, sans parsing, et
+    seules les deux colonnes ajoutées sont encodées avant la fin de ligne.
+    """
+    header = io.StringIO()
+    csv.writer(header).writerow(store.header + ["annotation", "date"])
+    buffer = [header.getvalue().encode("utf-8")]
+    size = len(buffer[0])
+
+    windows = _windows(store, project_id, EXPORT_ROW_BATCH)
+    try:
+        for start, stop, window in windows:
+            data = store.raw(start, stop)
+            offsets = store.offsets(start, stop)
+            base = offsets[0]
+
+            # chaque ligne se termine par "\r\n" : les colonnes ajoutées sont insérées avant
+            if not window:
+                lines = [data[offsets[i] - base:offsets[i + 1] - base - 2] for i in range(stop - start)]
+                chunk = EMPTY_SUFFIX.join(lines) + EMPTY_SUFFIX
+            else:
+                parts = []
+                for i in range(stop - start):
+                    parts.append(data[offsets[i] - base:offsets[i + 1] - base - 2])
+                    annotation = window.get(start + i)
+                    if annotation is None:
+                        parts.append(EMPTY_SUFFIX)
+                    else:
+                        parts.append(
+                            b"," + _csv_field(annotation.content)
+                            + b"," + _csv_field(str(annotation.date or "")) + b"\r\n"
+                        )
+                chunk = b"".join(parts)
+
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= chunk_size:
+                yield b"".join(buffer)
+                buffer, size = [], 0
+        yield b"".join(buffer)
+    finally:
+        windows.close()
+
+
+def _annotation_dictionary(project_id: int, categories: list[str]) -> list[str]:
+    """Valeurs de la colonne annotation encodée en dictionnaire.
+
+    Les catégories du projet, complétées par les valeurs annotées qui n'en font plus partie :
+    le dictionnaire est fixé avant l'export et reste le même pour tous les lots.
+    """
+    with SessionLocal() as db:
+        contents = db.scalars(
+            select(Annotation.content)
+            .where(Annotation.project_id == project_id, Annotation.content.is_not(None))
+            .distinct()
+        ).all()
+    dictionary = list(dict.fromkeys(categories))
+    dictionary += sorted(set(contents) - set(dictionary))
+    return dictionary
+
+
+def _source_table(pa, store: RowStore, start: int, stop: int):
+    """Colonnes d'origine des lignes [start, stop), parsées par le lecteur csv vectorisé d'Arrow.
+
+    Une ligne plus longue que le header n'a pas de colonne correspondante : dans ce cas
+    la fenêtre est parsée avec le module csv et les champs supplémentaires sont ignorés.
+    """
+    from pyarrow import csv as pacsv
+
+    header = store.header
+    data = store.raw(start, stop)
+    try:
+        table = pacsv.read_csv(
+            pa.py_buffer(data),
+            read_options=pacsv.ReadOptions(column_names=header, use_threads=False),
+            parse_options=pacsv.ParseOptions(newlines_in_values=True),
+            convert_options=pacsv.ConvertOptions(
+                column_types={name: pa.string() for name in header}, strings_can_be_null=False
+            )
+        )
+        if table.num_rows == stop - start:
+            return table
+    except pa.ArrowInvalid:
+        pass
+    rows = [row for _, row in store.rows(start, stop)]
+    columns = [pa.array([row[i] if i < len(row) else "" for row in rows], pa.string()) for i in range(len(header))]
+    return pa.Table.from_arrays(columns, names=header)
+
+
+def _record_tables(pa, store: RowStore, project_id: int, dictionary: list[str], batch_rows: int):
+    """Produit les lots Arrow de l'export (une table par fenêtre) : colonnes d'origine, annotation et date.
+
+    La colonne annotation est encodée en dictionnaire (indices int32 vers les catégories),
+    la colonne date est un timestamp à la microseconde. Les deux sont nulles pour les lignes
+    non annotées. Une valeur absente du dictionnaire (annotée après qu'il a été fixé) est
+    exportée comme une annotation nulle.
+    """
+    positions = {value: index for index, value in enumerate(dictionary)}
+    dictionary = pa.array(dictionary, pa.string())
+    annotation_type = pa.dictionary(pa.int32(), pa.string())
+
+    windows = _windows(store, project_id, batch_rows)
+    try:
+        for start, stop, window in windows:
+            table = _source_table(pa, store, start, stop)
+            if window:
+                matches = [window.get(row_id) for row_id in range(start, stop)]
+                indices = pa.array([positions.get(a.content) if a else None for a in matches], pa.int32())
+                dates = pa.array([a.date if a else None for a in matches], pa.timestamp("us"))
+            else:
+                indices = pa.nulls(stop - start, pa.int32())
+                dates = pa.nulls(stop - start, pa.timestamp("us"))
+            annotations = pa.DictionaryArray.from_arrays(indices, dictionary)
+            table = table.append_column(pa.field("annotation", annotation_type), annotations)
+            yield table.append_column(pa.field("date", pa.timestamp("us")), dates)
+    finally:
+        windows.close()
+
+
+def _schema(pa, header: list[str]):
+    """Schéma des exports Arrow et Parquet, utilisé aussi pour un projet sans lignes."""
+    return pa.schema(
+        [pa.field(name, pa.string()) for name in header]
+        + [pa.field("annotation", pa.dictionary(pa.int32(), pa.string())), pa.field("date", pa.timestamp("us"))]
+    )
+
+
+class _ChunkSink(io.RawIOBase):
+    """Fichier en écriture seule dont le contenu est récupéré bloc par bloc par l'export."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def pending(self) -> int:
+        return sum(len(chunk) for chunk in self._chunks)
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _arrow_chunks(store: RowStore, project_id: int, dictionary: list[str], chunk_size: int, export_format: str):
+    """Produit un export Arrow IPC (flux), Parquet ou JSONL en blocs d'environ chunk_size octets."""
+    import pyarrow as pa
+
+    sink = _ChunkSink()
+    schema = _schema(pa, store.header)
+    if export_format == "parquet":
+        from pyarrow import parquet as pq
+        writer = pq.ParquetWriter(sink, schema)
+        batch_rows = EXPORT_PARQUET_ROW_GROUP
+        write = writer.write_table
+    elif export_format == "arrow":
+        writer = pa.ipc.new_stream(sink, schema)
+        batch_rows = EXPORT_ROW_BATCH
+        write = writer.write_table
+    else:
+        writer = None
+        batch_rows = EXPORT_ROW_BATCH
+
+        def write(table):
+            sink.write(_jsonl(table))
+
+    tables = _record_tables(pa, store, project_id, dictionary, batch_rows)
+    try:
+        for table in tables:
+            write(table)
+            if sink.pending() >= chunk_size:
+                yield sink.take()
+        if writer is not None:
+            writer.close()
+        yield sink.take()
+    finally:
+        tables.close()
+
+
+def _jsonl(table) -> bytes:
+    """Sérialise un lot Arrow en JSONL : un objet par ligne, dates au format ISO 8601.
+
+    Les valeurs sont échappées colonne par colonne par l'encodeur C du module json,
+    puis assemblées avec un gabarit de ligne : aucun dictionnaire n'est construit par ligne.
+    """
+    columns = []
+    for name, column in zip(table.column_names, table.columns):
+        values = column.to_pylist()
+        if name == "date":
+            columns.append(['"' + value.isoformat() + '"' if value else "null" for value in values])
+        elif name == "annotation":
+            columns.append([encode_basestring(value) if value is not None else "null" for value in values])
+        else:
+            columns.append(list(map(encode_basestring, values)))
+    # les clés sont échappées une seule fois, "%" est doublé pour le gabarit
+    keys = [encode_basestring(name).replace("%", "%%") for name in table.column_names]
+    template = "{" + ", ".join(f"{key}: %s" for key in keys) + "}\n"
+    return "".join(template % values for values in zip(*columns)).encode("utf-8")
+
+
+def _gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Compresse un flux de blocs au format gzip au fil de l'eau."""
+    compressor = zlib.compressobj(EXPORT_GZIP_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_project_file(
+    store: RowStore | None,
+    project_id: int,
+    export_format: str = "csv",
+    categories: list[str] | None = None,
+    chunk_size: int | None = None,
+    compress: bool = False
+) -> Iterator[bytes]:
+    """Génère l'export d'un projet : lignes d'origine suivies des colonnes annotation et date.
+
+    Le stock de lignes et les annotations (lues par un curseur côté serveur, triées par
+    row_id) sont parcourus ensemble, comme une fusion de deux listes triées : la mémoire
+    utilisée ne dépend pas de la taille du projet. Le fichier est produit par lots et envoyé
+    au client par blocs d'environ chunk_size octets : peu d'envois ASGI, même pour des
+    millions de lignes. Le stock est fermé à la fin de l'export.
+
+    Formats (voir EXPORT_FORMATS) :
+        - csv : recopie des lignes du stock, sans parsing
+        - parquet, arrow (flux Arrow IPC) : colonnes construites par le lecteur csv d'Arrow,
+          annotation encodée en dictionnaire sur les catégories du projet, date en timestamp
+        - jsonl : un objet JSON par ligne, construit à partir des mêmes lots Arrow
+
+    Args:
+        store (RowStore | None): stock de lignes ouvert, l'export est vide si None
+        project_id (int): identifiant du projet
+        export_format (str, optional): format du fichier exporté. Defaults to "csv".
+        categories (list[str] | None, optional): catégories du projet, ordre du dictionnaire. Defaults to None.
+        chunk_size (int | None, optional): taille des blocs envoyés. Defaults to settings.EXPORT_CHUNK_SIZE.
+        compress (bool, optional): compresse l'export au format gzip. Defaults to False.
+
+    Yields:
+        bytes: blocs du fichier exporté
+    """
+    if store is None:
+        return
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    if export_format == "csv":
+        chunks = _csv_chunks(store, project_id, chunk_size)
+    else:
+        dictionary = _annotation_dictionary(project_id, categories or [])
+        chunks = _arrow_chunks(store, project_id, dictionary, chunk_size, export_format)
+    try:
+        with store:
+            yield from _gzip(chunks) if compress else chunks
+    finally:
+        chunks.close()
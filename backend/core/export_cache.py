@@ -0,0 +1,234 @@
+# Cache disque des fichiers exportés, par projet, format et version des annotations
+
+import os
+import shutil
+import threading
+import uuid
+from typing import BinaryIO, Iterator
+
+from core.config import settings
+
+
+class ExportCache:
+    """Cache des exports sur le disque local.
+
+    Un export est identifié par le projet, le format, la compression et la version des
+    annotations du projet (annotation_version lue par project_progress, voir core/counters.py,
+    augmentée à chaque soumission) : tant
+    qu'aucune annotation n'est soumise, les téléchargements suivants sont servis directement
+    depuis le fichier en cache. Les fichiers d'un projet sont rangés dans un dossier par
+    projet ; les versions plus anciennes sont supprimées dès qu'une nouvelle est écrite.
+
+    Au-delà de max_bytes, les fichiers les moins récemment utilisés (date de modification,
+    mise à jour à chaque téléchargement) sont supprimés.
+
+    Exemple d'utilisation:
+        cached = export_cache.get(project.id, version, "csv", False)
+        if cached is not None:
+            chunks = export_cache.stream(cached)
+        else:
+            chunks = export_cache.fill(project.id, version, "csv", False, chunks)
+
+    Attributs:
+        hits (int): nombre de téléchargements servis depuis le cache
+        misses (int): nombre de téléchargements générés
+        bytes_served (int): nombre d'octets servis depuis le cache
+        bytes_written (int): nombre d'octets écrits dans le cache
+        evictions (int): nombre de fichiers supprimés pour respecter max_bytes
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_served = 0
+        self.bytes_written = 0
+        self.evictions = 0
+
+    def _project_directory(self, project_id: int) -> str:
+        return os.path.join(self.directory, str(project_id))
+
+    def path(self, project_id: int, version: int, export_format: str, compress: bool) -> str:
+        """Chemin du fichier en cache d'un export."""
+        filename = f"v{version}.{export_format}" + (".gz" if compress else "")
+        return os.path.join(self._project_directory(project_id), filename)
+
+    def get(self, project_id: int, version: int, export_format: str, compress: bool) -> BinaryIO | None:
+        """Ouvre le fichier en cache d'un export, None s'il n'est pas en cache.
+
+        Le fichier est ouvert ici : une éviction ou une nouvelle version écrite par un autre
+        téléchargement ou un autre worker peut le supprimer, le fichier ouvert reste lisible
+        jusqu'à sa fermeture.
+
+        Returns:
+            BinaryIO | None: fichier ouvert, à envoyer avec stream qui le ferme à la fin
+        """
+        path = self.path(project_id, version, export_format, compress)
+        try:
+            file = open(path, "rb")
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            # la date de modification sert d'ordre LRU pour l'éviction
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self.hits += 1
+            self.bytes_served += os.fstat(file.fileno()).st_size
+        return file
+
+    @staticmethod
+    def stream(file: BinaryIO, chunk_size: int | None = None) -> Iterator[bytes]:
+        """Envoie un fichier ouvert par get par blocs, et le ferme à la fin de l'envoi.
+
+        Args:
+            file (BinaryIO): fichier en cache ouvert par get
+            chunk_size (int | None, optional): taille des blocs envoyés. Defaults to settings.EXPORT_CHUNK_SIZE.
+
+        Yields:
+            bytes: blocs du fichier
+        """
+        chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+        with file:
+            while chunk := file.read(chunk_size):
+                yield chunk
+
+    def fill(
+        self,
+        project_id: int,
+        version: int,
+        export_format: str,
+        compress: bool,
+        chunks: Iterator[bytes]
+    ) -> Iterator[bytes]:
+        """Envoie un export au client tout en l'écrivant dans le cache.
+
+        Le fichier est écrit sous un nom temporaire unique et renommé une fois l'export
+        terminé : un export interrompu (client déconnecté, erreur) n'est jamais mis en cache,
+        et deux téléchargements simultanés du même export ne se gênent pas. Un export terminé
+        après qu'une version plus récente a été mise en cache n'est pas gardé.
+
+        Args:
+            project_id (int): identifiant du projet
+            version (int): version des annotations lue avant le début de l'export
+            export_format (str): format de l'export
+            compress (bool): export compressé au format gzip
+            chunks (Iterator[bytes]): blocs de l'export
+
+        Yields:
+            bytes: les blocs de l'export, inchangés
+        """
+        path = self.path(project_id, version, export_format, compress)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        size = 0
+        try:
+            with open(temporary_path, "wb") as file:
+                for chunk in chunks:
+                    file.write(chunk)
+                    size += len(chunk)
+                    yield chunk
+            if self._latest_version(project_id) > version:
+                # un export plus récent est déjà en cache : celui-ci ne serait plus jamais servi
+                return
+            os.replace(temporary_path, path)
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            chunks.close()
+        with self._lock:
+            self.bytes_written += size
+        self._remove_older_versions(project_id, version)
+        self.evict()
+
+    def _versions(self, project_id: int) -> Iterator[tuple[int, str]]:
+        """Exports en cache d'un projet : version et chemin, fichiers temporaires exclus."""
+        try:
+            entries = list(os.scandir(self._project_directory(project_id)))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            if entry.name.endswith(".tmp"):
+                continue
+            entry_version = entry.name.split(".", 1)[0].lstrip("v")
+            if entry_version.isdigit():
+                yield int(entry_version), entry.path
+
+    def _latest_version(self, project_id: int) -> int:
+        """Version la plus récente en cache pour un projet, -1 s'il n'y en a pas."""
+        return max((version for version, _ in self._versions(project_id)), default=-1)
+
+    def _remove_older_versions(self, project_id: int, version: int) -> None:
+        """Supprime les exports du projet dont la version est antérieure à version."""
+        for entry_version, path in self._versions(project_id):
+            if entry_version < version:
+                self._remove(path)
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        """Fichiers en cache : date de dernière utilisation, taille et chemin."""
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for project_entry in os.scandir(self.directory):
+            if not project_entry.is_dir():
+                continue
+            for entry in os.scandir(project_entry.path):
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    # supprimé par un autre worker pendant le parcours
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self) -> None:
+        """Supprime les fichiers les moins récemment utilisés jusqu'à repasser sous max_bytes."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if self._remove(path):
+                total -= size
+                with self._lock:
+                    self.evictions += 1
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def purge(self, project_id: int) -> None:
+        """Supprime tous les exports en cache d'un projet (suppression du projet)."""
+        shutil.rmtree(self._project_directory(project_id), ignore_errors=True)
+
+    def stats(self) -> dict:
+        """Compteurs du cache, exposés pour le suivi des performances."""
+        entries = self._entries()
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "bytes_served": self.bytes_served,
+                "bytes_written": self.bytes_written,
+                "evictions": self.evictions
+            }
+
+
+# Cache des exports partagé par les workers du serveur (même dossier)
+export_cache = ExportCache(settings.EXPORT_CACHE_DIR, settings.EXPORT_CACHE_MAX_BYTES)
@@ -0,0 +1,119 @@
+# Exécuteur borné pour le hachage des mots de passe
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+from fastapi import HTTPException
+
+from core.config import settings
+
+
+class PasswordHashingExecutor:
+    """Exécute les hachages bcrypt sur un pool de threads dédié et borné.
+
+    bcrypt libère le GIL pendant le calcul : des threads suffisent, sans le coût
+    d'un pool de processus. Le pool étant séparé du threadpool de Starlette, une vague
+    de connexions ne bloque pas les autres endpoints (soumission d'annotations...).
+    Au-delà de workers + max_pending hachages en cours ou en attente, la requête est
+    refusée immédiatement avec une erreur 503 et un en-tête Retry-After : le nombre de
+    requêtes d'authentification en attente d'un hachage reste donc borné.
+
+    Attributs:
+        completed (int): nombre de hachages terminés
+        rejected (int): nombre de requêtes refusées pour saturation
+    """
+
+    def __init__(self, workers: int, max_pending: int, retry_after: int):
+        self.workers = workers
+        self.capacity = workers + max_pending
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+        self._hash_time_total = 0.0
+        self._hash_time_max = 0.0
+
+    def submit(self, fn: Callable[..., Any], *args) -> Future:
+        """Soumet un hachage au pool.
+
+        Raises:
+            HTTPException (503): si le pool et sa file d'attente sont saturés
+
+        Returns:
+            Future: résultat du hachage
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Service momentanément surchargé, veuillez réessayer.",
+                headers={"Retry-After": str(self.retry_after)}
+            )
+        with self._lock:
+            self.in_flight += 1
+        enqueued = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                self._record(started - enqueued, time.perf_counter() - started)
+
+        try:
+            return self._executor.submit(task)
+        except RuntimeError:
+            # pool arrêté (fin du processus)
+            self._release()
+            raise
+
+    def run(self, fn: Callable[..., Any], *args) -> Any:
+        """Soumet un hachage et attend son résultat."""
+        return self.submit(fn, *args).result()
+
+    def _release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def _record(self, queue_wait: float, hash_time: float) -> None:
+        with self._lock:
+            self.completed += 1
+            self._queue_wait_total += queue_wait
+            self._queue_wait_max = max(self._queue_wait_max, queue_wait)
+            self._hash_time_total += hash_time
+            self._hash_time_max = max(self._hash_time_max, hash_time)
+        self._release()
+
+    def stats(self) -> dict:
+        """Métriques du pool : occupation, attente dans la file et durée des hachages (en secondes)."""
+        with self._lock:
+            completed = self.completed or 1
+            return {
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "queue_wait_avg": round(self._queue_wait_total / completed, 6),
+                "queue_wait_max": round(self._queue_wait_max, 6),
+                "hash_time_avg": round(self._hash_time_total / completed, 6),
+                "hash_time_max": round(self._hash_time_max, 6)
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+# Pool de hachage partagé par les endpoints d'authentification
+password_hasher = PasswordHashingExecutor(
+    settings.HASH_WORKERS, settings.HASH_MAX_PENDING, settings.HASH_RETRY_AFTER_SECONDS
+)
@@ -0,0 +1,169 @@
+# Insertion en masse des lignes d'annotation
+
+import io
+import logging
+import time
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from models import Annotation
+
+logger = logging.getLogger(__name__)
+
+# Taille des blocs lus par psycopg2 pendant le COPY (en octets)
+COPY_BUFFER_SIZE = 64 * 1024
+# Nombre de lignes envoyées par executemany pour les autres bases
+EXECUTEMANY_BATCH_SIZE = 10_000
+
+
+@dataclass
+class IngestionReport:
+    """Résumé d'une ingestion en masse.
+
+    Attributs:
+        rows (int): nombre de lignes insérées
+        seconds (float): durée de l'insertion en secondes
+        method (str): méthode utilisée ("copy" pour PostgreSQL, "executemany" sinon)
+    """
+    rows: int
+    seconds: float
+    method: str
+
+    @property
+    def rows_per_second(self) -> float:
+        """Débit de l'ingestion en lignes par seconde."""
+        return round(self.rows / self.seconds, 1) if self.seconds > 0 else float(self.rows)
+
+    def as_dict(self) -> dict:
+        """Représentation sérialisable du rapport, renvoyée par l'API."""
+        return {
+            "rows": self.rows,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": self.rows_per_second,
+            "method": self.method,
+        }
+
+
+class _CopyStream(io.RawIOBase):
+    """Flux binaire lu par `cursor.copy_expert`.
+
+    Les lignes au format texte de COPY (par exemple "row_id\\tproject_id\\n") sont
+    produites à la demande à partir d'un itérateur : seul un bloc de COPY_BUFFER_SIZE
+    octets est présent en mémoire à un instant donné.
+    """
+
+    def __init__(self, lines: Iterable[bytes]):
+        self._lines = iter(lines)
+        self._buffer = b""
+        self.rows = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = COPY_BUFFER_SIZE
+        parts = [self._buffer]
+        length = len(self._buffer)
+        for line in self._lines:
+            parts.append(line)
+            length += len(line)
+            self.rows += 1
+            if length >= size:
+                break
+        data = b"".join(parts)
+        self._buffer = data[size:]
+        return data[:size]
+
+
+def copy_lines(db: Session, statement: str, lines: Iterable[bytes]) -> int:
+    """Exécute un COPY ... FROM STDIN (PostgreSQL) sur la connexion de la session.
+
+    Le COPY s'exécute dans la transaction courante de la session : il est validé
+    ou annulé en même temps que le reste de la transaction.
+
+    Args:
+        db (Session): session sqlalchemy connectée à PostgreSQL
+        statement (str): requête COPY, par exemple "COPY annotations (row_id, project_id) FROM STDIN"
+        lines (Iterable[bytes]): lignes au format texte de COPY, consommées au fil de l'eau
+
+    Returns:
+        int: nombre de lignes envoyées
+    """
+    stream = _CopyStream(lines)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(statement, stream, size=COPY_BUFFER_SIZE)
+    finally:
+        cursor.close()
+    return stream.rows
+
+
+def _copy_rows(db: Session, project_id: int, row_ids: Iterable[int]) -> int:
+    """Insère les lignes avec COPY ... FROM STDIN, dans la transaction de l'insertion du projet."""
+    suffix = f"\t{project_id}\n"
+    return copy_lines(
+        db,
+        "COPY annotations (row_id, project_id) FROM STDIN",
+        (f"{row_id}{suffix}".encode("ascii") for row_id in row_ids)
+    )
+
+
+def _batches(project_id: int, row_ids: Iterable[int], size: int) -> Iterator[list[dict]]:
+    """Regroupe les row_id en lots de paramètres pour executemany."""
+    batch = []
+    for row_id in row_ids:
+        batch.append({"row_id": row_id, "project_id": project_id})
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _executemany_rows(db: Session, project_id: int, row_ids: Iterable[int]) -> int:
+    """Insère les lignes par lots avec un INSERT exécuté en executemany.
+
+    Utilisé pour les bases qui ne supportent pas COPY (SQLite par exemple).
+    Les lignes ne passent pas par l'identity map de la session.
+    """
+    rows = 0
+    statement = insert(Annotation.__table__)
+    for batch in _batches(project_id, row_ids, EXECUTEMANY_BATCH_SIZE):
+        db.execute(statement, batch)
+        rows += len(batch)
+    return rows
+
+
+def bulk_insert_annotations(db: Session, project_id: int, row_ids: Iterable[int]) -> IngestionReport:
+    """Crée en masse les annotations vides d'un projet.
+
+    Les row_id sont consommés au fil de l'eau (un générateur peut être passé),
+    la mémoire utilisée reste donc constante quelle que soit la taille du fichier.
+    Aucun commit n'est fait : l'appelant valide la transaction, ce qui permet d'insérer
+    le projet et ses lignes de manière atomique.
+
+    Args:
+        db (Session): session sqlalchemy, le projet doit déjà être flush
+        project_id (int): identifiant du projet
+        row_ids (Iterable[int]): numéros des lignes du csv (commençant à 1)
+
+    Returns:
+        IngestionReport: nombre de lignes, durée, débit et méthode utilisée
+    """
+    start = time.perf_counter()
+    if db.get_bind().dialect.name == "postgresql":
+        method = "copy"
+        rows = _copy_rows(db, project_id, row_ids)
+    else:
+        method = "executemany"
+        rows = _executemany_rows(db, project_id, row_ids)
+    report = IngestionReport(rows=rows, seconds=time.perf_counter() - start, method=method)
+    logger.info(
+        "Projet %s : %s lignes insérées en %.2fs (%s lignes/s, %s)",
+        project_id, report.rows, report.seconds, report.rows_per_second, method
+    )
+    return report
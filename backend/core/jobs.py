@@ -0,0 +1,339 @@
+# Tâches d'ingestion des fichiers CSV exécutées en arrière-plan
+
+import io
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.ingestion import bulk_insert_annotations
+from core.row_store import RowStore, RowStoreWriter, row_store_paths
+from core.search import index_row_texts
+from core.events import PROJECT_EVENT_COLUMNS, project_events, project_event
+from core.upload import read_csv_rows
+from database import SessionLocal, engine
+from models import Project
+
+logger = logging.getLogger(__name__)
+
+# Nombre de lignes entre deux vérifications de l'horloge pour l'enregistrement de la progression
+PROGRESS_CHECK_ROWS = 1_000
+# Message enregistré sur le projet en cas d'échec, le détail de l'erreur est dans les logs
+FAILURE_MESSAGE = "Erreur lors de l'import du fichier CSV"
+# Message enregistré sur les projets dont l'import a été interrompu par l'arrêt du serveur
+INTERRUPTED_MESSAGE = "Import interrompu par l'arrêt du serveur"
+
+
+@dataclass
+class IngestionProgress:
+    """Progression de l'ingestion d'un projet.
+
+    Attributs:
+        project_id (int): identifiant du projet
+        total_bytes (int): taille du fichier csv à ingérer
+        status (str): ingesting pendant l'import, pending une fois terminé, failed en cas d'échec
+        rows (int): nombre de lignes insérées
+        bytes_read (int): nombre d'octets du fichier déjà lus
+        started_at (float): début de l'import (timestamp)
+        updated_at (float): dernière mise à jour de la progression (timestamp)
+        method (str | None): méthode d'insertion utilisée ("copy" ou "executemany")
+        error (str | None): message d'erreur en cas d'échec
+    """
+    project_id: int
+    total_bytes: int
+    status: str = "ingesting"
+    rows: int = 0
+    bytes_read: int = 0
+    started_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    method: str | None = None
+    error: str | None = None
+
+    def snapshot(self) -> dict:
+        """Champs bruts de la progression, enregistrés sur le projet (colonne ingestion)."""
+        return {
+            "status": self.status,
+            "rows": self.rows,
+            "bytes_read": self.bytes_read,
+            "total_bytes": self.total_bytes,
+            "started_at": self.started_at,
+            "updated_at": self.updated_at,
+            "method": self.method,
+            "error": self.error
+        }
+
+    @classmethod
+    def from_snapshot(cls, project_id: int, snapshot: dict) -> "IngestionProgress":
+        return cls(project_id=project_id, **snapshot)
+
+    def as_dict(self) -> dict:
+        """Progression renvoyée par l'API : lignes, débit et temps restant estimé."""
+        end = time.time() if self.status == "ingesting" else self.updated_at
+        elapsed = max(end - self.started_at, 0.0)
+        fraction = self.bytes_read / self.total_bytes if self.total_bytes else 1.0
+        eta = None
+        if self.status == "ingesting" and 0 < fraction < 1:
+            # le temps restant est estimé à partir de la part du fichier déjà lue
+            eta = round(elapsed * (1 - fraction) / fraction, 1)
+        return {
+            "status": self.status,
+            "rows": self.rows,
+            "bytes_read": self.bytes_read,
+            "total_bytes": self.total_bytes,
+            "percent": round(min(fraction, 1.0) * 100, 1),
+            "elapsed_seconds": round(elapsed, 1),
+            "rows_per_second": round(self.rows / elapsed, 1) if elapsed > 0 else 0.0,
+            "eta_seconds": eta,
+            "method": self.method,
+            "error": self.error
+        }
+
+
+class _CountingReader(io.RawIOBase):
+    """Flux binaire qui compte les octets lus pour la progression de l'ingestion."""
+
+    def __init__(self, source, progress: IngestionProgress):
+        self._source = source
+        self._progress = progress
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = self._source.readinto(buffer)
+        self._progress.bytes_read += size
+        return size
+
+
+class IngestionJobQueue:
+    """File des tâches d'ingestion, exécutées par un pool de threads local.
+
+    La création d'un projet enregistre le fichier sur le disque puis soumet une tâche :
+    la requête HTTP se termine immédiatement et le parsing, la conversion vers le stock
+    de lignes et l'insertion en masse se font en arrière-plan. Le projet a le statut
+    ingesting pendant l'import, puis pending, ou failed en cas d'échec.
+    Si le stock de lignes du fichier existe déjà (même csv téléversé dans un autre projet,
+    voir core/storage.py), le csv n'est pas parsé une seconde fois : les annotations sont
+    créées directement à partir du stock. Sous PostgreSQL, le texte des lignes est ensuite
+    copié dans row_texts pour la recherche (core/search.py).
+
+    La progression des tâches en cours est gardée en mémoire par le processus qui les
+    exécute. Sous PostgreSQL, elle est aussi enregistrée sur le projet toutes les
+    progress_interval secondes, dans une transaction séparée : tous les workers peuvent
+    donc la renvoyer. Sous SQLite, cette écriture attendrait la fin de la transaction
+    d'ingestion (verrou de la base), seule la progression finale est enregistrée.
+
+    Exemple d'utilisation:
+        ingestion_jobs.submit(project.id, project.annotation_file_path, "utf_8", ",", '"')
+        progress = ingestion_jobs.get(project.id)
+    """
+
+    def __init__(self, workers: int, progress_interval: float):
+        self.workers = workers
+        self.progress_interval = progress_interval
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingestion")
+        self._lock = threading.Lock()
+        self._jobs: dict[int, IngestionProgress] = {}
+        self.completed = 0
+        self.failed = 0
+
+    def submit(
+        self,
+        project_id: int,
+        annotation_file_path: str,
+        encoding: str,
+        delimiter: str,
+        quotechar: str
+    ) -> IngestionProgress:
+        """Soumet l'ingestion du csv d'un projet déjà enregistré avec le statut ingesting.
+
+        Args:
+            project_id (int): identifiant du projet
+            annotation_file_path (str): chemin du csv enregistré sur le disque
+            encoding (str): encodage du csv
+            delimiter (str): séparateur du csv
+            quotechar (str): caractère de citation du csv
+
+        Returns:
+            IngestionProgress: progression de la tâche
+        """
+        progress = IngestionProgress(project_id=project_id, total_bytes=os.path.getsize(annotation_file_path))
+        with self._lock:
+            self._jobs[project_id] = progress
+        self._executor.submit(
+            self._run, progress, annotation_file_path, encoding, delimiter, quotechar
+        )
+        return progress
+
+    def get(self, project_id: int) -> IngestionProgress | None:
+        """Progression d'une tâche en cours dans ce processus, None sinon."""
+        with self._lock:
+            return self._jobs.get(project_id)
+
+    def _run(
+        self,
+        progress: IngestionProgress,
+        annotation_file_path: str,
+        encoding: str,
+        delimiter: str,
+        quotechar: str
+    ) -> None:
+        progress.started_at = time.time()
+        try:
+            with SessionLocal() as db:
+                if all(os.path.exists(path) for path in row_store_paths(annotation_file_path)):
+                    # fichier déjà ingéré par un autre projet : les lignes sont reprises du stock
+                    with RowStore(annotation_file_path) as store:
+                        header = store.header
+                        progress.bytes_read = progress.total_bytes
+                        row_ids = self._track(progress, range(1, len(store) + 1))
+                        report = bulk_insert_annotations(db, progress.project_id, row_ids)
+                else:
+                    with open(annotation_file_path, "rb") as file:
+                        reader = read_csv_rows(_CountingReader(file, progress), encoding, delimiter, quotechar)
+                        with RowStoreWriter(annotation_file_path) as store:
+                            # la première ligne (header) est l'enregistrement 0 du stock
+                            header = next(reader, [])
+                            store.append(header)
+
+                            # création des annotations en masse (COPY sous PostgreSQL), les lignes vides sont ignorées
+                            row_ids = self._track(progress, (store.append(row) for row in reader if row))
+                            report = bulk_insert_annotations(db, progress.project_id, row_ids)
+
+                if db.get_bind().dialect.name == "postgresql":
+                    # texte des lignes pour la recherche (index GIN), validé avec les lignes
+                    with RowStore(annotation_file_path) as store:
+                        index_row_texts(db, progress.project_id, store)
+
+                progress.rows = report.rows
+                progress.method = report.method
+                progress.status = "pending"
+                progress.updated_at = time.time()
+                # le projet et ses lignes sont validés dans la même transaction
+                project = db.execute(
+                    update(Project)
+                    .where(Project.id == progress.project_id)
+                    .values(csv_fields=header, total_rows=report.rows, status="pending", ingestion=progress.snapshot())
+                    .returning(*PROJECT_EVENT_COLUMNS)
+                ).first()
+                if project is None:
+                    # projet supprimé avec son propriétaire pendant l'import : ses lignes ne sont pas validées
+                    db.rollback()
+                    logger.warning("Projet %s supprimé pendant son import", progress.project_id)
+                    return
+                project_events.publish(db, project_event(project))
+                db.commit()
+            with self._lock:
+                self.completed += 1
+        except Exception:
+            logger.exception("Échec de l'ingestion du projet %s", progress.project_id)
+            progress.status = "failed"
+            progress.error = FAILURE_MESSAGE
+            progress.updated_at = time.time()
+            # la transaction d'ingestion est annulée : aucune ligne partielle ne reste en base.
+            # Les fichiers peuvent être partagés avec d'autres projets : ils restent référencés
+            # par le projet en échec et sont libérés à sa suppression.
+            self._save(progress, status="failed")
+            with self._lock:
+                self.failed += 1
+        finally:
+            with self._lock:
+                self._jobs.pop(progress.project_id, None)
+
+    def _track(self, progress: IngestionProgress, row_ids):
+        """Compte les lignes insérées et enregistre régulièrement la progression."""
+        persist = engine.dialect.name != "sqlite"
+        last_saved = time.monotonic()
+        for row_id in row_ids:
+            progress.rows += 1
+            if progress.rows % PROGRESS_CHECK_ROWS == 0:
+                progress.updated_at = time.time()
+                if persist and time.monotonic() - last_saved >= self.progress_interval:
+                    self._save(progress)
+                    last_saved = time.monotonic()
+            yield row_id
+
+    @staticmethod
+    def _save(progress: IngestionProgress, status: str | None = None) -> None:
+        """Enregistre la progression sur le projet, dans une transaction séparée de l'ingestion.
+        Un changement de statut est publié aux connexions SSE du propriétaire."""
+        values = {"ingestion": progress.snapshot()}
+        if status is not None:
+            values["status"] = status
+        try:
+            with SessionLocal() as db:
+                project = db.execute(
+                    update(Project)
+                    .where(Project.id == progress.project_id)
+                    .values(**values)
+                    .returning(*PROJECT_EVENT_COLUMNS)
+                ).first()
+                if status is not None and project is not None:
+                    project_events.publish(db, project_event(project))
+                db.commit()
+        except Exception:
+            logger.exception("Impossible d'enregistrer la progression du projet %s", progress.project_id)
+
+    def stats(self) -> dict:
+        """Compteurs des tâches d'ingestion du processus."""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "running": len(self._jobs),
+                "completed": self.completed,
+                "failed": self.failed
+            }
+
+    def shutdown(self) -> None:
+        """Arrêt du worker : attend les imports en cours, ceux qui n'ont pas démarré sont abandonnés.
+
+        Un import interrompu (worker tué après le délai d'arrêt) garde le statut ingesting :
+        il est marqué failed au démarrage suivant par fail_interrupted_ingestions.
+        """
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def fail_interrupted_ingestions(db: Session) -> int:
+    """Marque failed les projets restés au statut ingesting après l'arrêt du serveur.
+
+    Les tâches d'ingestion vivent dans les workers : au démarrage, avant que les workers
+    n'acceptent des requêtes, aucun import ne peut être en cours. À appeler une seule fois
+    par serveur (processus maître de gunicorn.conf.py ou démarrage de main.py).
+
+    Args:
+        db (Session): session sqlalchemy
+
+    Returns:
+        int: nombre de projets marqués failed
+    """
+    projects = db.query(Project).filter(Project.status == "ingesting").all()
+    for project in projects:
+        # la dernière progression enregistrée est conservée, seul le statut change
+        snapshot = project.ingestion or IngestionProgress(project_id=project.id, total_bytes=0).snapshot()
+        project.status = "failed"
+        project.ingestion = {**snapshot, "status": "failed", "error": INTERRUPTED_MESSAGE}
+    db.commit()
+    return len(projects)
+
+
+def ensure_ingested(project: Project) -> None:
+    """Vérifie que l'import du csv d'un projet est terminé avant d'accéder à ses lignes.
+
+    Raises:
+        HTTPException (409): si l'import est en cours ou a échoué
+    """
+    if project.status == "ingesting":
+        raise HTTPException(status_code=409, detail="Import du fichier en cours")
+    if project.status == "failed":
+        raise HTTPException(status_code=409, detail="L'import du fichier a échoué")
+
+
+# File des tâches d'ingestion du processus
+ingestion_jobs = IngestionJobQueue(settings.INGESTION_WORKERS, settings.INGESTION_PROGRESS_INTERVAL_SECONDS)
@@ -0,0 +1,124 @@
+# Distribution des lignes d'un projet entre plusieurs annotateurs : baux sur les lignes non annotées
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import Row, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from models import Annotation
+
+# Durée d'un bail : passé ce délai, les lignes non soumises peuvent être attribuées à un autre annotateur
+LEASE_DURATION = timedelta(seconds=settings.LEASE_SECONDS)
+
+
+def held_by_other(leased_by: int | None, lease_expires_at: datetime | None, user_id: int, now: datetime) -> bool:
+    """Vérifie si une ligne est attribuée à un autre annotateur par un bail en cours.
+
+    Args:
+        leased_by (int | None): annotateur titulaire du bail de la ligne
+        lease_expires_at (datetime | None): fin du bail
+        user_id (int): annotateur qui veut soumettre la ligne
+        now (datetime): date et heure de la soumission
+
+    Returns:
+        bool: True si la soumission doit être refusée
+    """
+    return leased_by is not None and leased_by != user_id and lease_expires_at is not None and lease_expires_at > now
+
+
+def _available(now: datetime):
+    """Condition SQL : la ligne n'a pas de bail ou son bail a expiré."""
+    return or_(Annotation.leased_by.is_(None), Annotation.lease_expires_at <= now)
+
+
+async def claim_rows_async(
+    db: AsyncSession,
+    project_id: int,
+    user_id: int,
+    size: int,
+    now: datetime | None = None
+) -> tuple[datetime, list[Row]]:
+    """Attribue à un annotateur un lot de lignes non annotées d'un projet.
+
+    Les baux déjà tenus par l'annotateur sont renouvelés et renvoyés en premier (reprise
+    après un rechargement de la page), le lot est complété par les premières lignes libres :
+        - SELECT ... FOR UPDATE SKIP LOCKED sous PostgreSQL : les lignes qu'une autre
+          attribution est en train de prendre sont sautées, sans attente. Plusieurs annotateurs
+          prennent des lots disjoints en parallèle, sans se bloquer
+        - l'UPDATE qui pose le bail vérifie à nouveau que la ligne est libre : sous SQLite (pas
+          de verrou de ligne, écritures sérialisées), une ligne prise entre temps n'est pas renvoyée
+    Une ligne dont le bail a expiré est libre : les lots abandonnés sont repris sans tâche de nettoyage.
+    Aucun commit n'est fait : les verrous de ligne sont gardés jusqu'au commit de l'appelant.
+
+    Args:
+        db (AsyncSession): session sqlalchemy asynchrone
+        project_id (int): identifiant du projet
+        user_id (int): annotateur à qui les lignes sont attribuées
+        size (int): nombre de lignes demandées
+        now (datetime | None, optional): date et heure de l'attribution. Defaults to None (maintenant).
+
+    Returns:
+        tuple[datetime, list[Row]]: fin des baux et lignes attribuées (id, row_id), par row_id croissant
+    """
+    now = now or datetime.now()
+    expires_at = now + LEASE_DURATION
+
+    # baux renouvelés dans l'ordre des identifiants, comme les autres verrous posés sur plusieurs
+    # annotations (soumission par lot) : deux requêtes du même annotateur ne s'interbloquent pas
+    renewed = (
+        select(Annotation.id)
+        .where(Annotation.project_id == project_id, Annotation.leased_by == user_id, Annotation.content.is_(None))
+        .order_by(Annotation.id)
+        .with_for_update()
+    )
+    held = (await db.execute(
+        update(Annotation)
+        .where(Annotation.id.in_(renewed.scalar_subquery()))
+        .values(lease_expires_at=expires_at)
+        .returning(Annotation.id, Annotation.row_id)
+        .execution_options(synchronize_session=False)
+    )).all()
+
+    claimed = []
+    if len(held) < size:
+        # lignes libres dans l'ordre du fichier (index partiel sur les lignes non annotées)
+        candidates = (await db.scalars(
+            select(Annotation.id)
+            .where(Annotation.project_id == project_id, Annotation.content.is_(None), _available(now))
+            .order_by(Annotation.row_id.asc())
+            .limit(size - len(held))
+            .with_for_update(skip_locked=True)
+        )).all()
+        if candidates:
+            claimed = (await db.execute(
+                update(Annotation)
+                .where(Annotation.id.in_(candidates), Annotation.content.is_(None), _available(now))
+                .values(leased_by=user_id, lease_expires_at=expires_at)
+                .returning(Annotation.id, Annotation.row_id)
+                .execution_options(synchronize_session=False)
+            )).all()
+
+    return expires_at, sorted([*held, *claimed], key=lambda row: row.row_id)
+
+
+async def release_rows_async(db: AsyncSession, project_id: int, user_id: int) -> int:
+    """Rend les lignes non soumises d'un annotateur : elles peuvent être attribuées aussitôt à un autre.
+
+    Aucun commit n'est fait.
+
+    Args:
+        db (AsyncSession): session sqlalchemy asynchrone
+        project_id (int): identifiant du projet
+        user_id (int): annotateur dont les baux sont rendus
+
+    Returns:
+        int: nombre de lignes rendues
+    """
+    result = await db.execute(
+        update(Annotation)
+        .where(Annotation.project_id == project_id, Annotation.leased_by == user_id)
+        .values(leased_by=None, lease_expires_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
@@ -0,0 +1,136 @@
+# Métriques des requêtes HTTP au format Prometheus
+
+import os
+import time
+from contextvars import ContextVar
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Histogram, REGISTRY, generate_latest, multiprocess
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Libellé utilisé pour les requêtes qui ne correspondent à aucune route (404, fichiers statiques)
+UNMATCHED_ROUTE = "unmatched"
+
+# Bornes des histogrammes, en secondes pour les durées
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+DB_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Durée des requêtes HTTP, jusqu'au dernier octet envoyé",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Taille du corps des réponses HTTP",
+    ["method", "route"], buckets=SIZE_BUCKETS
+)
+DB_STATEMENTS = Histogram(
+    "http_request_db_statements", "Nombre de requêtes SQL exécutées par requête HTTP",
+    ["method", "route"], buckets=STATEMENT_BUCKETS
+)
+DB_TIME = Histogram(
+    "http_request_db_seconds", "Temps total passé dans les requêtes SQL par requête HTTP",
+    ["method", "route"], buckets=DB_TIME_BUCKETS
+)
+
+
+class _DatabaseUsage:
+    """Compteurs SQL d'une requête HTTP, partagés par les threads et greenlets qui la servent."""
+    __slots__ = ("statements", "seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+
+
+# Compteurs SQL de la requête HTTP en cours, None en dehors d'une requête (tâches, scripts)
+_database_usage: ContextVar[_DatabaseUsage | None] = ContextVar("database_usage", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # le début est porté par le contexte d'exécution : rien ne reste en mémoire si la requête échoue
+    context.metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    usage = _database_usage.get()
+    if usage is not None:
+        usage.statements += 1
+        usage.seconds += time.perf_counter() - context.metrics_start
+
+
+def instrument_queries(engine: Engine) -> None:
+    """Compte les requêtes SQL exécutées par le moteur et leur durée pour la requête HTTP en cours.
+
+    Args:
+        engine (Engine): moteur synchrone (engine.sync_engine pour un moteur asynchrone)
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI qui mesure chaque requête HTTP.
+
+    Pour chaque route (chemin déclaré, par exemple /annotations/{project_id}) sont enregistrés :
+    la durée jusqu'au dernier octet envoyé, la taille du corps de la réponse, le nombre de
+    requêtes SQL et le temps passé en base de données. Le middleware est écrit directement en
+    ASGI, sans BaseHTTPMiddleware : les réponses en flux ne sont pas mises en tampon et le coût
+    par requête se limite à quelques appels à perf_counter et à l'observation des histogrammes.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        usage = _DatabaseUsage()
+        token = _database_usage.set(usage)
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _database_usage.reset(token)
+            # le routeur ajoute la route au scope : le chemin déclaré limite le nombre de séries
+            route = scope.get("route")
+            route = getattr(route, "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+            REQUEST_LATENCY.labels(method, route, str(status)).observe(elapsed)
+            RESPONSE_SIZE.labels(method, route).observe(size)
+            DB_STATEMENTS.labels(method, route).observe(usage.statements)
+            DB_TIME.labels(method, route).observe(usage.seconds)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Sérialise les métriques au format texte de Prometheus.
+
+    Avec plusieurs workers, PROMETHEUS_MULTIPROC_DIR doit pointer vers un dossier partagé :
+    les métriques de tous les workers sont alors agrégées.
+
+    Returns:
+        tuple[bytes, str]: corps et type de contenu de la réponse
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
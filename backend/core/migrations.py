@@ -0,0 +1,115 @@
+# Mise à niveau du schéma d'une base existante : colonnes et index ajoutés aux tables d'origine
+
+import logging
+
+from sqlalchemy import Engine, exists, inspect, select, text, update
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateColumn
+
+from core.counters import reconcile_project_counters
+from models import Base, Annotation, Project
+
+logger = logging.getLogger(__name__)
+
+# Colonnes ajoutées aux tables d'origine depuis leur création, dans l'ordre des versions.
+# create_all ne crée que les tables manquantes : ces colonnes sont ajoutées par migrate_schema.
+ADDED_COLUMNS = {
+    "projects": [
+        "total_rows", "annotated_rows",
+        "source_encoding", "csv_delimiter", "csv_quotechar", "csv_fields",
+        "annotation_version",
+        "ingestion",
+    ],
+    "annotations": ["annotator_id", "leased_by", "lease_expires_at"],
+}
+# Colonnes devenues facultatives (NOT NULL retiré, PostgreSQL seulement)
+NULLABLE_COLUMNS = {"projects": ["guidelines_file_path"]}
+
+
+def _add_column_ddl(engine: Engine, table_name: str, column_name: str) -> str:
+    """Instruction ALTER TABLE ... ADD COLUMN d'une colonne du modèle, clé étrangère comprise.
+
+    Le type, la valeur par défaut et NOT NULL viennent de la définition du modèle : les lignes
+    existantes reçoivent la valeur par défaut du serveur (0 pour les compteurs et la version).
+    """
+    column = Base.metadata.tables[table_name].c[column_name]
+    ddl = f"ALTER TABLE {table_name} ADD COLUMN {CreateColumn(column).compile(dialect=engine.dialect)}"
+    for foreign_key in column.foreign_keys:
+        ddl += f" REFERENCES {foreign_key.column.table.name} ({foreign_key.column.name})"
+        if foreign_key.ondelete:
+            ddl += f" ON DELETE {foreign_key.ondelete}"
+    return ddl
+
+
+def migrate_schema(engine: Engine) -> list[str]:
+    """Ajoute aux tables existantes les colonnes et les index du modèle qui leur manquent.
+
+    À appeler après Base.metadata.create_all, qui crée les tables manquantes complètes mais ne
+    modifie jamais une table existante. Idempotent : seules les colonnes absentes sont ajoutées
+    (ALTER TABLE ... ADD COLUMN, disponible sous PostgreSQL et SQLite), les index sont créés
+    s'ils n'existent pas. Les données sont complétées ensuite par backfill.
+
+    Args:
+        engine (Engine): moteur sqlalchemy synchrone
+
+    Returns:
+        list[str]: colonnes ajoutées, sous la forme table.colonne
+    """
+    inspector = inspect(engine)
+    added = []
+    with engine.begin() as connection:
+        for table_name, column_names in ADDED_COLUMNS.items():
+            existing = {column["name"] for column in inspector.get_columns(table_name)}
+            for column_name in column_names:
+                if column_name not in existing:
+                    connection.execute(text(_add_column_ddl(engine, table_name, column_name)))
+                    added.append(f"{table_name}.{column_name}")
+            # index sur les nouvelles colonnes et index ajoutés depuis la création de la table
+            for index in Base.metadata.tables[table_name].indexes:
+                index.create(connection, checkfirst=True)
+
+        if engine.dialect.name == "postgresql":
+            for table_name, column_names in NULLABLE_COLUMNS.items():
+                for column_name in column_names:
+                    connection.execute(text(f"ALTER TABLE {table_name} ALTER COLUMN {column_name} DROP NOT NULL"))
+
+    for column in added:
+        logger.info("Colonne ajoutée : %s", column)
+    return added
+
+
+def backfill(db: Session, added: list[str]) -> None:
+    """Complète les données des colonnes ajoutées par migrate_schema.
+
+        - annotator_id : les annotations existantes ont été soumises par le propriétaire du projet,
+          seul annotateur avant les membres. Fait seulement à l'ajout de la colonne
+        - total_rows, annotated_rows et nombre d'annotations par jour : recalculés pour les projets
+          qui ont des lignes mais dont les compteurs sont à 0 (le nombre par jour seulement s'il
+          n'existe pas encore). Idempotent : couvre aussi une base mise à niveau par db-init/init.sql
+    La version des annotations part de 0 (valeur par défaut de la colonne) : le cache des
+    exports est vide pour les projets existants.
+    Aucune importation n'est en cours au démarrage : un projet à 0 ligne avec des annotations
+    ne peut venir que d'une base antérieure aux compteurs.
+
+    Args:
+        db (Session): session sqlalchemy
+        added (list[str]): colonnes ajoutées, renvoyées par migrate_schema
+    """
+    if "annotations.annotator_id" in added:
+        db.execute(
+            update(Annotation)
+            .where(Annotation.content.is_not(None), Annotation.annotator_id.is_(None))
+            .values(annotator_id=select(Project.user_id).where(Project.id == Annotation.project_id).scalar_subquery())
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+    project_ids = list(db.scalars(
+        select(Project.id).where(
+            Project.total_rows == 0,
+            exists().where(Annotation.project_id == Project.id)
+        )
+    ))
+    if project_ids:
+        reconcile_project_counters(db, project_ids)
+        logger.info("Compteurs recalculés pour %s projet(s)", len(project_ids))
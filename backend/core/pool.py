@@ -0,0 +1,195 @@
+# Configuration et métriques des pools de connexions à la base de données
+
+import threading
+import time
+
+from sqlalchemy import event, exc, make_url
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+from core.config import settings
+
+# Nombre de moteurs créés par processus (synchrone et asynchrone), chacun avec son pool
+ENGINES_PER_WORKER = 2
+
+
+class PoolMetrics:
+    """Métriques d'un pool de connexions, alimentées par les évènements du pool.
+
+    Attributs:
+        checkouts (int): nombre de connexions empruntées au pool
+        checkins (int): nombre de connexions rendues au pool
+        connects (int): nombre de connexions ouvertes vers la base de données
+        in_use (int): nombre de connexions actuellement empruntées
+        peak_in_use (int): nombre maximum de connexions empruntées simultanément
+        exhausted (int): nombre d'emprunts faits alors que le pool et son overflow étaient pleins
+        timeouts (int): nombre d'emprunts abandonnés après DB_POOL_TIMEOUT secondes
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.exhausted = 0
+        self.timeouts = 0
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def record_wait(self, wait: float, exhausted: bool) -> None:
+        """Enregistre la durée d'attente d'un emprunt de connexion (en secondes)."""
+        with self._lock:
+            self._waits += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            if exhausted:
+                self.exhausted += 1
+
+    def record_timeout(self, wait: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.exhausted += 1
+            self._wait_max = max(self._wait_max, wait)
+
+    def record_checkout(self) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def record_checkin(self) -> None:
+        with self._lock:
+            self.checkins += 1
+            self.in_use = max(self.in_use - 1, 0)
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def stats(self, pool=None) -> dict:
+        """Métriques du pool : emprunts, connexions utilisées, saturation et attente (en secondes)."""
+        with self._lock:
+            waits = self._waits or 1
+            result = {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "exhausted": self.exhausted,
+                "timeouts": self.timeouts,
+                "checkout_wait_avg": round(self._wait_total / waits, 6),
+                "checkout_wait_max": round(self._wait_max, 6)
+            }
+        if isinstance(pool, QueuePool):
+            result.update({
+                "pool_size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "overflow": pool.overflow(),
+                "idle": pool.checkedin(),
+                "checked_out": pool.checkedout()
+            })
+        return result
+
+
+# Métriques des pools du processus, par nom de moteur ("sync", "async")
+pool_metrics: dict[str, PoolMetrics] = {}
+
+
+def _instrumented_pool_class(base: type[QueuePool], metrics: PoolMetrics) -> type[QueuePool]:
+    """Sous-classe du pool qui mesure la durée d'attente de chaque emprunt de connexion.
+
+    Les évènements du pool ne sont déclenchés qu'une fois la connexion obtenue :
+    le temps passé à attendre une connexion libre n'est mesurable qu'ici. Les métriques
+    sont portées par la classe pour survivre à la recréation du pool (engine.dispose()).
+    """
+
+    class InstrumentedPool(base):
+        def _do_get(self):
+            # plus de connexion libre et overflow atteint : l'emprunt doit attendre une restitution
+            exhausted = self.checkedin() == 0 and -1 < self._max_overflow <= self._overflow
+            start = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except exc.TimeoutError:
+                metrics.record_timeout(time.perf_counter() - start)
+                raise
+            metrics.record_wait(time.perf_counter() - start, exhausted)
+            return connection
+
+    InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+    return InstrumentedPool
+
+
+def worker_pool_size() -> tuple[int, int]:
+    """Calcule la taille du pool et de son overflow pour un moteur d'un worker.
+
+    Si DB_POOL_SIZE n'est pas défini, le budget DB_MAX_CONNECTIONS est réparti entre
+    les WEB_CONCURRENCY workers et les deux moteurs (synchrone et asynchrone) de chaque
+    worker : le nombre total de connexions ouvertes ne dépasse jamais le budget.
+
+    Returns:
+        tuple[int, int]: pool_size et max_overflow
+    """
+    if settings.DB_POOL_SIZE is not None:
+        return settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+    budget = max(settings.DB_MAX_CONNECTIONS // (max(settings.WEB_CONCURRENCY, 1) * ENGINES_PER_WORKER), 1)
+    max_overflow = min(settings.DB_MAX_OVERFLOW, budget - 1)
+    return budget - max_overflow, max_overflow
+
+
+def pool_options(url: str, name: str, asynchronous: bool = False) -> dict:
+    """Options de pool passées à create_engine / create_async_engine.
+
+    SQLite garde le pool par défaut de SQLAlchemy : les réglages de taille n'y ont pas de sens.
+
+    Args:
+        url (str): url de la base de données
+        name (str): nom du moteur dans les métriques ("sync", "async")
+        asynchronous (bool, optional): moteur créé avec create_async_engine. Defaults to False.
+
+    Returns:
+        dict: arguments nommés du moteur
+    """
+    metrics = pool_metrics.setdefault(name, PoolMetrics(name))
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    pool_size, max_overflow = worker_pool_size()
+    base = AsyncAdaptedQueuePool if asynchronous else QueuePool
+    return {
+        "poolclass": _instrumented_pool_class(base, metrics),
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE
+    }
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Abonne les métriques du moteur aux évènements de son pool.
+
+    Args:
+        engine (Engine): moteur synchrone (engine.sync_engine pour un moteur asynchrone)
+        name (str): nom du moteur dans les métriques
+    """
+    metrics = pool_metrics.setdefault(name, PoolMetrics(name))
+    event.listen(engine, "connect", lambda dbapi_connection, record: metrics.record_connect())
+    event.listen(engine, "checkout", lambda dbapi_connection, record, proxy: metrics.record_checkout())
+    event.listen(engine, "checkin", lambda dbapi_connection, record: metrics.record_checkin())
+
+
+def pool_stats(engines: dict[str, Engine]) -> dict:
+    """Métriques de tous les pools du processus.
+
+    Args:
+        engines (dict[str, Engine]): moteurs par nom
+
+    Returns:
+        dict: métriques par nom de moteur
+    """
+    return {name: pool_metrics[name].stats(engine.pool) for name, engine in engines.items() if name in pool_metrics}
@@ -0,0 +1,297 @@
+# Stockage normalisé des lignes d'un projet avec index d'offsets
+
+import csv
+import io
+import mmap
+import os
+import uuid
+from array import array
+from bisect import bisect_right
+from typing import Iterator
+
+from core.upload import read_sample, detect_encoding, read_csv_rows
+
+# Extensions des fichiers stockés à côté de annotation_file_path
+ROWS_SUFFIX = ".rows"
+INDEX_SUFFIX = ".idx"
+# Type des offsets de l'index : entiers non signés sur 8 octets
+OFFSET_TYPECODE = "Q"
+# Nombre d'offsets gardés en mémoire avant écriture dans l'index
+OFFSET_FLUSH_SIZE = 64 * 1024
+# Taille des fenêtres décodées à la lecture : la mémoire d'un parcours ne dépend pas de sa longueur
+PARSE_WINDOW_BYTES = 1024 * 1024
+
+
+def row_store_paths(annotation_file_path: str) -> tuple[str, str]:
+    """Renvoie les chemins du fichier de lignes et de l'index d'un projet.
+
+    Args:
+        annotation_file_path (str): chemin du csv d'origine du projet
+
+    Returns:
+        tuple[str, str]: chemin du fichier de lignes, chemin de l'index
+    """
+    return annotation_file_path + ROWS_SUFFIX, annotation_file_path + INDEX_SUFFIX
+
+
+class RowStoreWriter:
+    """Écrit le stock de lignes d'un projet pendant l'ingestion.
+
+    Chaque ligne du csv est réécrite en UTF-8 au format csv standard (séparateur ",",
+    fin de ligne "\\r\\n") et l'offset de son premier octet est ajouté à l'index.
+    Les lignes plus courtes que le header sont complétées par des champs vides : chaque
+    ligne a au moins autant de champs que le header, ce qui permet à l'export de recopier
+    les octets d'une ligne sans la parser.
+    L'enregistrement 0 est le header, la ligne row_id occupe les octets
+    [offsets[row_id], offsets[row_id + 1]) du fichier de lignes.
+
+    Les fichiers sont écrits sous un nom temporaire unique puis renommés à la sortie du
+    bloc with : un stock incomplet n'est jamais visible, et deux projets qui partagent
+    le même csv (core/storage.py) peuvent le construire en même temps. En cas d'erreur,
+    les fichiers temporaires sont supprimés.
+
+    Exemple d'utilisation:
+        with RowStoreWriter(path) as store:
+            store.append(header)
+            for row in rows:
+                row_id = store.append(row)
+    """
+
+    def __init__(self, annotation_file_path: str):
+        self.rows_path, self.index_path = row_store_paths(annotation_file_path)
+        self._suffix = f".{uuid.uuid4().hex}.tmp"
+        self._rows_file = open(self.rows_path + self._suffix, "wb")
+        self._index_file = open(self.index_path + self._suffix, "wb")
+        self._writer = csv.writer(self)
+        self._offsets = array(OFFSET_TYPECODE, [0])
+        self._offset = 0
+        self._width = 0
+        self.records = 0
+
+    def write(self, line: str) -> None:
+        """Reçoit une ligne complète de csv.writer et l'écrit en UTF-8."""
+        data = line.encode("utf-8")
+        self._rows_file.write(data)
+        self._offset += len(data)
+        self._offsets.append(self._offset)
+        if len(self._offsets) >= OFFSET_FLUSH_SIZE:
+            self._offsets.tofile(self._index_file)
+            self._offsets = array(OFFSET_TYPECODE)
+
+    def append(self, row: list[str]) -> int:
+        """Ajoute une ligne au stock.
+
+        Args:
+            row (list[str]): champs de la ligne
+
+        Returns:
+            int: numéro de l'enregistrement (0 pour le header, puis row_id à partir de 1)
+        """
+        if self.records == 0:
+            self._width = len(row)
+        elif len(row) < self._width:
+            row = row + [""] * (self._width - len(row))
+        self._writer.writerow(row)
+        self.records += 1
+        return self.records - 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._offsets.tofile(self._index_file)
+        self._rows_file.close()
+        self._index_file.close()
+        if exc_type is None:
+            os.replace(self.rows_path + self._suffix, self.rows_path)
+            os.replace(self.index_path + self._suffix, self.index_path)
+        else:
+            for path in (self.rows_path + self._suffix, self.index_path + self._suffix):
+                if os.path.exists(path):
+                    os.remove(path)
+        return False
+
+
+class RowStore:
+    """Accès en lecture au stock de lignes d'un projet.
+
+    Les deux fichiers sont projetés en mémoire (mmap) : lire une fenêtre de lignes
+    ne coûte que la taille de cette fenêtre, quelle que soit la taille du fichier.
+
+    Exemple d'utilisation:
+        with RowStore(path) as store:
+            text_index = store.column_index("text")
+            for row_id, row in store.rows(500_000, 500_050):
+                print(row_id, row[text_index])
+    """
+
+    def __init__(self, annotation_file_path: str):
+        rows_path, index_path = row_store_paths(annotation_file_path)
+        self._rows_file = open(rows_path, "rb")
+        self._index_file = open(index_path, "rb")
+        self._rows = self._map(self._rows_file)
+        self._index = self._map(self._index_file)
+        self._offsets = memoryview(self._index).cast(OFFSET_TYPECODE)
+        self.header = next(self._parse(0, 1), []) if len(self._offsets) > 1 else []
+
+    @staticmethod
+    def _map(file) -> mmap.mmap | bytes:
+        # mmap refuse les fichiers vides
+        if os.fstat(file.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        """Nombre de lignes de données (header exclu)."""
+        return max(len(self._offsets) - 2, 0)
+
+    def column_index(self, name: str) -> int | None:
+        """Position d'une colonne dans le header, None si elle n'existe pas."""
+        return self.header.index(name) if name in self.header else None
+
+    def offsets(self, start: int, stop: int) -> list[int]:
+        """Offsets de début des enregistrements [start, stop] dans le fichier de lignes.
+
+        L'enregistrement i occupe les octets [offsets[i], offsets[i + 1]), fin de ligne comprise.
+        """
+        return self._offsets[max(start, 0):min(stop, len(self._offsets) - 1) + 1].tolist()
+
+    def raw(self, start: int, stop: int) -> bytes:
+        """Octets UTF-8 des enregistrements [start, stop), fins de ligne comprises."""
+        start = max(start, 0)
+        stop = min(stop, len(self._offsets) - 1)
+        if start >= stop:
+            return b""
+        return self._rows[self._offsets[start]:self._offsets[stop]]
+
+    def _parse(self, start: int, stop: int) -> Iterator[list[str]]:
+        """Parse les enregistrements [start, stop) par fenêtres d'environ PARSE_WINDOW_BYTES octets.
+
+        Les fenêtres s'arrêtent sur des limites d'enregistrement données par l'index (au moins
+        un enregistrement par fenêtre) : une fenêtre n'est décodée que lorsque le parcours
+        l'atteint, un parcours interrompu ne lit pas la suite du fichier.
+        """
+        start = max(start, 0)
+        stop = min(stop, len(self._offsets) - 1)
+        while start < stop:
+            limit = self._offsets[start] + PARSE_WINDOW_BYTES
+            end = min(max(bisect_right(self._offsets, limit, start + 1, stop + 1) - 1, start + 1), stop)
+            # décodage incrémental : seuls les octets de la fenêtre sont en mémoire
+            text = io.TextIOWrapper(io.BytesIO(self.raw(start, end)), encoding="utf-8", newline="")
+            yield from csv.reader(text)
+            start = end
+
+    def rows(self, start: int = 1, stop: int | None = None) -> Iterator[tuple[int, list[str]]]:
+        """Parcourt les lignes dont le row_id est compris dans [start, stop).
+
+        Args:
+            start (int, optional): premier row_id. Defaults to 1.
+            stop (int | None, optional): row_id de fin (exclu), jusqu'à la fin si None
+
+        Yields:
+            tuple[int, list[str]]: row_id et champs de la ligne
+        """
+        start = max(start, 1)
+        stop = len(self) + 1 if stop is None else min(stop, len(self) + 1)
+        return zip(range(start, stop), self._parse(start, stop))
+
+    def select(self, row_ids: list[int]) -> Iterator[tuple[int, list[str]]]:
+        """Parcourt les lignes d'une liste de row_id triée par ordre croissant.
+
+        Les row_id consécutifs sont regroupés en plages lues d'un seul bloc : le coût
+        reste proportionnel au nombre de lignes demandées, même si elles sont éparses.
+
+        Args:
+            row_ids (list[int]): row_id triés par ordre croissant
+
+        Yields:
+            tuple[int, list[str]]: row_id et champs de la ligne
+        """
+        index = 0
+        while index < len(row_ids):
+            start = stop = row_ids[index]
+            while index < len(row_ids) and row_ids[index] <= stop:
+                stop = row_ids[index] + 1
+                index += 1
+            yield from self.rows(start, stop)
+
+    def get(self, row_id: int) -> list[str] | None:
+        """Champs d'une ligne, None si le row_id n'existe pas."""
+        return next((row for _, row in self.rows(row_id, row_id + 1)), None)
+
+    def close(self) -> None:
+        self._offsets.release()
+        for mapped in (self._rows, self._index):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+        self._rows_file.close()
+        self._index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def build_row_store(
+    annotation_file_path: str,
+    encoding: str | None = None,
+    delimiter: str = ",",
+    quotechar: str = '"'
+) -> None:
+    """Construit le stock de lignes à partir du csv d'origine.
+
+    Utilisé pour les projets créés avant l'introduction du stock. Si l'encodage
+    enregistré sur le projet n'est pas fourni, il est détecté sur un échantillon borné,
+    puis le fichier est converti en un seul passage.
+
+    Args:
+        annotation_file_path (str): chemin du csv d'origine
+        encoding (str | None, optional): encodage du fichier, détecté si None. Defaults to None.
+        delimiter (str, optional): séparateur du csv. Defaults to ",".
+        quotechar (str, optional): caractère de citation du csv. Defaults to '"'.
+
+    Raises:
+        ValueError: si l'encodage du fichier ne peut pas être détecté
+    """
+    with open(annotation_file_path, "rb") as source:
+        if encoding is None:
+            encoding = detect_encoding(read_sample(source))
+            if encoding is None:
+                raise ValueError("Impossible de détecter l'encodage du fichier CSV")
+            source.seek(0)
+        with RowStoreWriter(annotation_file_path) as store:
+            for row in read_csv_rows(source, encoding, delimiter, quotechar):
+                # les lignes vides sont ignorées, comme à l'ingestion
+                if row:
+                    store.append(row)
+
+
+def open_row_store(
+    annotation_file_path: str,
+    encoding: str | None = None,
+    delimiter: str | None = None,
+    quotechar: str | None = None
+) -> RowStore | None:
+    """Ouvre le stock de lignes d'un projet, en le construisant s'il n'existe pas encore.
+
+    Args:
+        annotation_file_path (str): chemin du csv d'origine
+        encoding (str | None, optional): encodage enregistré sur le projet. Defaults to None.
+        delimiter (str | None, optional): séparateur enregistré sur le projet. Defaults to None.
+        quotechar (str | None, optional): caractère de citation enregistré sur le projet. Defaults to None.
+
+    Raises:
+        ValueError: si le stock doit être construit et que l'encodage n'est pas détecté
+
+    Returns:
+        RowStore | None: le stock ouvert, None si ni le stock ni le csv d'origine n'existent
+    """
+    rows_path, index_path = row_store_paths(annotation_file_path)
+    if not (os.path.exists(rows_path) and os.path.exists(index_path)):
+        if not os.path.exists(annotation_file_path):
+            return None
+        build_row_store(annotation_file_path, encoding, delimiter or ",", quotechar or '"')
+    return RowStore(annotation_file_path)
@@ -0,0 +1,321 @@
+# Recherche dans les lignes d'un projet : index plein texte PostgreSQL, index inversé en mémoire sinon
+
+import re
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from contextlib import closing, nullcontext
+from itertools import islice
+from typing import Iterable, Iterator, Literal, Sequence
+
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.ingestion import copy_lines
+from core.row_store import RowStore, open_row_store
+from models import Annotation, Project, RowText
+
+# Configuration de recherche plein texte : mots en minuscules, sans racinisation ni mots vides,
+# identique à celle de l'index ix_row_texts_project_tsv
+SEARCH_CONFIG = literal_column("'simple'::regconfig")
+# Espace de noms des verrous consultatifs PostgreSQL pris pendant l'indexation d'un projet
+INDEX_LOCK_NAMESPACE = 23
+# Nombre de row_id candidats vérifiés par requête SQL sous SQLite
+CANDIDATE_BATCH_SIZE = 1_000
+# Mots de la recherche : même découpage que la configuration simple de PostgreSQL
+_TOKEN = re.compile(r"\w+")
+# Caractères à échapper dans le format texte de COPY
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r", "\x00": ""})
+
+SearchMatch = Literal["words", "contains"]
+
+
+def row_text(row: list[str], text_index: int | None) -> str:
+    """Texte recherché d'une ligne : la colonne text, ou tous les champs si elle est absente."""
+    if text_index is None:
+        return " ".join(row)
+    return row[text_index] if text_index < len(row) else ""
+
+
+def tokenize(value: str) -> list[str]:
+    """Découpe un texte en mots en minuscules."""
+    return _TOKEN.findall(value.casefold())
+
+
+def row_texts(store: RowStore) -> Iterator[tuple[int, str]]:
+    """Texte recherché de chaque ligne du stock, dans l'ordre des row_id.
+
+    Le stock est lu par fenêtres bornées (RowStore.rows) : la mémoire utilisée ne dépend pas
+    de la taille du fichier.
+    """
+    text_index = store.column_index("text")
+    for row_id, row in store.rows():
+        yield row_id, row_text(row, text_index)
+
+
+def index_row_texts(db: Session, project_id: int, store: RowStore) -> int:
+    """Enregistre le texte des lignes d'un projet dans row_texts avec COPY (PostgreSQL).
+
+    Aucun commit n'est fait : à l'ingestion, le texte est validé avec les lignes du projet.
+
+    Args:
+        db (Session): session sqlalchemy connectée à PostgreSQL
+        project_id (int): identifiant du projet
+        store (RowStore): stock de lignes du projet
+
+    Returns:
+        int: nombre de lignes indexées
+    """
+    lines = (
+        f"{project_id}\t{row_id}\t{text.translate(_COPY_ESCAPES)}\n".encode("utf-8")
+        for row_id, text in row_texts(store)
+    )
+    return copy_lines(db, "COPY row_texts (project_id, row_id, text) FROM STDIN", lines)
+
+
+def _has_row_texts(db: Session, project_id: int) -> bool:
+    return db.scalar(select(RowText.row_id).where(RowText.project_id == project_id).limit(1)) is not None
+
+
+def ensure_row_texts(db: Session, project: Project) -> None:
+    """Indexe le texte d'un projet importé avant l'introduction de la recherche (PostgreSQL).
+
+    Un verrou consultatif empêche deux workers d'indexer le même projet en même temps.
+
+    Raises:
+        ValueError: si le stock doit être construit et que l'encodage n'est pas détecté
+    """
+    if project.total_rows == 0 or _has_row_texts(db, project.id):
+        return
+    db.execute(select(func.pg_advisory_xact_lock(INDEX_LOCK_NAMESPACE, project.id)))
+    if not _has_row_texts(db, project.id):
+        store = open_row_store(
+            project.annotation_file_path,
+            project.source_encoding, project.csv_delimiter, project.csv_quotechar
+        )
+        if store is not None:
+            with store:
+                index_row_texts(db, project.id, store)
+    db.commit()
+
+
+class InvertedIndex:
+    """Index inversé des mots d'un projet, en mémoire : mot -> row_id triés.
+
+    Utilisé sous SQLite, qui n'a pas d'index plein texte intégré. Le stock de lignes
+    d'un projet ne change pas après l'ingestion : l'index n'est jamais invalidé.
+    """
+
+    def __init__(self, texts: Iterable[tuple[int, str]]):
+        self.postings: dict[str, array] = {}
+        for row_id, text in texts:
+            for token in set(tokenize(text)):
+                posting = self.postings.get(token)
+                if posting is None:
+                    posting = self.postings[token] = array("I")
+                posting.append(row_id)
+
+    def search(self, query: str) -> Sequence[int]:
+        """Row_id triés des lignes qui contiennent tous les mots de la requête."""
+        postings = [self.postings.get(token) for token in set(tokenize(query))]
+        if not postings or any(posting is None for posting in postings):
+            return []
+        if len(postings) == 1:
+            return postings[0]
+        postings.sort(key=len)
+        matches = set(postings[0])
+        for posting in postings[1:]:
+            matches.intersection_update(posting)
+        return sorted(matches)
+
+
+class SearchIndexCache:
+    """Index inversés des derniers projets recherchés dans ce processus (LRU).
+
+    Un index est construit hors du verrou du cache : la construction d'un gros index ne bloque
+    pas les recherches des autres projets. Les recherches simultanées d'un même projet attendent
+    la construction en cours au lieu de construire chacune leur index.
+
+    Exemple d'utilisation:
+        row_ids = search_indexes.get(project).search("facture")
+
+    Attributs:
+        max_projects (int): nombre maximum d'index gardés en mémoire
+        hits (int): recherches servies par un index déjà construit
+        misses (int): index construits
+    """
+
+    def __init__(self, max_projects: int):
+        self.max_projects = max_projects
+        self._lock = threading.Lock()
+        self._indexes: OrderedDict[int, tuple[str, InvertedIndex]] = OrderedDict()
+        # constructions en cours : project_id -> évènement signalé à la fin de la construction
+        self._building: dict[int, threading.Event] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, project: Project) -> InvertedIndex:
+        """Index du projet, construit à partir de son stock de lignes au premier appel.
+
+        Raises:
+            ValueError: si le stock doit être construit et que l'encodage n'est pas détecté
+        """
+        while True:
+            with self._lock:
+                entry = self._indexes.get(project.id)
+                if entry is not None and entry[0] == project.annotation_file_path:
+                    self._indexes.move_to_end(project.id)
+                    self.hits += 1
+                    return entry[1]
+                building = self._building.get(project.id)
+                if building is None:
+                    building = self._building[project.id] = threading.Event()
+                    self.misses += 1
+                    break
+            # construction en cours dans un autre thread : son résultat est relu dans le cache
+            building.wait()
+
+        index = None
+        try:
+            store = open_row_store(
+                project.annotation_file_path,
+                project.source_encoding, project.csv_delimiter, project.csv_quotechar
+            )
+            if store is None:
+                return InvertedIndex([])
+            with store:
+                index = InvertedIndex(row_texts(store))
+            return index
+        finally:
+            with self._lock:
+                if index is not None:
+                    self._indexes[project.id] = (project.annotation_file_path, index)
+                    while len(self._indexes) > self.max_projects:
+                        self._indexes.popitem(last=False)
+                del self._building[project.id]
+            building.set()
+
+    def discard(self, project_id: int) -> None:
+        """Oublie l'index d'un projet supprimé."""
+        with self._lock:
+            self._indexes.pop(project_id, None)
+
+    def stats(self) -> dict:
+        """Compteurs des index de recherche du processus."""
+        with self._lock:
+            return {
+                "projects": len(self._indexes),
+                "max_projects": self.max_projects,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+def _batched(values: Iterable[int], size: int) -> Iterator[list[int]]:
+    iterator = iter(values)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _scan_contains(project: Project, query: str, after: int) -> Iterator[int]:
+    """Row_id des lignes dont le texte contient la requête, lues dans le stock (SQLite).
+
+    Le stock est lu par fenêtres bornées, au fur et à mesure de la consommation des row_id :
+    le parcours s'arrête dès que la page de résultats est complète.
+    """
+    store = open_row_store(
+        project.annotation_file_path,
+        project.source_encoding, project.csv_delimiter, project.csv_quotechar
+    )
+    if store is None:
+        return
+    needle = query.casefold()
+    with store:
+        text_index = store.column_index("text")
+        for row_id, row in store.rows(after + 1):
+            if needle in row_text(row, text_index).casefold():
+                yield row_id
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_annotations(
+    db: Session,
+    project: Project,
+    query: str | None,
+    match: SearchMatch = "words",
+    label: str | None = None,
+    annotated: bool | None = None,
+    after: int = 0,
+    limit: int = 50
+) -> list[Annotation]:
+    """Cherche les lignes d'un projet par texte, catégorie et état d'annotation.
+
+    Les filtres sont combinés (ET), les résultats sont triés par row_id et paginés par clé.
+        - words : lignes qui contiennent tous les mots de la requête. Sous PostgreSQL, la syntaxe
+          de websearch_to_tsquery est acceptée ("expression exacte", or, -mot)
+        - contains : lignes dont le texte contient la requête, sans tenir compte de la casse
+    Sous PostgreSQL, la requête utilise les index GIN de row_texts. Sous SQLite, les row_id
+    candidats viennent de l'index inversé en mémoire (words) ou d'un parcours du stock de
+    lignes (contains), puis sont filtrés en base par lots.
+
+    Args:
+        db (Session): session sqlalchemy
+        project (Project): projet, import terminé
+        query (str | None): texte recherché, None pour ne filtrer que par catégorie ou état
+        match (SearchMatch, optional): mode de recherche du texte. Defaults to "words".
+        label (str | None, optional): catégorie des lignes. Defaults to None.
+        annotated (bool | None, optional): lignes annotées (True) ou non (False). Defaults to None.
+        after (int, optional): row_id après lequel commence la page. Defaults to 0.
+        limit (int, optional): nombre maximum de lignes renvoyées. Defaults to 50.
+
+    Raises:
+        ValueError: si le stock doit être construit et que l'encodage n'est pas détecté
+
+    Returns:
+        list[Annotation]: annotations des lignes trouvées, par row_id croissant
+    """
+    statement = select(Annotation).where(Annotation.project_id == project.id)
+    if label is not None:
+        statement = statement.where(Annotation.content == label)
+    if annotated is not None:
+        statement = statement.where(Annotation.content.is_not(None) if annotated else Annotation.content.is_(None))
+    statement = statement.order_by(Annotation.row_id)
+
+    if not query:
+        return list(db.scalars(statement.where(Annotation.row_id > after).limit(limit)))
+
+    if db.get_bind().dialect.name == "postgresql":
+        ensure_row_texts(db, project)
+        if match == "contains":
+            condition = RowText.text.ilike(f"%{_escape_like(query)}%", escape="\\")
+        else:
+            condition = func.to_tsvector(SEARCH_CONFIG, RowText.text).op("@@")(
+                func.websearch_to_tsquery(SEARCH_CONFIG, query)
+            )
+        matching = select(RowText.row_id).where(RowText.project_id == project.id, condition)
+        return list(db.scalars(
+            statement.where(Annotation.row_id > after, Annotation.row_id.in_(matching)).limit(limit)
+        ))
+
+    if match == "contains":
+        # le stock parcouru est fermé dès que la page est complète
+        scan = closing(_scan_contains(project, query, after))
+    else:
+        row_ids = search_indexes.get(project).search(query)
+        scan = nullcontext(row_ids[bisect_right(row_ids, after):])
+    results = []
+    with scan as candidates:
+        for batch in _batched(candidates, CANDIDATE_BATCH_SIZE):
+            results += db.scalars(statement.where(Annotation.row_id.in_(batch)).limit(limit - len(results)))
+            if len(results) >= limit:
+                break
+    return results
+
+
+# Index inversés des projets recherchés sous SQLite
+search_indexes = SearchIndexCache(settings.SEARCH_INDEX_CACHE_PROJECTS)
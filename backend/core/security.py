@@ -1,17 +1,34 @@
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from fastapi import Cookie, HTTPException, Depends
-from database import get_db
+from database import get_async_db
 from models import User
-from sqlalchemy.orm import Session
-from crud import get_user_by_email
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from crud import get_user_by_email_async
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cache
+import hashlib
+import threading
+import time
 
 from core.config import settings
+from core.events import project_events
 
-# Contexte de hashage des mots de passe
-# Utilise bcrypt comme algrotihme recommandé
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated = "auto")
+@cache
+def password_context():
+    """
+    Contexte de hashage des mots de passe, créé au premier usage.
+    Utilise bcrypt comme algrotihme recommandé. passlib n'est importé que par
+    l'inscription et la connexion : il ne ralentit pas le démarrage des workers.
+
+    Returns:
+        CryptContext: le contexte passlib partagé par le processus
+    """
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated = "auto")
 
 def hashpassword(password: str) -> str:
     """
@@ -23,7 +40,7 @@ def hashpassword(password: str) -> str:
     Returns: 
         str: Le mot de passe haché (bcrypt)
     """
-    return pwd_context.hash(password)
+    return password_context().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -36,7 +53,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         bool: True si le mot de passe correspond, sinon False
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_context().verify(plain_password, hashed_password)
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     """
@@ -55,37 +72,189 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
-def get_current_user(db: Session = Depends(get_db), access_token: str = Cookie(None)) -> User:
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """Instantané léger de l'utilisateur authentifié, conservé dans le cache des jetons.
+
+    Attributs:
+        id (int): identifiant de l'utilisateur
+        email (str): adresse email de l'utilisateur
+        first_name (str): prénom de l'utilisateur
+        last_name (str): nom de famille de l'utilisateur
+        company (str | None): entreprise de l'utilisateur
+    """
+    id: int
+    email: str
+    first_name: str
+    last_name: str
+    company: str | None = None
+
+    def __str__(self) -> str:
+        return self.email
+
+    @classmethod
+    def from_user(cls, user: User) -> "AuthenticatedUser":
+        return cls(
+            id=user.id,
+            email=user.email,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            company=user.company
+        )
+
+
+class PrincipalCache:
+    """Cache LRU à durée de vie limitée des utilisateurs authentifiés.
+
+    Les entrées sont indexées par l'empreinte sha256 du jeton (le jeton lui-même n'est
+    pas conservé) et contiennent les claims décodés ainsi qu'un AuthenticatedUser.
+    Une entrée expire après ttl secondes, ou à l'expiration du jeton si elle est plus proche.
+    Les entrées d'un utilisateur sont invalidées lorsque sa ligne en base est modifiée
+    (verrouillage, tentatives échouées...) ou supprimée : tout de suite dans le worker qui
+    fait la modification, au commit dans les autres workers (NOTIFY sur USER_CHANNEL, sous
+    PostgreSQL). Sans LISTEN/NOTIFY (SQLite, EVENTS_NOTIFY désactivé) ou pendant une
+    reconnexion de l'écoute, les autres workers peuvent servir l'ancien utilisateur
+    jusqu'à l'expiration de l'entrée, au plus ttl secondes (AUTH_CACHE_TTL_SECONDS).
+
+    Attributs:
+        hits (int): nombre de requêtes servies depuis le cache
+        misses (int): nombre de requêtes ayant nécessité un décodage et une requête en base
+        invalidations (int): nombre d'entrées supprimées suite à une modification d'utilisateur
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, dict, AuthenticatedUser]] = OrderedDict()
+        self._keys_by_email: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> AuthenticatedUser | None:
+        """Renvoie l'utilisateur associé au jeton s'il est en cache et encore valide."""
+        key = self.key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, token: str, claims: dict, user: AuthenticatedUser) -> None:
+        """Ajoute un utilisateur authentifié au cache, en évinçant le moins récemment utilisé si besoin."""
+        ttl = self.ttl
+        if "exp" in claims:
+            ttl = min(ttl, claims["exp"] - time.time())
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        key = self.key(token)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, claims, user)
+            self._keys_by_email.setdefault(user.email, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_email(self, email: str) -> None:
+        """Supprime toutes les entrées d'un utilisateur."""
+        with self._lock:
+            for key in list(self._keys_by_email.get(email, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_email.clear()
+
+    def stats(self) -> dict:
+        """Compteurs du cache, exposés pour le suivi des performances."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "invalidations": self.invalidations
+            }
+
+    def _remove(self, key: str) -> None:
+        # appelé avec le verrou
+        _, _, user = self._entries.pop(key)
+        keys = self._keys_by_email.get(user.email)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_email[user.email]
+
+
+# Cache des utilisateurs authentifiés, partagé par toutes les requêtes du processus
+principal_cache = PrincipalCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS)
+# Canal PostgreSQL des utilisateurs modifiés : chaque worker invalide leurs entrées en cache
+USER_CHANNEL = "user_invalidations"
+project_events.on_notify(USER_CHANNEL, principal_cache.invalidate_email)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target: User) -> None:
+    """Invalide le cache dès que la ligne d'un utilisateur est modifiée ou supprimée,
+    puis dans les autres workers au commit de la modification."""
+    # si l'email a changé, les entrées sont indexées par l'ancienne adresse
+    for email in {target.email, *(inspect(target).attrs.email.history.deleted or ())}:
+        principal_cache.invalidate_email(email)
+        project_events.broadcast(connection, USER_CHANNEL, email)
+
+
+async def get_current_user(db: AsyncSession = Depends(get_async_db), access_token: str = Cookie(None)) -> AuthenticatedUser:
     """
     Récupère l'utilisateur actuellement authentifié à partir du cookie JWT.
 
     Cette fonction est utilisée comme dépendance dans les endpoints protégés.
     Elle:
         - Vérifie la présence du token dans les cookies
-        - décode le JWT,
+        - renvoie directement l'utilisateur si le token est dans le cache (ni décodage, ni requête)
+        - sinon décode le JWT,
         - Extrait l'email de l'utilisateur
-        - récupère l'utilisateur en base de données.
+        - récupère l'utilisateur en base de données et le met en cache.
 
     Args:
-        db (Session): Session SQLAlchemy injectée via Depends(get_db)
+        db (AsyncSession): Session SQLAlchemy asynchrone injectée via Depends(get_async_db)
         access_token (str): Jeton JWT stocké dans un cookie access_token
 
     Returns:
-        User: L'objet utilisateur authentifié
+        AuthenticatedUser: Instantané de l'utilisateur authentifié
 
     Raises:
         HTTPException (401): Si le token est manquant, invalide expiré ou si l'utilisateur n'existe pas.
     """
     if not access_token:
         raise HTTPException(status_code=401, detail="Non authentifié")
+    cached = principal_cache.get(access_token)
+    if cached is not None:
+        return cached
     try:
         payload = jwt.decode(access_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
             raise HTTPException(status_code=401, detail="Token invalide")
-        user = get_user_by_email(db, email)
+        user = await get_user_by_email_async(db, email)
         if user is None:
             raise HTTPException(status_code = 401, detail = "Utilisateur introuvable")
-        return user
+        current_user = AuthenticatedUser.from_user(user)
+        principal_cache.put(access_token, payload, current_user)
+        return current_user
     except JWTError:
         raise HTTPException(status_code=401, detail="Token invalide ou expiré")
\ No newline at end of file
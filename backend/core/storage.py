@@ -0,0 +1,254 @@
+# Stockage des fichiers téléversés par contenu, avec comptage des références
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import BinaryIO, Iterable
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from core.upload import CHUNK_SIZE
+from models import StoredFile
+
+logger = logging.getLogger(__name__)
+
+# Dossier des fichiers téléversés
+UPLOAD_DIR = "uploads/"
+# Sous-dossiers des fichiers stockés par contenu et des fichiers en cours de réception
+OBJECTS_DIR = "objects"
+STAGING_DIR = "staging"
+# Extensions conservées sur les fichiers stockés (type de contenu servi), les autres sont ignorées
+_EXTENSION = re.compile(r"^\.[a-z0-9]{1,10}$")
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+
+
+@dataclass
+class StagedUpload:
+    """Fichier reçu et haché, pas encore rangé dans le stockage.
+
+    Attributs:
+        temporary_path (str): fichier temporaire contenant le téléversement
+        digest (str): empreinte sha256 du contenu
+        size (int): taille du contenu en octets
+        path (str): chemin définitif du fichier, déterminé par son contenu
+    """
+    temporary_path: str
+    digest: str
+    size: int
+    path: str
+
+
+def _extension(filename: str | None) -> str:
+    extension = os.path.splitext(filename or "")[1].lower()
+    return extension if _EXTENSION.match(extension) else ""
+
+
+def content_digest(path: str) -> str | None:
+    """Empreinte sha256 d'un fichier stocké par contenu, lue dans son nom.
+
+    Args:
+        path (str): chemin enregistré sur le projet
+
+    Returns:
+        str | None: empreinte du contenu, None pour un fichier enregistré avant le stockage par contenu
+    """
+    name = os.path.basename(path).split(".", 1)[0]
+    return name if _DIGEST.match(name) else None
+
+
+class BlobStore:
+    """Stockage des fichiers téléversés adressé par leur contenu.
+
+    Un fichier est haché (sha256) pendant sa réception puis rangé sous
+    objects/<2 premiers caractères>/<2 suivants>/<empreinte><extension> : deux utilisateurs
+    qui envoient un fichier du même nom ne s'écrasent plus, et un même corpus envoyé dans
+    plusieurs projets n'est stocké qu'une fois. Les fichiers dérivés du csv (stock de lignes)
+    sont rangés à côté et donc partagés eux aussi.
+
+    La table stored_files compte les projets qui référencent chaque fichier
+    (annotation_file_path et guidelines_file_path). Le compteur est modifié dans la
+    transaction du projet, ligne verrouillée : un fichier n'est supprimé qu'après le commit
+    qui retire sa dernière référence, et jamais pendant qu'une création de projet le
+    référence à nouveau.
+
+    Exemple d'utilisation:
+        staged = blob_store.stage(upload.file, upload.filename)
+        project.annotation_file_path = blob_store.acquire(db, staged)
+        db.commit()
+
+        if blob_store.release(db, path):
+            db.commit()
+            blob_store.delete_unreferenced(db, path)
+
+    Attributs:
+        uploads (int): nombre de fichiers rangés dans le stockage
+        deduplicated (int): nombre de fichiers déjà présents, non stockés une seconde fois
+        bytes_deduplicated (int): octets non stockés grâce à la déduplication
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self.uploads = 0
+        self.deduplicated = 0
+        self.bytes_deduplicated = 0
+
+    def path(self, digest: str, extension: str = "") -> str:
+        """Chemin d'un fichier stocké à partir de son empreinte."""
+        return os.path.join(self.directory, OBJECTS_DIR, digest[:2], digest[2:4], digest + extension)
+
+    def stage(self, source: BinaryIO, filename: str | None, prefix: bytes = b"") -> StagedUpload:
+        """Reçoit un fichier dans un fichier temporaire en calculant son empreinte au passage.
+
+        Args:
+            source (BinaryIO): flux du fichier téléversé
+            filename (str | None): nom d'origine, seule son extension est conservée
+            prefix (bytes, optional): octets déjà lus depuis source (échantillon). Defaults to b"".
+
+        Returns:
+            StagedUpload: fichier reçu, à passer à acquire ou discard
+        """
+        staging_directory = os.path.join(self.directory, STAGING_DIR)
+        os.makedirs(staging_directory, exist_ok=True)
+        temporary_path = os.path.join(staging_directory, uuid.uuid4().hex)
+        digest = hashlib.sha256(prefix)
+        size = len(prefix)
+        try:
+            with open(temporary_path, "wb") as file:
+                file.write(prefix)
+                while chunk := source.read(CHUNK_SIZE):
+                    digest.update(chunk)
+                    file.write(chunk)
+                    size += len(chunk)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+        hexdigest = digest.hexdigest()
+        return StagedUpload(temporary_path, hexdigest, size, self.path(hexdigest, _extension(filename)))
+
+    def acquire(self, db: Session, staged: StagedUpload) -> str:
+        """Ajoute une référence au fichier et le range dans le stockage s'il n'y est pas déjà.
+
+        Le compteur est incrémenté avant de ranger le fichier : la ligne reste verrouillée
+        jusqu'au commit, une suppression concurrente de la dernière référence attend.
+        Aucun commit n'est fait : la référence est validée avec le projet.
+
+        Args:
+            db (Session): session sqlalchemy
+            staged (StagedUpload): fichier reçu par stage
+
+        Returns:
+            str: chemin du fichier stocké, à enregistrer sur le projet
+        """
+        dialect_insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+        statement = dialect_insert(StoredFile).values(
+            path=staged.path, sha256=staged.digest, size=staged.size, refcount=1
+        )
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[StoredFile.path],
+            set_={"refcount": StoredFile.refcount + 1}
+        ))
+
+        os.makedirs(os.path.dirname(staged.path), exist_ok=True)
+        deduplicated = os.path.exists(staged.path)
+        if deduplicated:
+            os.remove(staged.temporary_path)
+        else:
+            os.replace(staged.temporary_path, staged.path)
+        with self._lock:
+            self.uploads += 1
+            if deduplicated:
+                self.deduplicated += 1
+                self.bytes_deduplicated += staged.size
+        return staged.path
+
+    @staticmethod
+    def discard(staged: StagedUpload) -> None:
+        """Supprime le fichier temporaire d'un téléversement abandonné."""
+        if os.path.exists(staged.temporary_path):
+            os.remove(staged.temporary_path)
+
+    @staticmethod
+    def release(db: Session, path: str) -> bool:
+        """Retire une référence à un fichier.
+
+        Si c'était la dernière, la ligne de stored_files est supprimée : après le commit,
+        l'appelant supprime le fichier (et ses fichiers dérivés) avec delete_unreferenced.
+        Si la transaction est annulée, la référence et le fichier restent intacts.
+        Les fichiers enregistrés avant le stockage par contenu n'ont pas de ligne : ils
+        n'appartiennent qu'à leur projet.
+
+        Args:
+            db (Session): session sqlalchemy
+            path (str): chemin enregistré sur le projet
+
+        Returns:
+            bool: True si le fichier n'est plus référencé et doit être supprimé après le commit
+        """
+        stored = db.execute(
+            select(StoredFile).where(StoredFile.path == path).with_for_update()
+        ).scalar_one_or_none()
+        if stored is None:
+            return True
+        stored.refcount -= 1
+        if stored.refcount > 0:
+            return False
+        db.delete(stored)
+        return True
+
+    @staticmethod
+    def delete_unreferenced(db: Session, path: str, derived_paths: Iterable[str] = ()) -> bool:
+        """Supprime un fichier dont la dernière référence a été retirée par release, après le commit.
+
+        Une ligne de stored_files sans référence est insérée pendant la suppression : une
+        création de projet qui référence à nouveau le même contenu attend le commit de cette
+        transaction, puis range son propre fichier. Si une création l'a déjà référencé entre
+        temps, le fichier est conservé. Les erreurs de suppression sont journalisées, la
+        transaction de l'appelant étant déjà validée.
+
+        Args:
+            db (Session): session sqlalchemy, sans transaction en cours. Un commit est fait
+            path (str): chemin du fichier libéré par release
+            derived_paths (Iterable[str], optional): fichiers dérivés à supprimer avec lui. Defaults to ().
+
+        Returns:
+            bool: True si le fichier a été supprimé, False s'il est de nouveau référencé
+        """
+        dialect_insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+        claimed = db.execute(
+            dialect_insert(StoredFile)
+            .values(path=path, sha256=content_digest(path) or "", size=0, refcount=0)
+            .on_conflict_do_nothing(index_elements=[StoredFile.path])
+        ).rowcount
+        if not claimed:
+            db.rollback()
+            return False
+        try:
+            for file_path in (path, *derived_paths):
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+        except OSError:
+            logger.exception("Impossible de supprimer le fichier %s", path)
+        finally:
+            db.execute(delete(StoredFile).where(StoredFile.path == path))
+            db.commit()
+        return True
+
+    def stats(self) -> dict:
+        """Compteurs de déduplication du processus."""
+        with self._lock:
+            return {
+                "uploads": self.uploads,
+                "deduplicated": self.deduplicated,
+                "bytes_deduplicated": self.bytes_deduplicated
+            }
+
+
+# Stockage des fichiers téléversés, partagé par les workers du serveur (même dossier)
+blob_store = BlobStore(UPLOAD_DIR)
@@ -0,0 +1,104 @@
+# Lecture en flux des fichiers CSV téléversés
+
+import csv
+import io
+from typing import BinaryIO, Iterator
+
+# Taille de l'échantillon utilisé pour détecter l'encodage (en octets)
+SAMPLE_SIZE = 64 * 1024
+# Taille des blocs lus depuis le fichier téléversé (en octets)
+CHUNK_SIZE = 1024 * 1024
+# Nombre de lignes de l'échantillon analysées pour détecter le séparateur
+SNIFF_LINES = 20
+# Séparateurs acceptés lors de la détection du dialecte csv
+SNIFF_DELIMITERS = ",;\t|"
+
+
+def read_sample(source: BinaryIO, size: int = SAMPLE_SIZE) -> bytes:
+    """Lit le début du fichier téléversé, utilisé pour détecter l'encodage.
+
+    Args:
+        source (BinaryIO): flux binaire du fichier téléversé
+        size (int, optional): taille maximale de l'échantillon. Defaults to SAMPLE_SIZE.
+
+    Returns:
+        bytes: les premiers octets du fichier
+    """
+    return source.read(size)
+
+
+def detect_encoding(sample: bytes) -> str | None:
+    """Détecte l'encodage d'un fichier à partir d'un échantillon borné.
+
+    Args:
+        sample (bytes): début du fichier
+
+    Returns:
+        str | None: nom de l'encodage détecté, None si la détection échoue
+    """
+    # import différé : charset_normalizer n'est utile qu'à la création d'un projet
+    from charset_normalizer import from_bytes
+
+    result = from_bytes(sample).best()
+    if result is None:
+        return None
+    # utf_8_sig retire le BOM qui serait sinon collé au premier header
+    if result.encoding == "utf_8" and result.bom:
+        return "utf_8_sig"
+    return result.encoding
+
+
+def sniff_dialect(sample: bytes, encoding: str) -> tuple[str, str]:
+    """Détecte le séparateur et le caractère de citation du csv à partir de l'échantillon.
+
+    Seules les premières lignes complètes de l'échantillon sont analysées par csv.Sniffer.
+    Si la détection échoue, le dialecte csv standard est utilisé (",", '"').
+
+    Args:
+        sample (bytes): début du fichier
+        encoding (str): encodage détecté avec detect_encoding
+
+    Returns:
+        tuple[str, str]: séparateur et caractère de citation
+    """
+    text = sample.decode(encoding, errors="ignore")
+    lines = text.splitlines(keepends=True)
+    # la dernière ligne de l'échantillon est probablement tronquée
+    if len(lines) > 1:
+        lines = lines[:-1]
+    try:
+        dialect = csv.Sniffer().sniff("".join(lines[:SNIFF_LINES]), delimiters=SNIFF_DELIMITERS)
+    except csv.Error:
+        return ",", '"'
+    return dialect.delimiter, dialect.quotechar or '"'
+
+
+def read_csv_rows(
+    source: BinaryIO,
+    encoding: str,
+    delimiter: str = ",",
+    quotechar: str = '"',
+    chunk_size: int = CHUNK_SIZE
+) -> Iterator[list[str]]:
+    """Parse un fichier CSV ligne par ligne.
+
+    Le fichier n'est jamais chargé entièrement en mémoire : il est lu par blocs de
+    chunk_size octets, décodé de manière incrémentale puis parsé par csv.reader.
+    Les champs entre guillemets sur plusieurs lignes sont donc correctement gérés.
+
+    Args:
+        source (BinaryIO): flux binaire du fichier, positionné au début
+        encoding (str): encodage détecté avec detect_encoding
+        delimiter (str, optional): séparateur détecté avec sniff_dialect. Defaults to ",".
+        quotechar (str, optional): caractère de citation détecté avec sniff_dialect. Defaults to '"'.
+        chunk_size (int, optional): taille des blocs lus. Defaults to CHUNK_SIZE.
+
+    Yields:
+        list[str]: les lignes du csv, header compris
+    """
+    raw = io.BufferedReader(source, buffer_size=chunk_size) if isinstance(source, io.RawIOBase) else source
+    text = io.TextIOWrapper(raw, encoding=encoding, errors="replace", newline="")
+    try:
+        yield from csv.reader(text, delimiter=delimiter, quotechar=quotechar)
+    finally:
+        text.detach()
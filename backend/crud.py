@@ -1,7 +1,12 @@
 # Définir les fonctions de requêtes en db
 
+from datetime import datetime, time
+
+from sqlalchemy import select, func, or_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from models import User, Project
+from models import User, Project, Annotation, AnnotationDailyCount, AnnotationCountDelta, ProjectMember
+from core.counters import project_progress
 
 def get_user_by_email(db: Session, email: str):
     """
@@ -21,6 +26,20 @@ def get_user_by_email(db: Session, email: str):
     """
     return db.query(User).filter(User.email == email).first()
 
+async def get_user_by_email_async(db: AsyncSession, email: str):
+    """
+    Équivalent asynchrone de get_user_by_email.
+
+    Args:
+        db (AsyncSession): la session SQLAlchemy asynchrone active.
+        email (str) : L'adresse email de l'utilisateur à rechercher.
+
+    Returns:
+        User | None : L'object User correspondant si trouvé, sinon None.
+    """
+    result = await db.execute(select(User).where(User.email == email).limit(1))
+    return result.scalars().first()
+
 def get_projects_by_user(db: Session, user_id: int):
     """
     Récupère tous les projets associés à un utilisateur donné.
@@ -38,4 +57,158 @@ def get_projects_by_user(db: Session, user_id: int):
         for project in projects:
             print(project.name)
     """
-    return db.query(Project).filter(Project.user_id == user_id).all()
\ No newline at end of file
+    return db.query(Project).filter(Project.user_id == user_id).all()
+
+async def get_projects_by_user_async(db: AsyncSession, user_id: int):
+    """
+    Équivalent asynchrone de get_projects_by_user.
+
+    Args:
+        db (AsyncSession): La session SQLAlchemy asynchrone active.
+        user_id (int): L'identifiant unique de l'utilisateur.
+
+    Returns:
+        list[Project]: Une liste d'object [Project] liés à cet utilisateur.
+    """
+    result = await db.execute(select(Project).where(Project.user_id == user_id))
+    return result.scalars().all()
+
+async def get_user_project_async(db: AsyncSession, project_id: int, user_id: int):
+    """
+    Récupère un projet s'il appartient à l'utilisateur donné.
+
+    Args:
+        db (AsyncSession): La session SQLAlchemy asynchrone active.
+        project_id (int): L'identifiant du projet.
+        user_id (int): L'identifiant de l'utilisateur propriétaire.
+
+    Returns:
+        Project | None: Le projet s'il existe et appartient à l'utilisateur, sinon None.
+    """
+    result = await db.execute(
+        select(Project).where(Project.id == project_id, Project.user_id == user_id).limit(1)
+    )
+    return result.scalars().first()
+
+def annotator_access(user_id: int):
+    """Condition SQL : le projet appartient à l'utilisateur ou l'utilisateur en est membre."""
+    return or_(
+        Project.user_id == user_id,
+        Project.id.in_(select(ProjectMember.project_id).where(ProjectMember.user_id == user_id))
+    )
+
+def get_annotator_project(db: Session, project_id: int, user_id: int):
+    """
+    Récupère un projet si l'utilisateur peut l'annoter : propriétaire ou membre du projet.
+
+    Args:
+        db (Session): La session SQLAlchemy active.
+        project_id (int): L'identifiant du projet.
+        user_id (int): L'identifiant de l'utilisateur.
+
+    Returns:
+        Project | None: Le projet si l'utilisateur peut l'annoter, sinon None.
+    """
+    return db.query(Project).filter(Project.id == project_id, annotator_access(user_id)).first()
+
+async def get_annotator_project_async(db: AsyncSession, project_id: int, user_id: int):
+    """
+    Équivalent asynchrone de get_annotator_project.
+
+    Args:
+        db (AsyncSession): La session SQLAlchemy asynchrone active.
+        project_id (int): L'identifiant du projet.
+        user_id (int): L'identifiant de l'utilisateur.
+
+    Returns:
+        Project | None: Le projet si l'utilisateur peut l'annoter, sinon None.
+    """
+    result = await db.execute(
+        select(Project).where(Project.id == project_id, annotator_access(user_id)).limit(1)
+    )
+    return result.scalars().first()
+
+def get_project_statistics(db: Session, project_id: int) -> dict:
+    """
+    Calcule les statistiques d'un projet directement en base de données,
+    sans charger les annotations.
+
+    Le nombre de lignes et de lignes annotées sont lus dans les compteurs du projet
+    (project_progress, compteurs en attente des annotateurs compris). Le nombre d'annotations
+    par jour et le premier jour d'annotation sont lus dans la table annotation_daily_counts,
+    compteurs en attente compris. Seule la répartition par catégorie parcourt les annotations,
+    par une requête agrégée groupée par catégorie.
+
+    Args:
+        db (Session): La session SQLAlchemy active.
+        project_id (int): L'identifiant du projet.
+
+    Returns:
+        dict: total (int), done (int), first_date (datetime | None, minuit du premier jour annoté),
+            category_counts (dict[str, int], les lignes non annotées ne sont pas comptées)
+            et daily_counts (dict[str, int], nombre d'annotations par jour au format AAAA-MM-JJ).
+
+    Exemple d'utilisation:
+        stats = get_project_statistics(db, project_id=1)
+        print(stats["done"], "/", stats["total"])
+    """
+    total, done = db.execute(
+        project_progress(Project.total_rows, Project.annotated_rows).where(Project.id == project_id)
+    ).one()
+
+    category_counts = dict(db.execute(
+        select(Annotation.content, func.count())
+        .where(Annotation.project_id == project_id, Annotation.content.is_not(None))
+        .group_by(Annotation.content)
+    ).all())
+
+    # annotations par jour : table de cumul journalier, sans parcourir les annotations
+    # (un jour peut y être à 0 après une reconstruction, voir core/counters.py)
+    daily_counts = {
+        count.day: count.annotations
+        for count in db.execute(_daily_counts_statement(project_id))
+        if count.annotations
+    }
+    first_day = min(daily_counts, default=None)
+
+    return {
+        "total": total,
+        "done": done,
+        "first_date": datetime.combine(first_day, time.min) if first_day else None,
+        "category_counts": category_counts,
+        "daily_counts": {str(day): annotations for day, annotations in daily_counts.items()}
+    }
+
+def _daily_counts_statement(project_id: int):
+    """Requête du nombre d'annotations et de nouvelles lignes par jour d'un projet : cumul
+    journalier et compteurs des annotateurs pas encore reportés (voir core/counters.py)."""
+    counts = union_all(
+        select(AnnotationDailyCount.day, AnnotationDailyCount.annotations, AnnotationDailyCount.new_rows)
+        .where(AnnotationDailyCount.project_id == project_id),
+        select(AnnotationCountDelta.day, AnnotationCountDelta.annotations, AnnotationCountDelta.new_rows)
+        .where(AnnotationCountDelta.project_id == project_id)
+    ).subquery()
+    return (
+        select(
+            counts.c.day,
+            func.sum(counts.c.annotations).label("annotations"),
+            func.sum(counts.c.new_rows).label("new_rows")
+        )
+        .group_by(counts.c.day)
+        .order_by(counts.c.day)
+    )
+
+async def get_daily_counts_async(db: AsyncSession, project_id: int):
+    """
+    Récupère le nombre d'annotations par jour d'un projet, par ordre chronologique,
+    compteurs en attente des annotateurs compris.
+
+    Args:
+        db (AsyncSession): La session SQLAlchemy asynchrone active.
+        project_id (int): L'identifiant du projet.
+
+    Returns:
+        list[Row]: Un compteur par jour ayant reçu au moins une annotation (day, annotations, new_rows).
+    """
+    result = await db.execute(_daily_counts_statement(project_id))
+    return result.all()
@@ -1,11 +1,23 @@
 # Connexion à PostgreSQL
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 from core.config import settings
+from core.pool import pool_options, instrument_engine
+from core.metrics import instrument_queries
+
+# Pilotes asynchrones utilisés pour dériver l'url asynchrone de DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
 
 # Création du moteur de base de données SQLAlchemy
-engine = create_engine(settings.DATABASE_URL)
+# La taille du pool est répartie entre les workers (voir core/pool.py)
+engine = create_engine(settings.DATABASE_URL, **pool_options(settings.DATABASE_URL, "sync"))
+instrument_engine(engine, "sync")
+instrument_queries(engine)
 
 # Session locale utilisée pour interagir avec la base de données
 # autocommit : False, les transactions doivent être validées manuellement avec commit
@@ -13,6 +25,34 @@ engine = create_engine(settings.DATABASE_URL)
 # bind: engine, attache cette session au moteur défini ci-dessus
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def async_database_url(url: str) -> str:
+    """
+    Convertit une url de base de données synchrone vers son équivalent asynchrone.
+
+    Exemple : postgresql+psycopg2://user:password@db:5432/db_name
+    devient postgresql+asyncpg://user:password@db:5432/db_name
+
+    Args:
+        url (str): url SQLAlchemy synchrone (DATABASE_URL)
+
+    Returns:
+        str: url SQLAlchemy utilisant le pilote asynchrone correspondant
+    """
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+# Moteur asynchrone (asyncpg sous PostgreSQL), utilisé par les endpoints async
+# Il ne bloque pas la boucle d'évènements pendant les requêtes SQL
+ASYNC_URL = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(ASYNC_URL, **pool_options(ASYNC_URL, "async", asynchronous=True))
+instrument_engine(async_engine.sync_engine, "async")
+instrument_queries(async_engine.sync_engine)
+
+# Session asynchrone, même configuration que SessionLocal
+# expire_on_commit: False, les objets restent lisibles après commit sans nouvelle requête
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 # Classe de base pour la définition des modèles ORM
 # Tous les modèles SQLAlchemy doivent hériter de Base
 Base = declarative_base()
@@ -41,4 +81,28 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    """
+    Dépendance FastAPI permettant d'obtenir une session de base de données asynchrone
+
+    Équivalent asynchrone de get_db, à utiliser dans les endpoints déclarés avec async def.
+    La session est fermée automatiquement à la fin de la requête, même en cas d'erreur.
+
+    Exemple d'utilisation dans un endpoint:
+    from fastapi import Depends
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from database import get_async_db
+
+    @app.get("/users")
+    async def get_users(db: AsyncSession = Depends(get_async_db)):
+        result = await db.execute(select(User))
+        return result.scalars().all()
+
+    Yields:
+        AsyncSession: une session SQLAlchemy asynchrone active.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
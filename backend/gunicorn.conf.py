@@ -0,0 +1,78 @@
+# Lanceur de production : gunicorn avec des workers uvicorn préchargés
+#
+# Utilisation (depuis le dossier backend) :
+#   gunicorn -c gunicorn.conf.py
+#
+# L'application est chargée une seule fois par le processus maître (preload_app) puis
+# partagée par les workers créés par fork. Le maître exécute les tâches de démarrage
+# (schéma, imports interrompus) avant de créer les workers, qui ne les refont pas.
+# SIGTERM arrête les workers proprement : les requêtes en cours ont graceful_timeout
+# secondes pour se terminer, puis le lifespan ferme les pools et les exécuteurs. Les flux
+# SSE (GET /dashboard/events) ne se terminent pas d'eux-mêmes : ils sont coupés à la fin
+# de ce délai et le navigateur se reconnecte à un autre worker.
+
+import gc
+import os
+
+
+def _cpu_count() -> int:
+    """Nombre de cœurs utilisables par le processus (limites du conteneur comprises)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# Un worker asynchrone par cœur, sauf si WEB_CONCURRENCY est défini
+workers = int(os.environ.get("WEB_CONCURRENCY", _cpu_count()))
+# Le budget de connexions DB_MAX_CONNECTIONS est réparti entre ces workers (core/pool.py) :
+# la variable est fixée avant le chargement de la configuration de l'application
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+wsgi_app = "main:create_app(run_startup_tasks=False)"
+worker_class = "uvicorn_worker.UvicornWorker"
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+preload_app = True
+# Délai laissé aux requêtes et aux imports en cours après SIGTERM
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", 30))
+# Un worker qui ne répond plus au maître pendant ce délai est redémarré
+timeout = int(os.environ.get("WORKER_TIMEOUT", 60))
+keepalive = 5
+accesslog = "-"
+
+
+def when_ready(server):
+    """Processus maître, application chargée, avant la création des workers."""
+    from core.config import settings
+    from core.security import password_context
+    from database import engine
+    from main import run_startup_tasks
+
+    if settings.RUN_STARTUP_TASKS:
+        run_startup_tasks()
+    # les connexions ouvertes par le maître ne doivent pas être héritées par les workers
+    engine.dispose()
+
+    # modules importés à la demande, chargés ici pour que leur mémoire soit partagée par les workers
+    import charset_normalizer  # noqa: F401
+    password_context()
+
+    # les objets chargés par le maître ne sont plus parcourus par le ramasse-miettes :
+    # leurs pages mémoire restent partagées au lieu d'être recopiées dans chaque worker
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Worker créé : les pools hérités du maître sont remplacés sans fermer ses connexions."""
+    from database import engine, async_engine
+
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    """Worker arrêté : ses métriques Prometheus multi-processus ne sont plus exposées."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,56 +1,144 @@
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
 
-from database import engine
+from core.config import settings
+from database import engine, async_engine, SessionLocal
+from core.metrics import MetricsMiddleware
 from models import Base
-from api import auth, users, dashboard, annotations
+from api import auth, users, dashboard, annotations, work_queue, internal
+from core.storage import UPLOAD_DIR
+from core.hashing import password_hasher
+from core.jobs import ingestion_jobs, fail_interrupted_ingestions
+from core.events import project_events
+from core.counters import counter_folder
+from core.migrations import migrate_schema, backfill
+
+
+def run_startup_tasks() -> None:
+    """Tâches à exécuter une seule fois au démarrage du serveur, avant d'accepter des requêtes.
+        - créer les tables manquantes
+        - ajouter aux tables existantes les colonnes et index manquants, compléter leurs données
+          (voir core/migrations.py)
+        - marquer failed les imports interrompus par l'arrêt précédent du serveur
+
+    Appelée par le lifespan de l'application, ou par le processus maître de gunicorn.conf.py
+    avant la création des workers.
+    """
+    Base.metadata.create_all(bind=engine)
+    added = migrate_schema(engine)
+    with SessionLocal() as db:
+        backfill(db, added)
+        fail_interrupted_ingestions(db)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Démarrage et arrêt d'un worker.
+        - démarrage : dossier des fichiers téléversés, tâches de démarrage si demandé,
+        première connexion du pool (une base injoignable fait échouer le démarrage),
+        diffusion des évènements de projet (écoute LISTEN sous PostgreSQL), report périodique des compteurs
+        - arrêt (SIGTERM, après les requêtes en cours) : imports et hachages en cours terminés,
+        derniers compteurs reportés, écoute des évènements arrêtée, connexions des pools fermées
+    """
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    if app.state.run_startup_tasks:
+        await run_in_threadpool(run_startup_tasks)
+    async with async_engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+    listen_dsn = None
+    if project_events.notify and async_engine.dialect.name == "postgresql":
+        listen_dsn = async_engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+    await project_events.start(listen_dsn)
+    await counter_folder.start()
+
+    yield
+
+    await run_in_threadpool(ingestion_jobs.shutdown)
+    await run_in_threadpool(password_hasher.shutdown)
+    await counter_folder.stop()
+    await project_events.stop()
+    await async_engine.dispose()
+    engine.dispose()
+
 
-from fastapi.staticfiles import StaticFiles
+def create_app(run_startup_tasks: bool | None = None) -> FastAPI:
+    """Crée l'application FastAPI : middlewares, routers et lifespan.
 
-Base.metadata.create_all(bind=engine)
+    L'import du module ne se connecte pas à la base de données : le schéma est créé
+    au démarrage (lifespan), ou une seule fois par le processus maître de gunicorn.
 
-app = FastAPI()
+    Args:
+        run_startup_tasks (bool | None, optional): exécuter run_startup_tasks au démarrage.
+            Defaults to None (valeur de RUN_STARTUP_TASKS).
 
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+    Returns:
+        FastAPI: l'application
 
-# Middleware pour les headers de sécurité
-@app.middleware("http")
-async def add_security_headers(request, call_next):
-    response = await call_next(request)
+    Exemple d'utilisation:
+        uvicorn main:app --reload
+        gunicorn -c gunicorn.conf.py "main:create_app(run_startup_tasks=False)"
+    """
+    app = FastAPI(lifespan=lifespan)
+    app.state.run_startup_tasks = settings.RUN_STARTUP_TASKS if run_startup_tasks is None else run_startup_tasks
 
-    # Content Security Policy (CSP)
-    response.headers["Content-Security-Policy"] = (
-        "default-src 'self'; "
-        "script-src 'self' 'unsafe-inline' 'unsafe-eval' http://localhost:3000 https://cdn.jsdelivr.net; "
-        "style-src 'self' 'unsafe-inline' http://localhost:3000 https://cdn.jsdelivr.net; "
-        "img-src 'self' data:; "
-        "connect-src 'self' http://localhost:3000 http://localhost:8000 ws://localhost:3000; "
-        "font-src 'self' data: https://cdn.jsdelivr.net; "
-        "frame-src 'self' http://localhost:3000;"
+    # les fichiers téléversés ne sont pas publics : les guidelines sont servies par
+    # GET /annotations/{project_id}/guidelines, au seul propriétaire du projet
+
+    # Middleware pour les headers de sécurité
+    @app.middleware("http")
+    async def add_security_headers(request, call_next):
+        response = await call_next(request)
+
+        # Content Security Policy (CSP)
+        response.headers["Content-Security-Policy"] = (
+            "default-src 'self'; "
+            "script-src 'self' 'unsafe-inline' 'unsafe-eval' http://localhost:3000 https://cdn.jsdelivr.net; "
+            "style-src 'self' 'unsafe-inline' http://localhost:3000 https://cdn.jsdelivr.net; "
+            "img-src 'self' data:; "
+            "connect-src 'self' http://localhost:3000 http://localhost:8000 ws://localhost:3000; "
+            "font-src 'self' data: https://cdn.jsdelivr.net; "
+            "frame-src 'self' http://localhost:3000;"
+        )
+
+        # Autres headers de sécurité
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        #response.headers["X-Frame-Options"] = "DENY"
+        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
+
+        return response
+
+    # Configuration CORS pour le frontend local
+    origins = [
+        "http://localhost:3000",
+        "http://10.0.2.2:3000"
+    ]
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,  # autorise le frontend React
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
     )
 
-    # Autres headers de sécurité
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    #response.headers["X-Frame-Options"] = "DENY"
-    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-    response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
-
-    return response
-
-# Configuration CORS pour le frontend local
-origins = [
-    "http://localhost:3000",
-    "http://10.0.2.2:3000"
-]
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,  # autorise le frontend React
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-app.include_router(auth.router)
-app.include_router(users.router)
-app.include_router(dashboard.router)
-app.include_router(annotations.router)
\ No newline at end of file
+    # Mesure des requêtes (durée, taille, requêtes SQL), ajouté en dernier pour englober les autres middlewares
+    app.add_middleware(MetricsMiddleware)
+
+    app.include_router(auth.router)
+    app.include_router(users.router)
+    app.include_router(dashboard.router)
+    app.include_router(annotations.router)
+    app.include_router(work_queue.router)
+    app.include_router(internal.router)
+    app.include_router(internal.metrics_router)
+
+    return app
+
+
+# Application utilisée par uvicorn (main:app), par exemple en développement avec --reload
+app = create_app()
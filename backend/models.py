@@ -1,7 +1,8 @@
 # Définir les modèles pour SQLAlchemy
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Date, TIMESTAMP, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Text, Date, TIMESTAMP, JSON, Index, DDL, event
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import text
 from database import Base
 
 
@@ -18,6 +19,7 @@ class User(Base):
         lock_until (datetime | None) : date et heure jusqu'à laquelle le compte est vérouillé après trop de tentatives de connexion
         failed_attempts (int) : nombre de tentatives de connexion échouée. Defaults 0
         projects (list[Project]) ; relation vers les projets créés par l'utilisateur
+        memberships (list[ProjectMember]) : relation vers les projets d'autres utilisateurs que l'utilisateur annote
     """   
 
     __tablename__="users"
@@ -32,6 +34,7 @@ class User(Base):
     failed_attempts = Column(Integer, default=0, nullable = True)
 
     projects = relationship("Project", back_populates="user")
+    memberships = relationship("ProjectMember", back_populates="user", cascade="all, delete-orphan")
 
 
 class Project(Base):
@@ -42,32 +45,54 @@ class Project(Base):
         user_id (int) : clé vers l'utilisateur propriétaire du projet. Supprime automatiquement les projets si l'utilisateur est supprimé (CASCADE)
         project_name (str) : nom du projet (obligatoire)
         due_date (date) : date limite pour la réalisation du projet (obligatoire)
-        annotation_file_path (str) : chemin vers le fichier csv d'annotation (obligatoire)
-        guidelines_file_path (str) : chemin vers le fichier pdf de guidelines
+        annotation_file_path (str) : chemin vers le fichier csv d'annotation (obligatoire), stocké par contenu et partagé entre projets (voir core/storage.py)
+        guidelines_file_path (str | None) : chemin vers le fichier pdf de guidelines (facultatif), stocké par contenu
         notes (str | None) : notes libres associées au projet
         created_at (datetime) : date et heure de création du projet (valeur par défaut, timestamp courant)
-        status (str): status du projet, par défaut "pending", peut évoluer vers completed
+        status (str): status du projet, "ingesting" pendant l'import du csv puis "pending", peut évoluer vers completed ("failed" si l'import échoue)
         categories (list[str]) : liste des catégories d'annotations par jour calculée après la complétion du projet
+        source_encoding (str | None) : encodage du csv d'origine, détecté une seule fois à l'ingestion
+        csv_delimiter (str | None) : séparateur du csv d'origine, détecté à l'ingestion
+        csv_quotechar (str | None) : caractère de citation du csv d'origine, détecté à l'ingestion
+        csv_fields (list[str] | None) : header du csv d'origine
+        total_rows (int) : nombre de lignes à annoter, fixé à l'ingestion du csv
+        annotated_rows (int) : nombre de lignes annotées, hors compteurs en attente dans annotation_count_deltas (voir core/counters.py)
+        annotation_version (int) : version des annotations, augmentée de chaque soumission (clé du cache des exports), hors compteurs en attente
+        ingestion (dict | None) : progression de l'import du csv (lignes, octets lus, erreur), voir core/jobs.py
         user (User) : relation ORM vers l'utilisateur propriétaire du projet
         annotations (list[Annotation]) : relation ORM vers les annotations associées au projet. Les annotations sont supprimés automatiquement si le projet est supprimé
+        daily_counts (list[AnnotationDailyCount]) : relation ORM vers le nombre d'annotations par jour du projet, supprimé avec le projet
+        count_deltas (list[AnnotationCountDelta]) : relation ORM vers les compteurs des annotateurs pas encore reportés sur le projet, supprimés avec le projet
+        members (list[ProjectMember]) : relation ORM vers les annotateurs invités sur le projet, supprimés avec le projet
     """    
 
     __tablename__ = "projects" # Nom de la table correspondate
 
     id = Column(Integer, primary_key=True, index=True) # Colonne clé primaire (identifiant unique) et création d'index pour accélérer les recherches sur cette colonne
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE")) # ForeignKey : relie cette colonne à la colonne id de la table users, supprime automatiquement les projets si l'utilisateur est supprimé
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True) # ForeignKey : relie cette colonne à la colonne id de la table users, supprime automatiquement les projets si l'utilisateur est supprimé
     project_name = Column(Text, nullable=False)
     due_date = Column(Date, nullable=False)
     annotation_file_path = Column(Text, nullable = False)
-    guidelines_file_path = Column(Text, nullable = False)
+    guidelines_file_path = Column(Text, nullable = True)
     notes = Column(Text, nullable = True)
-    created_at = Column(TIMESTAMP, server_default = "CURRENT_TIMESTAMP")
+    created_at = Column(TIMESTAMP, server_default = text("CURRENT_TIMESTAMP"))
     status = Column(String, default="pending")
     categories = Column(JSON, nullable=False)
     mean_annotations = Column(Integer, nullable=True)
+    source_encoding = Column(String, nullable=True)
+    csv_delimiter = Column(String(1), nullable=True)
+    csv_quotechar = Column(String(1), nullable=True)
+    csv_fields = Column(JSON, nullable=True)
+    total_rows = Column(Integer, nullable=False, default=0, server_default="0")
+    annotated_rows = Column(Integer, nullable=False, default=0, server_default="0")
+    annotation_version = Column(Integer, nullable=False, default=0, server_default="0")
+    ingestion = Column(JSON, nullable=True)
 
     user = relationship("User", back_populates="projects") # Crée une relation ORM entre le projet et l'utilisateur
     annotations = relationship("Annotation", back_populates="project", cascade="all, delete-orphan")
+    daily_counts = relationship("AnnotationDailyCount", back_populates="project", cascade="all, delete-orphan")
+    count_deltas = relationship("AnnotationCountDelta", back_populates="project", cascade="all, delete-orphan")
+    members = relationship("ProjectMember", back_populates="project", cascade="all, delete-orphan")
 
 
 class Annotation(Base):
@@ -81,15 +106,173 @@ class Annotation(Base):
         project_id (int) : clé étrangère vers le projet auquel l'annotation appartient. Supprimé automatiquement l'annotation si le projet est supprimé
         content (str | None) : supprime automatiquement l'annotation si le projet est supprimé
         date (datetime | None) : date et heure de validation de l'annotation
+        annotator_id (int | None) : utilisateur qui a soumis la dernière annotation de la ligne
+        leased_by (int | None) : annotateur à qui la ligne est attribuée (bail), voir core/leases.py
+        lease_expires_at (datetime | None) : fin du bail, la ligne peut être attribuée à un autre annotateur ensuite
         project (Project) : relation ORM vers le projet auquel appartient l'annotation
     """    
     
     __tablename__ = "annotations"
+    __table_args__ = (
+        # pagination par clé (project_id, row_id) pour le flux d'annotation
+        Index("ix_annotations_project_row", "project_id", "row_id"),
+        # accès direct aux lignes non annotées d'un projet (index partiel)
+        Index(
+            "ix_annotations_project_row_unannotated", "project_id", "row_id",
+            postgresql_where=text("content IS NULL"),
+            sqlite_where=text("content IS NULL")
+        ),
+        # filtre des lignes par catégorie (recherche, voir core/search.py)
+        Index("ix_annotations_project_content_row", "project_id", "content", "row_id"),
+        # baux en cours d'un annotateur (index partiel : les baux sont effacés à la soumission)
+        Index(
+            "ix_annotations_project_leased_by", "project_id", "leased_by",
+            postgresql_where=text("leased_by IS NOT NULL"),
+            sqlite_where=text("leased_by IS NOT NULL")
+        ),
+        # lignes annotées par chaque annotateur
+        Index("ix_annotations_project_annotator", "project_id", "annotator_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     row_id = Column(Integer, nullable=False)
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
     content = Column(String, nullable=True)
     date = Column(DateTime, nullable=True)
+    annotator_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    leased_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
 
-    project = relationship("Project", back_populates="annotations")
\ No newline at end of file
+    project = relationship("Project", back_populates="annotations")
+
+
+class ProjectMember(Base):
+    """Modèle représentant un annotateur invité sur le projet d'un autre utilisateur.
+    Les membres annotent le projet en se partageant ses lignes par baux (voir core/leases.py),
+    seul le propriétaire gère le projet (membres, export, suppression).
+
+    Attributs:
+        project_id (int) : clé étrangère vers le projet (clé primaire avec user_id). Supprimé automatiquement si le projet est supprimé
+        user_id (int) : clé étrangère vers l'annotateur. Supprimé automatiquement si l'utilisateur est supprimé
+        created_at (datetime) : date et heure de l'invitation
+        project (Project) : relation ORM vers le projet
+        user (User) : relation ORM vers l'annotateur
+    """
+
+    __tablename__ = "project_members"
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, index=True)
+    created_at = Column(TIMESTAMP, server_default=text("CURRENT_TIMESTAMP"))
+
+    project = relationship("Project", back_populates="members")
+    user = relationship("User", back_populates="memberships")
+
+
+class AnnotationDailyCount(Base):
+    """Modèle représentant le nombre d'annotations soumises par jour dans un projet.
+    Chaque soumission incrémente la ligne du jour (upsert), voir core/counters.py :
+    le rythme d'annotation d'un projet se lit sans parcourir la table annotations.
+
+    Attributs:
+        project_id (int) : clé étrangère vers le projet (clé primaire avec day). Supprimé automatiquement si le projet est supprimé
+        day (date) : jour des annotations (date de validation envoyée par le front)
+        annotations (int) : nombre d'annotations soumises ce jour-là, y compris les modifications
+        new_rows (int) : nombre de lignes annotées pour la première fois ce jour-là (progression du projet)
+        project (Project) : relation ORM vers le projet
+    """
+
+    __tablename__ = "annotation_daily_counts"
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    annotations = Column(Integer, nullable=False, default=0, server_default="0")
+    new_rows = Column(Integer, nullable=False, default=0, server_default="0")
+
+    project = relationship("Project", back_populates="daily_counts")
+
+
+class AnnotationCountDelta(Base):
+    """Modèle représentant les compteurs d'un annotateur sur un projet pour un jour, pas encore reportés.
+    Chaque soumission incrémente la ligne de son annotateur (upsert), voir core/counters.py : des
+    annotateurs simultanés ne modifient jamais la même ligne. Les lignes sont reportées
+    régulièrement sur le projet (annotated_rows, annotation_version, status) et sur
+    annotation_daily_counts, puis supprimées. Les lectures ajoutent les lignes non reportées.
+
+    Attributs:
+        project_id (int) : clé étrangère vers le projet (clé primaire avec annotator_id et day). Supprimé automatiquement si le projet est supprimé
+        annotator_id (int) : annotateur qui a soumis les annotations (sans clé étrangère : les compteurs restent à reporter si l'utilisateur est supprimé)
+        day (date) : jour des annotations (date de validation envoyée par le front)
+        annotations (int) : nombre d'annotations soumises, y compris les modifications
+        new_rows (int) : nombre de lignes annotées pour la première fois
+        project (Project) : relation ORM vers le projet
+    """
+
+    __tablename__ = "annotation_count_deltas"
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    annotator_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    annotations = Column(Integer, nullable=False, default=0, server_default="0")
+    new_rows = Column(Integer, nullable=False, default=0, server_default="0")
+
+    project = relationship("Project", back_populates="count_deltas")
+
+
+class StoredFile(Base):
+    """Modèle représentant un fichier téléversé, stocké une seule fois par contenu (voir core/storage.py).
+
+    Attributs:
+        path (str) : chemin du fichier, dérivé de son empreinte (clé primaire), enregistré sur les projets
+        sha256 (str) : empreinte sha256 du contenu
+        size (int) : taille du fichier en octets
+        refcount (int) : nombre de références depuis annotation_file_path et guidelines_file_path des projets.
+            Le fichier est supprimé avec sa dernière référence
+        created_at (datetime) : date et heure du premier téléversement
+    """
+
+    __tablename__ = "stored_files"
+
+    path = Column(Text, primary_key=True)
+    sha256 = Column(String(64), nullable=False, index=True)
+    size = Column(BigInteger, nullable=False)
+    refcount = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(TIMESTAMP, server_default=text("CURRENT_TIMESTAMP"))
+
+
+class RowText(Base):
+    """Modèle représentant le texte d'une ligne d'un projet, indexé pour la recherche (PostgreSQL).
+    Rempli à l'ingestion du csv à partir du stock de lignes, voir core/search.py. Sous SQLite,
+    la table reste vide : la recherche utilise un index inversé en mémoire.
+
+    Attributs:
+        project_id (int) : clé étrangère vers le projet (clé primaire avec row_id). Supprimé automatiquement si le projet est supprimé
+        row_id (int) : numéro de la ligne dans le fichier csv d'origine (commence à 1)
+        text (str) : texte de la ligne (colonne text du csv, ou tous les champs si elle est absente)
+    """
+
+    __tablename__ = "row_texts"
+    __table_args__ = (
+        # recherche par mots (plein texte, sans racinisation) et par sous-chaîne (trigrammes),
+        # limitée aux lignes d'un projet grâce à btree_gin
+        Index(
+            "ix_row_texts_project_tsv", "project_id", text("to_tsvector('simple'::regconfig, text)"),
+            postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_row_texts_project_trgm", "project_id", "text",
+            postgresql_using="gin", postgresql_ops={"text": "gin_trgm_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    row_id = Column(Integer, primary_key=True)
+    text = Column(Text, nullable=False)
+
+
+# extensions nécessaires aux index de recherche, créées avec la table sous PostgreSQL
+event.listen(
+    RowText.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm; CREATE EXTENSION IF NOT EXISTS btree_gin").execute_if(dialect="postgresql")
+)
@@ -1,8 +1,8 @@
 # Définir les schémas pydantic
 
-from pydantic import BaseModel, EmailStr, field_validator
+from pydantic import BaseModel, EmailStr, Field, field_validator
 import re
-from datetime import datetime
+from datetime import datetime, timezone
 
 class LoginRequest(BaseModel):
     """
@@ -82,8 +82,43 @@ class AnnotationSubmit(BaseModel):
     Attributs:
         annotationID (int) : identifiant de l'annotation à mettre à jour
         category (str) : valeur de l'annotation sélectionnée par l'utilisateur
-        date (datetime) : date et heure de validation de l'annotation
+        date (datetime) : date et heure de validation de l'annotation, convertie en UTC sans fuseau
     """    
     annotationId: int
     category: str
-    date: datetime
\ No newline at end of file
+    date: datetime
+
+    @field_validator('date')
+    def naive_utc(cls, v):
+        """
+        Convertit une date avec fuseau horaire en UTC sans fuseau, format de la colonne annotations.date.
+
+        Le front envoie des dates ISO avec fuseau (toISOString()) : asyncpg refuse d'écrire
+        une date avec fuseau dans une colonne timestamp without time zone.
+
+        Args:
+            v (datetime): La date envoyée par le front
+
+        Returns:
+            datetime: La date en UTC sans fuseau (inchangée si elle n'a pas de fuseau)
+        """
+        if v.tzinfo is not None:
+            return v.astimezone(timezone.utc).replace(tzinfo=None)
+        return v
+
+class AnnotationBatchSubmit(BaseModel):
+    """Modèle Pydantic représentant un lot d'annotations envoyées en une seule requête.
+    Si une même annotation apparaît plusieurs fois dans le lot, la dernière valeur est retenue.
+
+    Attributs:
+        annotations (list[AnnotationSubmit]) : annotations à mettre à jour (entre 1 et 1000)
+    """
+    annotations: list[AnnotationSubmit] = Field(..., min_length=1, max_length=1000)
+
+class ProjectMemberAdd(BaseModel):
+    """Modèle Pydantic représentant l'invitation d'un annotateur sur un projet.
+
+    Attributs:
+        email (EmailStr) : adresse email d'un utilisateur inscrit
+    """
+    email: EmailStr
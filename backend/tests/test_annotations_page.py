@@ -0,0 +1,40 @@
+# Pagination des lignes à annoter : GET /annotations/{project_id}/annotate/page
+
+import pytest
+
+
+@pytest.fixture
+def project(make_user, login, make_project):
+    _, token = make_user()
+    login(token)
+    return make_project(rows=10)
+
+
+def page(client, project_id, **params):
+    response = client.get(f"/annotations/{project_id}/annotate/page", params=params)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    return [a["row_id"] for a in body["annotations"]], body["previous_before"], body["next_after"]
+
+
+def test_pages_forward_and_backward(client, project):
+    assert page(client, project, limit=4) == ([1, 2, 3, 4], None, 4)
+    assert page(client, project, after=4, limit=4) == ([5, 6, 7, 8], 5, 8)
+    assert page(client, project, after=8, limit=4) == ([9, 10], 9, None)
+
+    assert page(client, project, before=9, limit=4) == ([5, 6, 7, 8], 5, 8)
+    assert page(client, project, before=5, limit=4) == ([1, 2, 3, 4], None, 4)
+    assert page(client, project, before=3, limit=4) == ([1, 2], None, 2)
+
+
+def test_first_unannotated_page_links_back(client, project, annotation_ids):
+    for annotation_id in annotation_ids(project)[:6]:
+        response = client.post(f"/annotations/{project}/submit", json={
+            "annotationId": annotation_id, "category": "a", "date": "2030-01-01T10:00:00"
+        })
+        assert response.status_code == 200, response.text
+
+    # la reprise commence à la ligne 7, les lignes déjà annotées restent accessibles
+    assert page(client, project, first_unannotated=True, limit=3) == ([7, 8, 9], 7, 9)
+    assert page(client, project, before=7, limit=3) == ([4, 5, 6], 4, 6)
+    assert page(client, project, before=7, limit=3, only_unannotated=True) == ([], None, None)
@@ -0,0 +1,103 @@
+# Soumission d'annotations : POST /annotations/{project_id}/submit et /submit/batch
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from core.counters import project_progress
+from models import Annotation, Project
+
+
+@pytest.fixture
+def project(make_user, login, make_project):
+    user_id, token = make_user()
+    login(token)
+    return make_project(rows=5)
+
+
+@pytest.mark.parametrize("sent, stored", [
+    ("2030-01-01T10:00:00.000Z", datetime(2030, 1, 1, 10, 0)),
+    ("2030-01-01T12:00:00+02:00", datetime(2030, 1, 1, 10, 0)),
+    ("2030-01-01T10:00:00", datetime(2030, 1, 1, 10, 0)),
+])
+def test_submit_stores_naive_utc_date(client, db, project, annotation_ids, sent, stored):
+    annotation_id = annotation_ids(project)[0]
+
+    response = client.post(f"/annotations/{project}/submit", json={
+        "annotationId": annotation_id, "category": "a", "date": sent
+    })
+
+    assert response.status_code == 200, response.text
+    annotation = db.get(Annotation, annotation_id)
+    assert (annotation.content, annotation.date) == ("a", stored)
+    assert db.scalar(project_progress(Project.annotated_rows).where(Project.id == project)) == 1
+
+
+def test_submit_batch_stores_naive_utc_dates(client, db, project, annotation_ids):
+    ids = annotation_ids(project)
+
+    response = client.post(f"/annotations/{project}/submit/batch", json={"annotations": [
+        {"annotationId": ids[0], "category": "a", "date": "2030-01-01T23:30:00.000Z"},
+        {"annotationId": ids[1], "category": "b", "date": "2030-01-02T01:30:00+02:00"},
+    ]})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["saved"] == 2
+    dates = dict(db.execute(select(Annotation.id, Annotation.date).where(Annotation.id.in_(ids[:2]))).all())
+    assert dates == {ids[0]: datetime(2030, 1, 1, 23, 30), ids[1]: datetime(2030, 1, 1, 23, 30)}
+    assert db.scalar(project_progress(Project.annotated_rows).where(Project.id == project)) == 2
+
+
+def test_submit_rejects_unknown_category(client, db, project, annotation_ids):
+    annotation_id = annotation_ids(project)[0]
+
+    response = client.post(f"/annotations/{project}/submit", json={
+        "annotationId": annotation_id, "category": "z", "date": "2030-01-01T10:00:00"
+    })
+
+    assert response.status_code == 422, response.text
+    assert db.get(Annotation, annotation_id).content is None
+
+
+def test_submit_batch_rejects_unknown_category(client, db, project, annotation_ids):
+    ids = annotation_ids(project)
+
+    response = client.post(f"/annotations/{project}/submit/batch", json={"annotations": [
+        {"annotationId": ids[0], "category": "a", "date": "2030-01-01T10:00:00"},
+        {"annotationId": ids[1], "category": "z", "date": "2030-01-01T10:00:00"},
+    ]})
+
+    assert response.status_code == 422, response.text
+    # le lot est refusé en entier
+    assert db.scalars(select(Annotation.content).where(Annotation.id.in_(ids[:2]))).all() == [None, None]
+
+
+def test_submit_batch_counts_each_row_once(client, db, project, annotation_ids):
+    ids = annotation_ids(project)
+    client.post(f"/annotations/{project}/submit", json={
+        "annotationId": ids[0], "category": "a", "date": "2030-01-01T10:00:00"
+    })
+
+    response = client.post(f"/annotations/{project}/submit/batch", json={"annotations": [
+        {"annotationId": ids[0], "category": "b", "date": "2030-01-01T11:00:00"},
+        {"annotationId": ids[1], "category": "a", "date": "2030-01-01T11:00:00"},
+        {"annotationId": ids[1], "category": "b", "date": "2030-01-01T12:00:00"},
+        {"annotationId": 0, "category": "a", "date": "2030-01-01T11:00:00"},
+    ]})
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    # doublon : la dernière valeur est retenue ; identifiant hors du projet : not_found
+    assert body["saved"] == 2
+    assert [(r["annotation_id"], r["status"]) for r in body["results"]] == [
+        (ids[0], "saved"), (ids[1], "saved"), (0, "not_found")
+    ]
+    assert db.execute(
+        select(Annotation.content, Annotation.date).where(Annotation.id.in_(ids[:2])).order_by(Annotation.id)
+    ).all() == [("b", datetime(2030, 1, 1, 11, 0)), ("b", datetime(2030, 1, 1, 12, 0))]
+    # la ligne déjà annotée n'est pas comptée une seconde fois, chaque annotation augmente la version
+    progress = db.execute(
+        project_progress(Project.annotated_rows, Project.annotation_version).where(Project.id == project)
+    ).one()
+    assert tuple(progress) == (2, 3)
@@ -0,0 +1,148 @@
+# Compteurs de progression des projets : core/counters.py
+
+from datetime import date
+
+import pytest
+from sqlalchemy import delete, select
+
+from core.counters import _rebuild_daily_counts, fold_counter_deltas, project_progress, reconcile_project_counters
+from models import AnnotationCountDelta, AnnotationDailyCount, Project
+
+
+@pytest.fixture
+def project(make_user, login, make_project):
+    _, token = make_user()
+    login(token)
+    return make_project(rows=3)
+
+
+def submit(client, project_id, annotation_id, category="a", date="2030-01-01T10:00:00"):
+    response = client.post(f"/annotations/{project_id}/submit", json={
+        "annotationId": annotation_id, "category": category, "date": date
+    })
+    assert response.status_code == 200, response.text
+
+
+def progress(db, project_id):
+    db.expire_all()
+    return db.execute(
+        project_progress(Project.annotated_rows, Project.annotation_version, Project.status).where(Project.id == project_id)
+    ).one()
+
+
+def test_submit_writes_annotator_delta(client, db, project, annotation_ids):
+    ids = annotation_ids(project)
+    submit(client, project, ids[0])
+    submit(client, project, ids[0], category="b", date="2030-01-02T10:00:00")
+
+    # le projet n'est pas modifié : les compteurs attendent le report
+    stored = db.get(Project, project)
+    assert (stored.annotated_rows, stored.annotation_version) == (0, 0)
+    assert db.execute(
+        select(AnnotationCountDelta.day, AnnotationCountDelta.annotations, AnnotationCountDelta.new_rows)
+        .order_by(AnnotationCountDelta.day)
+    ).all() == [(date(2030, 1, 1), 1, 1), (date(2030, 1, 2), 1, 0)]
+    assert tuple(progress(db, project)) == (1, 2, "pending")
+
+
+def test_fold_moves_deltas_to_project(client, db, project, annotation_ids):
+    ids = annotation_ids(project)
+    submit(client, project, ids[0])
+    submit(client, project, ids[1])
+    before = progress(db, project)
+
+    assert fold_counter_deltas(db) == 1
+    db.commit()
+
+    assert db.scalar(select(AnnotationCountDelta).limit(1)) is None
+    stored = db.get(Project, project)
+    assert (stored.annotated_rows, stored.annotation_version) == (2, 2)
+    assert progress(db, project) == before
+    assert db.execute(
+        select(AnnotationDailyCount.day, AnnotationDailyCount.annotations, AnnotationDailyCount.new_rows)
+    ).all() == [(date(2030, 1, 1), 2, 2)]
+
+    # la version continue d'augmenter après le report
+    submit(client, project, ids[1], category="b")
+    assert progress(db, project).annotation_version == 3
+
+
+def test_last_row_completes_project(client, db, project, annotation_ids):
+    for annotation_id in annotation_ids(project):
+        submit(client, project, annotation_id)
+
+    db.expire_all()
+    assert db.get(Project, project).status == "completed"
+    assert tuple(progress(db, project)) == (3, 3, "completed")
+
+
+def test_reconcile_folds_pending_deltas(client, db, project, annotation_ids):
+    ids = annotation_ids(project)
+    submit(client, project, ids[0])
+    submit(client, project, ids[1])
+    # dérive : le compteur du projet a perdu les lignes déjà reportées
+    fold_counter_deltas(db)
+    db.get(Project, project).annotated_rows = 0
+    db.commit()
+    submit(client, project, ids[2], category="b", date="2030-01-02T10:00:00")
+
+    assert reconcile_project_counters(db, [project]) == 1
+
+    assert db.scalar(select(AnnotationCountDelta).limit(1)) is None
+    stored = db.get(Project, project)
+    assert (stored.total_rows, stored.annotated_rows) == (3, 3)
+    assert tuple(progress(db, project)) == (3, 3, "completed")
+
+
+def test_reconcile_all_projects_rebuilds_daily_counts(client, db, project, annotation_ids):
+    ids = annotation_ids(project)
+    submit(client, project, ids[0])
+    submit(client, project, ids[1], date="2030-01-02T10:00:00")
+    # la ligne 1 est modifiée le lendemain : seule sa dernière date est connue
+    submit(client, project, ids[0], category="b", date="2030-01-02T11:00:00")
+    fold_counter_deltas(db)
+    db.execute(delete(AnnotationDailyCount))
+    db.commit()
+
+    assert reconcile_project_counters(db) == 1
+
+    assert db.execute(
+        select(AnnotationDailyCount.day, AnnotationDailyCount.annotations, AnnotationDailyCount.new_rows)
+    ).all() == [(date(2030, 1, 2), 2, 2)]
+    assert tuple(progress(db, project)) == (2, 3, "pending")
+
+
+def test_reconcile_keeps_existing_daily_counts(client, db, project, annotation_ids):
+    ids = annotation_ids(project)
+    submit(client, project, ids[0])
+    # la modification du lendemain n'est connue que du cumul journalier
+    submit(client, project, ids[0], category="b", date="2030-01-02T10:00:00")
+    fold_counter_deltas(db)
+    db.commit()
+
+    reconcile_project_counters(db)
+
+    assert db.execute(
+        select(AnnotationDailyCount.day, AnnotationDailyCount.annotations, AnnotationDailyCount.new_rows)
+        .order_by(AnnotationDailyCount.day)
+    ).all() == [(date(2030, 1, 1), 1, 1), (date(2030, 1, 2), 1, 0)]
+
+
+def test_rebuild_subtracts_pending_deltas(client, db, project, annotation_ids):
+    ids = annotation_ids(project)
+    submit(client, project, ids[0])
+    # soumissions reçues pendant la reconstruction : encore en attente lors du comptage
+    submit(client, project, ids[1], date="2030-01-02T10:00:00")
+    submit(client, project, ids[0], category="b", date="2030-01-03T10:00:00")
+    db.execute(delete(AnnotationDailyCount))
+    db.commit()
+
+    _rebuild_daily_counts(db)
+    fold_counter_deltas(db)
+    db.commit()
+
+    # même cumul qu'une reconstruction faite après le report (le 1er janvier est compensé)
+    assert db.execute(
+        select(AnnotationDailyCount.day, AnnotationDailyCount.annotations, AnnotationDailyCount.new_rows)
+        .order_by(AnnotationDailyCount.day)
+    ).all() == [(date(2030, 1, 1), 0, 0), (date(2030, 1, 2), 1, 1), (date(2030, 1, 3), 1, 1)]
@@ -0,0 +1,78 @@
+# Évènements de progression des projets : core/events.py
+
+import asyncio
+import json
+
+import pytest
+
+from core.counters import counter_folder
+from core.events import NOTIFY_FIELDS, ProjectEventBroker, _notify_payload, project_events
+
+
+@pytest.fixture
+def project(make_user, login, make_project):
+    user_id, token = make_user()
+    login(token)
+    return user_id, make_project(rows=2)
+
+
+def test_notify_payload_carries_ids_and_counters():
+    payload = {
+        "type": "project", "user_id": 1, "id": 2, "project_name": "x" * 10_000,
+        "due_date": "2099-12-31", "status": "pending", "completion": 50
+    }
+
+    assert json.loads(_notify_payload(payload)) == {key: payload[key] for key in NOTIFY_FIELDS}
+
+
+def test_received_event_completed_with_project_details(app_client, project):
+    user_id, project_id = project
+    broker = ProjectEventBroker(notify=True)
+
+    async def receive(payload):
+        return await broker._complete(payload)
+
+    event = app_client.portal.call(receive, {
+        "type": "project", "user_id": user_id, "id": project_id, "status": "pending", "completion": 50
+    })
+    assert (event["project_name"], event["due_date"], event["completion"]) == ("projet de test", "2099-12-31", 50)
+    # le projet supprimé n'est plus relu
+    assert app_client.portal.call(receive, {"type": "project", "user_id": user_id, "id": 0}) is None
+
+
+def test_progress_published_once_per_fold(client, project, annotation_ids):
+    user_id, project_id = project
+    ids = annotation_ids(project_id)
+    queue = client.portal.call(_subscribe, user_id)
+    try:
+        published = project_events.stats()["published"]
+        response = client.post(f"/annotations/{project_id}/submit", json={
+            "annotationId": ids[0], "category": "a", "date": "2030-01-01T10:00:00"
+        })
+        assert response.status_code == 200, response.text
+        # la progression seule n'est pas publiée par la soumission (pas de NOTIFY par commit)
+        assert project_events.stats()["published"] == published
+
+        counter_folder.fold()
+        assert client.portal.call(_next_event, queue) == {
+            "type": "project", "user_id": user_id, "id": project_id, "project_name": "projet de test",
+            "due_date": "2099-12-31", "status": "pending", "completion": 50
+        }
+
+        # le passage à completed est publié par la soumission elle-même
+        response = client.post(f"/annotations/{project_id}/submit", json={
+            "annotationId": ids[1], "category": "a", "date": "2030-01-01T10:00:00"
+        })
+        assert response.status_code == 200, response.text
+        event = client.portal.call(_next_event, queue)
+        assert (event["status"], event["completion"]) == ("completed", 100)
+    finally:
+        project_events.unsubscribe(user_id, queue)
+
+
+async def _subscribe(user_id: int) -> asyncio.Queue:
+    return project_events.subscribe(user_id)
+
+
+async def _next_event(queue: asyncio.Queue) -> dict:
+    return await asyncio.wait_for(queue.get(), 5)
@@ -0,0 +1,28 @@
+# Export des annotations d'un projet : core/export.py
+
+import json
+
+from sqlalchemy import select
+
+from core import export
+from core.row_store import open_row_store
+from models import Project
+
+
+def test_label_outside_dictionary_exported_as_null(client, db, make_user, login, make_project, annotation_ids, monkeypatch):
+    _, token = make_user()
+    login(token)
+    project_id = make_project(rows=2)
+    ids = annotation_ids(project_id)
+    for annotation_id, category in zip(ids, ("a", "b")):
+        response = client.post(f"/annotations/{project_id}/submit", json={
+            "annotationId": annotation_id, "category": category, "date": "2030-01-01T10:00:00"
+        })
+        assert response.status_code == 200, response.text
+    # "b" a été annoté après que le dictionnaire de l'export a été fixé
+    monkeypatch.setattr(export, "_annotation_dictionary", lambda project_id, categories: ["a"])
+
+    path = db.scalar(select(Project.annotation_file_path).where(Project.id == project_id))
+    body = b"".join(export.export_project_file(open_row_store(path), project_id, "jsonl", ["a", "b"]))
+
+    assert [json.loads(line)["annotation"] for line in body.splitlines()] == ["a", None]
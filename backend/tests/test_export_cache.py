@@ -0,0 +1,80 @@
+# Cache des exports : core/export_cache.py et GET /dashboard/annotations/{project_id}/export
+
+import os
+
+import pytest
+
+from core.export_cache import ExportCache, export_cache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ExportCache(str(tmp_path / "cache"), max_bytes=1024)
+
+
+def chunks(*parts: bytes):
+    yield from parts
+
+
+def fill(cache, project_id, version, content: bytes) -> bytes:
+    return b"".join(cache.fill(project_id, version, "csv", False, chunks(content)))
+
+
+def test_export_served_from_cache_until_submit(client, make_user, login, make_project, annotation_ids):
+    _, token = make_user()
+    login(token)
+    project_id = make_project(rows=3)
+    stats = export_cache.stats()
+
+    first = client.get(f"/dashboard/annotations/{project_id}/export")
+    second = client.get(f"/dashboard/annotations/{project_id}/export")
+
+    assert first.status_code == second.status_code == 200
+    assert second.content == first.content
+    assert second.headers["content-length"] == str(len(first.content))
+    assert (export_cache.stats()["misses"], export_cache.stats()["hits"]) == (stats["misses"] + 1, stats["hits"] + 1)
+
+    # une soumission change la version des annotations : l'export est régénéré, l'ancien supprimé
+    response = client.post(f"/annotations/{project_id}/submit", json={
+        "annotationId": annotation_ids(project_id)[0], "category": "a", "date": "2030-01-01T10:00:00"
+    })
+    assert response.status_code == 200, response.text
+    third = client.get(f"/dashboard/annotations/{project_id}/export")
+    assert third.content != first.content
+    assert export_cache.stats()["misses"] == stats["misses"] + 2
+    assert sorted(os.listdir(os.path.dirname(export_cache.path(project_id, 1, "csv", False)))) == ["v1.csv"]
+
+
+def test_cached_file_readable_after_removal(cache):
+    fill(cache, 1, 0, b"contenu")
+
+    cached = cache.get(1, 0, "csv", False)
+    os.remove(cache.path(1, 0, "csv", False))
+
+    assert b"".join(cache.stream(cached, chunk_size=3)) == b"contenu"
+    assert cached.closed
+    assert cache.get(1, 0, "csv", False) is None
+
+
+def test_older_fill_finished_late_is_not_kept(cache):
+    late = cache.fill(1, 1, "csv", False, chunks(b"v1"))
+    next(late)
+    fill(cache, 1, 2, b"v2")
+
+    assert list(late) == []
+    assert cache.get(1, 1, "csv", False) is None
+    assert b"".join(cache.stream(cache.get(1, 2, "csv", False))) == b"v2"
+
+
+def test_least_recently_used_evicted(cache):
+    fill(cache, 1, 0, b"a" * 400)
+    fill(cache, 2, 0, b"b" * 400)
+    os.utime(cache.path(1, 0, "csv", False), (1, 1))
+    cache.get(1, 0, "csv", False).close()  # utilisé en dernier
+
+    fill(cache, 3, 0, b"c" * 400)
+
+    assert cache.stats()["evictions"] == 1
+    assert os.path.exists(cache.path(1, 0, "csv", False))
+    assert not os.path.exists(cache.path(2, 0, "csv", False))
+    assert os.path.exists(cache.path(3, 0, "csv", False))
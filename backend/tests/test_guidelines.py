@@ -0,0 +1,61 @@
+# Guidelines d'un projet : GET /annotations/{project}/guidelines
+
+import hashlib
+
+import pytest
+
+PDF = b"%PDF-1.4\n" + bytes(range(256)) * 40 + b"\n%%EOF\n"
+
+
+@pytest.fixture
+def project(make_user, login, make_project):
+    _, token = make_user(email="proprietaire@exemple.fr")
+    login(token)
+    return make_project(rows=2, guidelines=PDF)
+
+
+def test_project_exposes_versioned_url_only(client, project):
+    details = client.get(f"/annotations/{project}").json()
+
+    assert "guidelines_file_path" not in details
+    assert details["guidelines_url"] == f"/annotations/{project}/guidelines?v={hashlib.sha256(PDF).hexdigest()}"
+
+
+def test_guidelines_sent_with_strong_etag(client, project):
+    response = client.get(f"/annotations/{project}/guidelines")
+
+    assert response.status_code == 200
+    assert response.content == PDF
+    assert response.headers["etag"] == f'"{hashlib.sha256(PDF).hexdigest()}"'
+    assert "immutable" in response.headers["cache-control"]
+    assert response.headers["content-disposition"].startswith("inline")
+
+
+def test_guidelines_not_modified(client, project):
+    etag = client.get(f"/annotations/{project}/guidelines").headers["etag"]
+
+    response = client.get(f"/annotations/{project}/guidelines", headers={"If-None-Match": f'"autre", W/{etag}'})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_guidelines_range(client, project):
+    response = client.get(f"/annotations/{project}/guidelines", headers={"Range": "bytes=100-199"})
+
+    assert response.status_code == 206
+    assert response.content == PDF[100:200]
+    assert response.headers["content-range"] == f"bytes 100-199/{len(PDF)}"
+
+
+def test_guidelines_for_members_only(client, make_user, login, project):
+    _, member_token = make_user(email="membre@exemple.fr")
+    _, stranger_token = make_user()
+    assert client.post(f"/annotations/{project}/members", json={"email": "membre@exemple.fr"}).status_code == 201
+
+    login(member_token)
+    assert client.get(f"/annotations/{project}/guidelines").content == PDF
+
+    login(stranger_token)
+    assert client.get(f"/annotations/{project}/guidelines").status_code == 404
@@ -0,0 +1,49 @@
+# Pool de hachage des mots de passe : core/hashing.py
+
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+import api.auth
+from core.hashing import PasswordHashingExecutor
+
+
+@pytest.fixture
+def hasher():
+    """Pool d'un seul thread sans file d'attente, et verrou qui retient le hachage en cours."""
+    executor = PasswordHashingExecutor(workers=1, max_pending=0, retry_after=7)
+    release = threading.Event()
+    yield executor, release
+    release.set()
+    executor.shutdown()
+
+
+def test_saturated_pool_rejects_with_retry_after(hasher):
+    executor, release = hasher
+    running = executor.submit(release.wait)
+
+    with pytest.raises(HTTPException) as error:
+        executor.submit(str, "refusé")
+    assert error.value.status_code == 503
+    assert error.value.headers == {"Retry-After": "7"}
+
+    # la place est rendue à la fin du hachage
+    release.set()
+    running.result()
+    assert executor.run(str, "accepté") == "accepté"
+    stats = executor.stats()
+    assert (stats["in_flight"], stats["completed"], stats["rejected"]) == (0, 2, 1)
+
+
+def test_login_refused_while_hashing_saturated(client, make_user, monkeypatch, hasher):
+    executor, release = hasher
+    make_user(email="connexion@exemple.fr")
+    monkeypatch.setattr(api.auth, "password_hasher", executor)
+    executor.submit(release.wait)
+
+    response = client.post("/auth/login", json={"email": "connexion@exemple.fr", "password": "secret"})
+
+    assert response.status_code == 503, response.text
+    assert response.headers["retry-after"] == "7"
+    assert "access_token" not in response.cookies
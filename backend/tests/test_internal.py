@@ -0,0 +1,32 @@
+# Endpoints internes : /internal/stats, /metrics et /health
+
+import pytest
+
+from core.config import settings
+
+HEADERS = {"X-Internal-Token": "tests-internal-token"}
+
+
+@pytest.mark.parametrize("path", ["/internal/stats", "/metrics"])
+def test_internal_endpoints_require_token(client, path):
+    assert client.get(path).status_code == 403
+    assert client.get(path, headers={"X-Internal-Token": "mauvais"}).status_code == 403
+    assert client.get(path, headers=HEADERS).status_code == 200
+
+
+@pytest.mark.parametrize("path", ["/internal/stats", "/metrics"])
+@pytest.mark.parametrize("token", [None, ""])
+def test_internal_endpoints_closed_without_configured_token(client, monkeypatch, path, token):
+    monkeypatch.setattr(settings, "INTERNAL_STATS_TOKEN", token)
+
+    assert client.get(path).status_code == 404
+    assert client.get(path, headers=HEADERS).status_code == 404
+
+
+def test_health_is_public(client, monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_STATS_TOKEN", None)
+
+    response = client.get("/health")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
@@ -0,0 +1,81 @@
+# Baux sur les lignes à annoter : POST /annotations/{project_id}/leases et core/leases.py
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from models import Annotation
+
+
+@pytest.fixture
+def annotators(client, make_user, login, make_project):
+    """Projet de 6 lignes, son propriétaire et un membre : (projet, jeton du propriétaire, jeton du membre)."""
+    _, member_token = make_user(email="membre@exemple.fr")
+    _, owner_token = make_user()
+    login(owner_token)
+    project_id = make_project(rows=6)
+    response = client.post(f"/annotations/{project_id}/members", json={"email": "membre@exemple.fr"})
+    assert response.status_code == 201, response.text
+    return project_id, owner_token, member_token
+
+
+def claim(client, login, token, project_id, size):
+    login(token)
+    response = client.post(f"/annotations/{project_id}/leases", params={"size": size})
+    assert response.status_code == 200, response.text
+    return [a["row_id"] for a in response.json()["annotations"]]
+
+
+def submit(client, project_id, row_id, ids):
+    return client.post(f"/annotations/{project_id}/submit", json={
+        "annotationId": ids[row_id - 1], "category": "a", "date": "2030-01-01T10:00:00"
+    })
+
+
+def test_annotators_claim_disjoint_rows(client, login, annotators):
+    project_id, owner, member = annotators
+
+    assert claim(client, login, owner, project_id, 2) == [1, 2]
+    assert claim(client, login, member, project_id, 2) == [3, 4]
+    # rappeler la route renouvelle le lot en cours et le complète
+    assert claim(client, login, owner, project_id, 3) == [1, 2, 5]
+    assert claim(client, login, member, project_id, 4) == [3, 4, 6]
+
+
+def test_leased_row_refused_to_other_annotator(client, login, annotators, annotation_ids):
+    project_id, owner, member = annotators
+    claim(client, login, owner, project_id, 2)
+    ids = annotation_ids(project_id)
+
+    login(member)
+    assert submit(client, project_id, 1, ids).status_code == 409
+    response = client.post(f"/annotations/{project_id}/submit/batch", json={"annotations": [
+        {"annotationId": ids[0], "category": "a", "date": "2030-01-01T10:00:00"},
+        {"annotationId": ids[2], "category": "a", "date": "2030-01-01T10:00:00"},
+    ]})
+    assert response.status_code == 200, response.text
+    assert [r["status"] for r in response.json()["results"]] == ["leased", "saved"]
+
+    # la soumission par le titulaire rend le bail : la ligne n'est plus attribuée
+    login(owner)
+    assert submit(client, project_id, 1, ids).status_code == 200
+    assert claim(client, login, member, project_id, 6) == [4, 5, 6]
+
+
+def test_expired_lease_is_claimed_by_other_annotator(client, db, login, annotators, annotation_ids):
+    project_id, owner, member = annotators
+    assert claim(client, login, owner, project_id, 2) == [1, 2]
+    db.execute(
+        update(Annotation)
+        .where(Annotation.project_id == project_id, Annotation.leased_by.is_not(None))
+        .values(lease_expires_at=datetime.now() - timedelta(seconds=1))
+    )
+    db.commit()
+    ids = annotation_ids(project_id)
+
+    # le lot abandonné est repris sans tâche de nettoyage
+    assert claim(client, login, member, project_id, 2) == [1, 2]
+    login(owner)
+    assert submit(client, project_id, 1, ids).status_code == 409
+    assert claim(client, login, owner, project_id, 2) == [3, 4]
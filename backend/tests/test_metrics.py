@@ -0,0 +1,70 @@
+# Métriques des requêtes HTTP : core/metrics.py et GET /metrics
+
+from prometheus_client import REGISTRY
+
+from core.metrics import UNMATCHED_ROUTE
+from core.security import principal_cache
+
+HEADERS = {"X-Internal-Token": "tests-internal-token"}
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_requests_labelled_by_route_template(client, make_user, login, make_project):
+    _, token = make_user()
+    login(token)
+    project_id = make_project(rows=2)
+    labels = {"method": "GET", "route": "/annotations/{project_id}/velocity"}
+    before = sample("http_request_duration_seconds_count", status="200", **labels)
+
+    assert client.get(f"/annotations/{project_id}/velocity").status_code == 200
+
+    assert sample("http_request_duration_seconds_count", status="200", **labels) == before + 1
+    # le chemin réel ne crée pas de série
+    assert sample(
+        "http_request_duration_seconds_count", method="GET", route=f"/annotations/{project_id}/velocity", status="200"
+    ) == 0
+
+
+def test_unmatched_requests_share_one_route(client):
+    labels = {"method": "GET", "route": UNMATCHED_ROUTE, "status": "404"}
+    before = sample("http_request_duration_seconds_count", **labels)
+
+    assert client.get("/inexistant/1").status_code == 404
+    assert client.get("/inexistant/2").status_code == 404
+
+    assert sample("http_request_duration_seconds_count", **labels) == before + 2
+
+
+def test_sql_statements_counted_per_request(client, make_user, login):
+    _, token = make_user()
+    login(token)
+    labels = {"method": "GET", "route": "/auth/protected"}
+
+    def statements():
+        return sample("http_request_db_statements_count", **labels), sample("http_request_db_statements_sum", **labels)
+
+    count, total = statements()
+    # jeton absent du cache : une requête SQL pour relire l'utilisateur
+    principal_cache.clear()
+    assert client.get("/auth/protected").status_code == 200
+    assert statements() == (count + 1, total + 1)
+    # jeton en cache : aucune requête SQL
+    assert client.get("/auth/protected").status_code == 200
+    assert statements() == (count + 2, total + 1)
+    assert sample("http_request_db_seconds_count", **labels) == count + 2
+
+
+def test_metrics_output(client):
+    client.get("/health")
+
+    response = client.get("/metrics", headers=HEADERS)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in body
+    assert 'http_response_size_bytes_bucket{le="256.0",method="GET",route="/health"}' in body
+    assert "http_request_db_statements_bucket" in body
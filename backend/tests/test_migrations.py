@@ -0,0 +1,91 @@
+# Mise à niveau d'une base existante : core/migrations.py
+
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy.orm import Session
+
+from core.migrations import ADDED_COLUMNS, migrate_schema, backfill
+from models import Base, Annotation, AnnotationDailyCount, Project
+
+# Schéma des tables d'origine, avant les colonnes ajoutées par les versions suivantes
+ORIGINAL_SCHEMA = [
+    """CREATE TABLE users (
+        id INTEGER PRIMARY KEY, email VARCHAR NOT NULL UNIQUE, password VARCHAR NOT NULL,
+        first_name VARCHAR NOT NULL, last_name VARCHAR NOT NULL, company VARCHAR,
+        lock_until DATETIME, failed_attempts INTEGER
+    )""",
+    """CREATE TABLE projects (
+        id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users (id) ON DELETE CASCADE,
+        project_name TEXT NOT NULL, due_date DATE NOT NULL, annotation_file_path TEXT NOT NULL,
+        guidelines_file_path TEXT NOT NULL, notes TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        status VARCHAR, categories JSON NOT NULL, mean_annotations INTEGER
+    )""",
+    """CREATE TABLE annotations (
+        id INTEGER PRIMARY KEY, row_id INTEGER NOT NULL,
+        project_id INTEGER NOT NULL REFERENCES projects (id) ON DELETE CASCADE,
+        content VARCHAR, date DATETIME
+    )""",
+]
+
+
+@pytest.fixture
+def old_engine(tmp_path):
+    """Base SQLite au schéma d'origine : un projet de 3 lignes dont 2 annotées par son propriétaire."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        for statement in ORIGINAL_SCHEMA:
+            connection.execute(text(statement))
+        connection.execute(text(
+            "INSERT INTO users (id, email, password, first_name, last_name) VALUES (7, 'a@exemple.fr', 'x', 'A', 'B')"
+        ))
+        connection.execute(text(
+            "INSERT INTO projects (id, user_id, project_name, due_date, annotation_file_path, guidelines_file_path, status, categories)"
+            " VALUES (1, 7, 'ancien', '2099-01-01', 'data.csv', 'guide.pdf', 'pending', '[\"a\", \"b\"]')"
+        ))
+        connection.execute(text(
+            "INSERT INTO annotations (row_id, project_id, content, date) VALUES"
+            " (1, 1, 'a', '2030-01-01 10:00:00'), (2, 1, 'b', '2030-01-02 10:00:00'), (3, 1, NULL, NULL)"
+        ))
+    yield engine
+    engine.dispose()
+
+
+def upgrade(engine) -> list[str]:
+    Base.metadata.create_all(bind=engine)
+    added = migrate_schema(engine)
+    with Session(engine) as db:
+        backfill(db, added)
+    return added
+
+
+def test_upgrade_original_schema(old_engine):
+    added = upgrade(old_engine)
+
+    assert sorted(added) == sorted(f"{table}.{column}" for table, columns in ADDED_COLUMNS.items() for column in columns)
+    inspector = inspect(old_engine)
+    assert "ix_annotations_project_leased_by" in {index["name"] for index in inspector.get_indexes("annotations")}
+    with Session(old_engine) as db:
+        project = db.get(Project, 1)
+        assert (project.total_rows, project.annotated_rows, project.annotation_version) == (3, 2, 0)
+        assert db.scalars(select(Annotation.annotator_id).order_by(Annotation.row_id)).all() == [7, 7, None]
+        assert db.execute(
+            select(AnnotationDailyCount.day, AnnotationDailyCount.annotations).order_by(AnnotationDailyCount.day)
+        ).all() == [(date(2030, 1, 1), 1), (date(2030, 1, 2), 1)]
+
+        # le modèle complet fonctionne sur la base mise à niveau
+        db.add(Annotation(row_id=4, project_id=1, content="a", date=datetime(2030, 1, 3), annotator_id=7))
+        db.commit()
+
+
+def test_upgrade_is_idempotent(old_engine):
+    upgrade(old_engine)
+    with Session(old_engine) as db:
+        db.get(Project, 1).annotated_rows = 3
+        db.commit()
+
+    assert upgrade(old_engine) == []
+    with Session(old_engine) as db:
+        # les compteurs déjà initialisés ne sont pas recalculés
+        assert db.get(Project, 1).annotated_rows == 3
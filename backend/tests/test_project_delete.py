@@ -0,0 +1,37 @@
+# Suppression d'un projet : DELETE /dashboard/annotations/{project_id} et import en arrière-plan
+
+import pytest
+from sqlalchemy import func, select
+
+from core.jobs import IngestionProgress, ingestion_jobs
+from models import Annotation, Project
+from tests.conftest import csv_bytes
+
+@pytest.fixture
+def project(make_user, login, make_project):
+    _, token = make_user()
+    login(token)
+    return make_project(rows=3)
+
+def test_delete_refused_while_ingesting(client, db, project):
+    db.get(Project, project).status = "ingesting"
+    db.commit()
+
+    response = client.delete(f"/dashboard/annotations/{project}")
+    assert response.status_code == 409, response.text
+    assert db.get(Project, project) is not None
+
+    db.get(Project, project).status = "pending"
+    db.commit()
+    assert client.delete(f"/dashboard/annotations/{project}").status_code == 200
+
+
+def test_ingestion_of_deleted_project_keeps_no_rows(client, db, tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_bytes(csv_bytes(50))
+    missing = (db.scalar(select(func.max(Project.id))) or 0) + 1000
+    progress = IngestionProgress(project_id=missing, total_bytes=path.stat().st_size)
+
+    ingestion_jobs._run(progress, str(path), "utf-8", ",", '"')
+
+    assert db.scalar(select(func.count()).select_from(Annotation).where(Annotation.project_id == missing)) == 0
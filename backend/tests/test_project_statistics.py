@@ -0,0 +1,60 @@
+# Statistiques d'un projet : crud.get_project_statistics et GET /annotations/{project_id}
+
+from datetime import datetime
+
+import pytest
+
+from core.counters import fold_counter_deltas
+from crud import get_project_statistics
+from models import Project
+
+
+@pytest.fixture
+def project(make_user, login, make_project):
+    _, token = make_user()
+    login(token)
+    return make_project(rows=4)
+
+
+def submit(client, project_id, annotation_id, category, date):
+    response = client.post(f"/annotations/{project_id}/submit", json={
+        "annotationId": annotation_id, "category": category, "date": date
+    })
+    assert response.status_code == 200, response.text
+
+
+def test_statistics_from_counters_and_rollup(client, db, project, annotation_ids):
+    ids = annotation_ids(project)
+    submit(client, project, ids[0], "a", "2030-01-01T10:00:00")
+    submit(client, project, ids[1], "b", "2030-01-01T11:00:00")
+    fold_counter_deltas(db)
+    db.commit()
+    # la ligne 1 est modifiée plus tard : le premier jour reste celui du cumul journalier
+    submit(client, project, ids[0], "b", "2030-01-03T10:00:00")
+    submit(client, project, ids[2], "a", "2030-01-03T11:00:00")
+
+    stats = get_project_statistics(db, project)
+
+    assert (stats["total"], stats["done"]) == (4, 3)
+    assert stats["first_date"] == datetime(2030, 1, 1)
+    assert stats["category_counts"] == {"a": 1, "b": 2}
+    assert stats["daily_counts"] == {"2030-01-01": 2, "2030-01-03": 2}
+
+
+def test_progress_read_from_project_counters(client, db, project, annotation_ids):
+    submit(client, project, annotation_ids(project)[0], "a", "2030-01-01T10:00:00")
+    fold_counter_deltas(db)
+    # les lignes ne sont pas recomptées : le compteur du projet fait foi
+    db.get(Project, project).annotated_rows = 2
+    db.commit()
+
+    details = client.get(f"/annotations/{project}").json()
+
+    assert (details["total_rows"], details["annotated_rows"], details["completion"]) == (4, 2, 50)
+    assert details["category_counts"] == {"a": 1}
+
+
+def test_statistics_of_project_without_annotations(client, db, project):
+    stats = get_project_statistics(db, project)
+
+    assert stats == {"total": 4, "done": 0, "first_date": None, "category_counts": {}, "daily_counts": {}}
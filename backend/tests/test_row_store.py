@@ -0,0 +1,63 @@
+# Stock de lignes d'un projet : core/row_store.py
+
+import tracemalloc
+
+import pytest
+
+from core import row_store
+from core.row_store import RowStore, RowStoreWriter
+
+HEADER = ["text", "label"]
+
+
+def write_store(path, rows):
+    with RowStoreWriter(path) as store:
+        store.append(HEADER)
+        for row in rows:
+            store.append(row)
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "project.csv")
+
+
+def test_rows_across_parse_windows(store_path, monkeypatch):
+    # champs sur plusieurs lignes, guillemets et séparateurs : chaque fenêtre coupe entre deux enregistrements
+    rows = [[f'ligne {index}\n"suite", {"x" * (index % 50)}', str(index % 3)] for index in range(500)]
+    write_store(store_path, rows)
+    monkeypatch.setattr(row_store, "PARSE_WINDOW_BYTES", 256)
+
+    with RowStore(store_path) as store:
+        assert store.header == HEADER
+        assert len(store) == 500
+        assert [row for _, row in store.rows()] == rows
+        assert list(store.rows(120, 125)) == [(row_id, rows[row_id - 1]) for row_id in range(120, 125)]
+        assert list(store.select([3, 4, 250, 499])) == [(row_id, rows[row_id - 1]) for row_id in (3, 4, 250, 499)]
+        assert store.get(500) == rows[-1]
+        assert store.get(501) is None
+
+
+def test_row_larger_than_window(store_path, monkeypatch):
+    rows = [["a"], ["b" * 10_000], ["c"]]
+    write_store(store_path, rows)
+    monkeypatch.setattr(row_store, "PARSE_WINDOW_BYTES", 16)
+
+    with RowStore(store_path) as store:
+        assert [row for _, row in store.rows()] == [["a", ""], ["b" * 10_000, ""], ["c", ""]]
+
+
+def test_interrupted_scan_reads_bounded_window(store_path):
+    write_store(store_path, ([f"texte de la ligne {index} " * 4, "a"] for index in range(100_000)))
+
+    with RowStore(store_path) as store:
+        tracemalloc.start()
+        try:
+            first = next(store.rows())
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    assert first[0] == 1
+    # le stock fait environ 10 Mo : seule la première fenêtre est décodée
+    assert peak < 4 * row_store.PARSE_WINDOW_BYTES
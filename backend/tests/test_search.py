@@ -0,0 +1,83 @@
+# Recherche dans les lignes d'un projet : GET /annotations/{project_id}/search et core/search.py
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from core import search
+from core.row_store import RowStoreWriter
+from core.search import SearchIndexCache
+from tests.conftest import csv_bytes
+
+
+@pytest.fixture
+def project(make_user, login, make_project):
+    _, token = make_user()
+    login(token)
+    return make_project(content=csv_bytes(120, prefix="Facture numéro"))
+
+
+@pytest.mark.parametrize("match, q", [("words", "facture 7"), ("contains", "numéro 7")])
+def test_search_pages(client, project, match, q):
+    # lignes 7, 70 à 79 (le mot 7 seul ne correspond qu'à la ligne 7 en mode words)
+    expected = ["7"] if match == "words" else ["7", *(str(i) for i in range(70, 80))]
+
+    found, after = [], 0
+    while after is not None:
+        response = client.get(f"/annotations/{project}/search", params={"q": q, "match": match, "limit": 4, "after": after})
+        assert response.status_code == 200, response.text
+        body = response.json()
+        found += [a["text"].rsplit(" ", 1)[1] for a in body["annotations"]]
+        after = body["next_after"]
+
+    assert found == expected
+
+
+def _store(tmp_path, project_id: int, rows: int) -> SimpleNamespace:
+    path = str(tmp_path / f"project-{project_id}.csv")
+    with RowStoreWriter(path) as store:
+        store.append(["text"])
+        for index in range(rows):
+            store.append([f"mot{index % 10}"])
+    return SimpleNamespace(
+        id=project_id, annotation_file_path=path, source_encoding="utf-8", csv_delimiter=",", csv_quotechar='"'
+    )
+
+
+def test_index_built_outside_cache_lock(tmp_path, monkeypatch):
+    slow, fast = _store(tmp_path, 1, 50), _store(tmp_path, 2, 50)
+    started, release = threading.Event(), threading.Event()
+    opened = []
+    open_row_store = search.open_row_store
+
+    def blocking_open(path, *args):
+        opened.append(path)
+        if path == slow.annotation_file_path:
+            started.set()
+            release.wait(5)
+        return open_row_store(path, *args)
+
+    monkeypatch.setattr(search, "open_row_store", blocking_open)
+    cache = SearchIndexCache(max_projects=4)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(slow).search("mot3"))) for _ in range(3)]
+    threads[0].start()
+    assert started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+
+    # un autre projet est indexé pendant la construction de l'index du premier
+    other = []
+    thread = threading.Thread(target=lambda: other.append(list(cache.get(fast).search("mot1"))))
+    thread.start()
+    thread.join(2)
+    assert other == [list(range(2, 51, 10))]
+
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert [list(result) for result in results] == [list(range(4, 51, 10))] * 3
+    # les recherches simultanées du même projet attendent une seule construction
+    assert opened.count(slow.annotation_file_path) == 1
+    assert cache.stats()["misses"] == 2
@@ -0,0 +1,91 @@
+# Cache des utilisateurs authentifiés : core/security.py
+
+import time
+
+import pytest
+from sqlalchemy import func, select
+
+from core.security import USER_CHANNEL, AuthenticatedUser, PrincipalCache, principal_cache
+from models import User
+
+
+def principal(email: str = "a@exemple.fr") -> AuthenticatedUser:
+    return AuthenticatedUser(id=1, email=email, first_name="Test", last_name="Labelia")
+
+
+def test_entry_expires_after_ttl():
+    cache = PrincipalCache(max_entries=10, ttl=0.05)
+    cache.put("jeton", {}, principal())
+    assert cache.get("jeton") == principal()
+
+    time.sleep(0.1)
+    assert cache.get("jeton") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_entry_lifetime_capped_by_token_expiry():
+    cache = PrincipalCache(max_entries=10, ttl=60)
+    cache.put("expirant", {"exp": time.time() + 0.05}, principal())
+    cache.put("expiré", {"exp": time.time() - 1}, principal())
+
+    assert cache.get("expiré") is None
+    assert cache.get("expirant") is not None
+    time.sleep(0.1)
+    assert cache.get("expirant") is None
+
+
+def test_least_recently_used_entry_evicted():
+    cache = PrincipalCache(max_entries=2, ttl=60)
+    cache.put("a", {}, principal("a@exemple.fr"))
+    cache.put("b", {}, principal("b@exemple.fr"))
+    cache.get("a")
+    cache.put("c", {}, principal("c@exemple.fr"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    # les entrées évincées ne sont plus indexées par email
+    cache.invalidate_email("b@exemple.fr")
+    assert cache.stats()["invalidations"] == 0
+
+
+def test_modified_user_invalidated(client, db, make_user, login):
+    user_id, token = make_user()
+    login(token)
+    assert client.get("/auth/protected").status_code == 200
+    assert principal_cache.get(token) is not None
+
+    db.get(User, user_id).email = "nouvelle@exemple.fr"
+    db.commit()
+
+    # entrée indexée par l'ancienne adresse, dont le jeton ne désigne plus personne
+    assert principal_cache.get(token) is None
+    assert principal_cache.stats()["invalidations"] >= 1
+    assert client.get("/auth/protected").status_code == 401
+
+
+def test_deleted_user_rejected(client, db, make_user, login):
+    user_id, token = make_user()
+    login(token)
+    assert client.get("/auth/protected").status_code == 200
+
+    db.delete(db.get(User, user_id))
+    db.commit()
+
+    assert client.get("/auth/protected").status_code == 401
+
+
+@pytest.mark.postgresql
+def test_invalidation_received_from_other_workers(client, db, make_user, login):
+    _, token = make_user(email="autre-worker@exemple.fr")
+    login(token)
+    assert client.get("/auth/protected").status_code == 200
+    assert principal_cache.get(token) is not None
+
+    # notification envoyée par un autre worker au commit de sa modification
+    db.execute(select(func.pg_notify(USER_CHANNEL, "autre-worker@exemple.fr")))
+    db.commit()
+
+    deadline = time.monotonic() + 5
+    while principal_cache.get(token) is not None:
+        assert time.monotonic() < deadline, "notification non reçue"
+        time.sleep(0.05)
@@ -0,0 +1,89 @@
+# Stockage des fichiers par contenu : core/storage.py et suppression des projets
+
+import io
+import os
+
+import pytest
+from sqlalchemy import select
+
+from core.row_store import row_store_paths
+from core.storage import BlobStore
+from models import Project, StoredFile
+from tests.conftest import csv_bytes
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BlobStore(str(tmp_path))
+
+
+def stored(store, db, content: bytes) -> str:
+    path = store.acquire(db, store.stage(io.BytesIO(content), "data.csv"))
+    db.commit()
+    return path
+
+
+def test_acquire_counts_references_to_same_content(db, store):
+    path = stored(store, db, b"contenu")
+    assert stored(store, db, b"contenu") == path
+    other = stored(store, db, b"autre contenu")
+
+    assert other != path
+    assert db.scalar(select(StoredFile.refcount).where(StoredFile.path == path)) == 2
+    assert store.stats() == {"uploads": 3, "deduplicated": 1, "bytes_deduplicated": len(b"contenu")}
+    assert os.listdir(os.path.join(store.directory, "staging")) == []
+
+    # le fichier n'est libéré qu'avec sa dernière référence
+    assert not store.release(db, path)
+    db.commit()
+    assert db.scalar(select(StoredFile.refcount).where(StoredFile.path == path)) == 1
+    assert store.release(db, path)
+    db.commit()
+    assert db.scalar(select(StoredFile).where(StoredFile.path == path)) is None
+
+
+def test_release_keeps_file_until_commit(db, store):
+    path = stored(store, db, b"contenu")
+
+    assert store.release(db, path)
+    db.rollback()
+    # suppression annulée : la référence et le fichier restent
+    assert db.scalar(select(StoredFile.refcount).where(StoredFile.path == path)) == 1
+    assert os.path.exists(path)
+
+    assert store.release(db, path)
+    db.commit()
+    assert os.path.exists(path)
+    assert store.delete_unreferenced(db, path)
+    assert not os.path.exists(path)
+    assert db.scalar(select(StoredFile).where(StoredFile.path == path)) is None
+
+
+def test_file_referenced_again_is_kept(db, store):
+    path = stored(store, db, b"contenu")
+    assert store.release(db, path)
+    db.commit()
+
+    # le même contenu est envoyé à nouveau avant la suppression du fichier libéré
+    assert stored(store, db, b"contenu") == path
+    assert not store.delete_unreferenced(db, path)
+    assert os.path.exists(path)
+    assert db.scalar(select(StoredFile.refcount).where(StoredFile.path == path)) == 1
+
+
+def test_delete_project_removes_files_of_last_reference(client, db, make_user, login, make_project):
+    _, token = make_user()
+    login(token)
+    content = csv_bytes(3)
+    first, second = make_project(content=content), make_project(content=content)
+    path = db.scalar(select(Project.annotation_file_path).where(Project.id == first))
+    client.get(f"/annotations/{first}/annotate/page")
+    files = [path, *row_store_paths(path)]
+    assert all(os.path.exists(file_path) for file_path in files)
+
+    assert client.delete(f"/dashboard/annotations/{first}").status_code == 200
+    # fichier partagé avec le second projet
+    assert all(os.path.exists(file_path) for file_path in files)
+
+    assert client.delete(f"/dashboard/annotations/{second}").status_code == 200
+    assert not any(os.path.exists(file_path) for file_path in files)
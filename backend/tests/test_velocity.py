@@ -0,0 +1,82 @@
+# Rythme d'annotation d'un projet : GET /annotations/{project_id}/velocity
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.counters import counter_folder
+
+
+@pytest.fixture
+def project(make_user, login, make_project):
+    _, token = make_user()
+    login(token)
+    return make_project(rows=6)
+
+
+def submit(client, project_id, annotation_id, day):
+    response = client.post(f"/annotations/{project_id}/submit", json={
+        "annotationId": annotation_id, "category": "a", "date": f"{day.isoformat()}T10:00:00"
+    })
+    assert response.status_code == 200, response.text
+
+
+def test_velocity_fills_missing_days_with_rolling_average(client, project, annotation_ids):
+    ids = annotation_ids(project)
+    today = datetime.utcnow().date()
+    submit(client, project, ids[0], today - timedelta(days=3))
+    # le premier jour est reporté dans annotation_daily_counts, les suivants restent en attente
+    counter_folder.fold()
+    submit(client, project, ids[1], today - timedelta(days=1))
+    submit(client, project, ids[2], today - timedelta(days=1))
+    # une modification compte comme annotation, pas comme nouvelle ligne
+    submit(client, project, ids[2], today - timedelta(days=1))
+
+    response = client.get(f"/annotations/{project}/velocity", params={"window": 2})
+    assert response.status_code == 200, response.text
+    velocity = response.json()
+
+    assert [(day["day"], day["annotations"], day["new_rows"], day["rolling_average"]) for day in velocity["days"]] == [
+        ((today - timedelta(days=3)).isoformat(), 1, 1, 1.0),
+        ((today - timedelta(days=2)).isoformat(), 0, 0, 0.5),
+        ((today - timedelta(days=1)).isoformat(), 3, 2, 1.0),
+        (today.isoformat(), 0, 0, 1.0),
+    ]
+    assert velocity["annotated_rows"] == 3
+    assert velocity["remaining_rows"] == 3
+    assert velocity["rolling_average"] == 1.0
+    assert velocity["mean_per_day"] == 0.75
+    # 3 lignes restantes à 1 ligne par jour
+    assert velocity["projected_completion_date"] == (today + timedelta(days=3)).isoformat()
+    assert velocity["on_track"] is True
+
+
+def test_velocity_without_recent_annotations_has_no_projection(client, project, annotation_ids):
+    ids = annotation_ids(project)
+    today = datetime.utcnow().date()
+    submit(client, project, ids[0], today - timedelta(days=5))
+
+    velocity = client.get(f"/annotations/{project}/velocity", params={"window": 3}).json()
+
+    assert len(velocity["days"]) == 6
+    assert velocity["rolling_average"] == 0
+    assert velocity["projected_completion_date"] is None
+    assert velocity["on_track"] is False
+
+
+def test_velocity_of_completed_project_ends_on_last_annotation(client, project, annotation_ids):
+    today = datetime.utcnow().date()
+    for offset, annotation_id in enumerate(annotation_ids(project)):
+        submit(client, project, annotation_id, today - timedelta(days=6 - offset))
+
+    velocity = client.get(f"/annotations/{project}/velocity").json()
+
+    assert velocity["remaining_rows"] == 0
+    assert velocity["projected_completion_date"] == (today - timedelta(days=1)).isoformat()
+    assert velocity["on_track"] is True
+
+
+def test_velocity_of_other_users_project_is_not_found(client, make_user, login, project):
+    _, token = make_user()
+    login(token)
+    assert client.get(f"/annotations/{project}/velocity").status_code == 404
@@ -1,3 +1,6 @@
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
 CREATE TABLE IF NOT EXISTS users
 (
     id integer GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
@@ -24,6 +27,14 @@ CREATE TABLE IF NOT EXISTS projects
     status character varying(50) DEFAULT 'pending',
     categories json,
     mean_annotations integer,
+    source_encoding character varying(50),
+    csv_delimiter character varying(1),
+    csv_quotechar character varying(1),
+    csv_fields json,
+    total_rows integer NOT NULL DEFAULT 0,
+    annotated_rows integer NOT NULL DEFAULT 0,
+    annotation_version integer NOT NULL DEFAULT 0,
+    ingestion json,
     CONSTRAINT projects_user_id_fkey
         FOREIGN KEY (user_id)
         REFERENCES users (id)
@@ -38,9 +49,182 @@ CREATE TABLE IF NOT EXISTS annotations
     project_id integer NOT NULL,
     content text,
     date timestamp without time zone,
+    annotator_id integer,
+    leased_by integer,
+    lease_expires_at timestamp without time zone,
     CONSTRAINT annotations_project_id_fkey
         FOREIGN KEY (project_id)
         REFERENCES projects (id)
         ON UPDATE NO ACTION
+        ON DELETE CASCADE,
+    CONSTRAINT annotations_annotator_id_fkey
+        FOREIGN KEY (annotator_id)
+        REFERENCES users (id)
+        ON UPDATE NO ACTION
+        ON DELETE SET NULL,
+    CONSTRAINT annotations_leased_by_fkey
+        FOREIGN KEY (leased_by)
+        REFERENCES users (id)
+        ON UPDATE NO ACTION
+        ON DELETE SET NULL
+);
+
+CREATE TABLE IF NOT EXISTS project_members
+(
+    project_id integer NOT NULL,
+    user_id integer NOT NULL,
+    created_at timestamp without time zone DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT project_members_pkey
+        PRIMARY KEY (project_id, user_id),
+    CONSTRAINT project_members_project_id_fkey
+        FOREIGN KEY (project_id)
+        REFERENCES projects (id)
+        ON UPDATE NO ACTION
+        ON DELETE CASCADE,
+    CONSTRAINT project_members_user_id_fkey
+        FOREIGN KEY (user_id)
+        REFERENCES users (id)
+        ON UPDATE NO ACTION
         ON DELETE CASCADE
-)
\ No newline at end of file
+);
+
+CREATE TABLE IF NOT EXISTS annotation_daily_counts
+(
+    project_id integer NOT NULL,
+    day date NOT NULL,
+    annotations integer NOT NULL DEFAULT 0,
+    new_rows integer NOT NULL DEFAULT 0,
+    CONSTRAINT annotation_daily_counts_pkey
+        PRIMARY KEY (project_id, day),
+    CONSTRAINT annotation_daily_counts_project_id_fkey
+        FOREIGN KEY (project_id)
+        REFERENCES projects (id)
+        ON UPDATE NO ACTION
+        ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS annotation_count_deltas
+(
+    project_id integer NOT NULL,
+    annotator_id integer NOT NULL,
+    day date NOT NULL,
+    annotations integer NOT NULL DEFAULT 0,
+    new_rows integer NOT NULL DEFAULT 0,
+    CONSTRAINT annotation_count_deltas_pkey
+        PRIMARY KEY (project_id, annotator_id, day),
+    CONSTRAINT annotation_count_deltas_project_id_fkey
+        FOREIGN KEY (project_id)
+        REFERENCES projects (id)
+        ON UPDATE NO ACTION
+        ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS row_texts
+(
+    project_id integer NOT NULL,
+    row_id integer NOT NULL,
+    text text NOT NULL,
+    CONSTRAINT row_texts_pkey
+        PRIMARY KEY (project_id, row_id),
+    CONSTRAINT row_texts_project_id_fkey
+        FOREIGN KEY (project_id)
+        REFERENCES projects (id)
+        ON UPDATE NO ACTION
+        ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS stored_files
+(
+    path text PRIMARY KEY,
+    sha256 character varying(64) NOT NULL,
+    size bigint NOT NULL,
+    refcount integer NOT NULL DEFAULT 0,
+    created_at timestamp without time zone DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Mise à niveau d'une base créée par une version précédente de ce script (sans effet sur une base neuve).
+-- Ce dossier n'est exécuté par l'image postgres que sur une base vide : une base existante est
+-- mise à niveau au démarrage du serveur (core/migrations.py), qui recalcule aussi les compteurs.
+ALTER TABLE projects ALTER COLUMN guidelines_file_path DROP NOT NULL;
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS total_rows integer NOT NULL DEFAULT 0;
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS annotated_rows integer NOT NULL DEFAULT 0;
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS source_encoding character varying(50);
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS csv_delimiter character varying(1);
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS csv_quotechar character varying(1);
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS csv_fields json;
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS annotation_version integer NOT NULL DEFAULT 0;
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS ingestion json;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'annotations' AND column_name = 'annotator_id'
+    ) THEN
+        ALTER TABLE annotations ADD COLUMN annotator_id integer
+            REFERENCES users (id) ON UPDATE NO ACTION ON DELETE SET NULL;
+        -- avant les membres, seul le propriétaire du projet annotait
+        UPDATE annotations a SET annotator_id = p.user_id
+        FROM projects p
+        WHERE p.id = a.project_id AND a.content IS NOT NULL;
+    END IF;
+END $$;
+
+ALTER TABLE annotations ADD COLUMN IF NOT EXISTS leased_by integer
+    REFERENCES users (id) ON UPDATE NO ACTION ON DELETE SET NULL;
+ALTER TABLE annotations ADD COLUMN IF NOT EXISTS lease_expires_at timestamp without time zone;
+
+-- compteurs des projets existants (total_rows à 0 alors que le projet a des lignes),
+-- même calcul que reconcile_project_counters (core/counters.py) : le nombre par jour
+-- n'est reconstruit que pour les projets qui n'en ont pas encore
+INSERT INTO annotation_daily_counts (project_id, day, annotations, new_rows)
+SELECT a.project_id, a.date::date, count(*), count(*)
+FROM annotations a
+JOIN projects p ON p.id = a.project_id
+WHERE p.total_rows = 0 AND a.content IS NOT NULL AND a.date IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM annotation_daily_counts d WHERE d.project_id = a.project_id)
+GROUP BY a.project_id, a.date::date
+ON CONFLICT (project_id, day) DO NOTHING;
+
+UPDATE projects p
+SET total_rows = c.total_rows,
+    annotated_rows = c.annotated_rows,
+    status = CASE WHEN p.status = 'pending' AND c.annotated_rows >= c.total_rows THEN 'completed' ELSE p.status END
+FROM (
+    SELECT project_id, count(*) AS total_rows, count(content) AS annotated_rows
+    FROM annotations
+    GROUP BY project_id
+) c
+WHERE p.id = c.project_id AND p.total_rows = 0;
+
+CREATE INDEX IF NOT EXISTS ix_stored_files_sha256
+    ON stored_files (sha256);
+
+CREATE INDEX IF NOT EXISTS ix_projects_user_id
+    ON projects (user_id);
+
+CREATE INDEX IF NOT EXISTS ix_annotations_project_row
+    ON annotations (project_id, row_id);
+
+CREATE INDEX IF NOT EXISTS ix_annotations_project_row_unannotated
+    ON annotations (project_id, row_id)
+    WHERE content IS NULL;
+
+CREATE INDEX IF NOT EXISTS ix_annotations_project_content_row
+    ON annotations (project_id, content, row_id);
+
+CREATE INDEX IF NOT EXISTS ix_annotations_project_leased_by
+    ON annotations (project_id, leased_by)
+    WHERE leased_by IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS ix_annotations_project_annotator
+    ON annotations (project_id, annotator_id);
+
+CREATE INDEX IF NOT EXISTS ix_project_members_user_id
+    ON project_members (user_id);
+
+CREATE INDEX IF NOT EXISTS ix_row_texts_project_tsv
+    ON row_texts USING gin (project_id, to_tsvector('simple'::regconfig, text));
+
+CREATE INDEX IF NOT EXISTS ix_row_texts_project_trgm
+    ON row_texts USING gin (project_id, text gin_trgm_ops);
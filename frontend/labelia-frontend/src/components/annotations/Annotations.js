@@ -6,13 +6,19 @@ import axiosClient from "../api/axiosClient";
 import Loading from "../common/Loading";
 import ActionsButtonsAnnotations from "./ActionsAnnotations";
 
+// Nombre de phrases demandées par page
+const PAGE_SIZE = 200;
+// Nombre de phrases restantes avant de charger la page suivante (ou précédente)
+const PREFETCH_THRESHOLD = 20;
+
 /**
  * Annotations
  * 
  * Composant principal de la page d'annotation.
  * 
  * Ce composant gère : 
- * - le chargement des phrases à annoter depuis le backend
+ * - le chargement page par page des phrases à annoter depuis le backend, vers l'avant
+ *   et vers l'arrière (phrases déjà annotées avant la reprise)
  * - l'état des annotations et de leur index
  * - l'affiche du panneau qui permet de voir la liste des annotations
  * 
@@ -29,22 +35,26 @@ export default function Annotations({ project }) {
   const [annotations, setAnnotations] = useState([]);
   const [loading, setLoading] = useState(true);
   const [currentIndex, setCurrentIndex] = useState(0); 
+  const [nextAfter, setNextAfter] = useState(null);
+  const [previousBefore, setPreviousBefore] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   /**
-   * Récupère les annotations du projet depuis le backend à l'initialisation.
-   * - Trie les annotations selon leur row_id pour conserver l'ordrer
-   * - Initialise currentIndex sur la première phrase non annotée
+   * Récupère la première page d'annotations du projet à l'initialisation.
+   * - La page commence à la première phrase non annotée (pagination par row_id côté backend)
+   * - Le curseur nextAfter permet de charger la page suivante
+   * - Le curseur previousBefore permet de charger la page précédente
    */
   useEffect(() => {
     const fetchAnnotations = async () => {
       try {
-        const response = await axiosClient.get(`/annotations/${project.id}/annotate`);
-        const data = (response.data.annotations || []).sort((a, b) => a.row_id - b.row_id);
-        setAnnotations(data);
-
-        // on initialise l'index sur la première annotation non remplie
-        const firstUnannotatedIndex = data.findIndex(a => !a.content);
-        setCurrentIndex(firstUnannotatedIndex !== -1 ? firstUnannotatedIndex : 0);
+        const response = await axiosClient.get(`/annotations/${project.id}/annotate/page`, {
+          params: { first_unannotated: true, limit: PAGE_SIZE }
+        });
+        setAnnotations(response.data.annotations || []);
+        setNextAfter(response.data.next_after);
+        setPreviousBefore(response.data.previous_before);
+        setCurrentIndex(0);
       } catch (error) {
         console.error("Erreur lors de la récupération des annotations :", error);
       } finally {
@@ -54,6 +64,57 @@ export default function Annotations({ project }) {
     fetchAnnotations();
   }, [project.id]);
 
+  /**
+   * Charge la page suivante lorsque l'utilisateur approche de la fin des phrases chargées.
+   */
+  useEffect(() => {
+    if (nextAfter === null || loadingMore) return;
+    if (currentIndex < annotations.length - PREFETCH_THRESHOLD) return;
+
+    const fetchNextPage = async () => {
+      setLoadingMore(true);
+      try {
+        const response = await axiosClient.get(`/annotations/${project.id}/annotate/page`, {
+          params: { after: nextAfter, limit: PAGE_SIZE }
+        });
+        setAnnotations(prev => prev.concat(response.data.annotations || []));
+        setNextAfter(response.data.next_after);
+      } catch (error) {
+        console.error("Erreur lors de la récupération des annotations :", error);
+      } finally {
+        setLoadingMore(false);
+      }
+    };
+    fetchNextPage();
+  }, [project.id, currentIndex, annotations.length, nextAfter, loadingMore]);
+
+  /**
+   * Charge la page précédente lorsque l'utilisateur revient au début des phrases chargées.
+   * Les phrases sont ajoutées en tête : l'index courant est décalé pour rester sur la même phrase.
+   */
+  useEffect(() => {
+    if (previousBefore === null || loadingMore) return;
+    if (currentIndex >= PREFETCH_THRESHOLD) return;
+
+    const fetchPreviousPage = async () => {
+      setLoadingMore(true);
+      try {
+        const response = await axiosClient.get(`/annotations/${project.id}/annotate/page`, {
+          params: { before: previousBefore, limit: PAGE_SIZE }
+        });
+        const previous = response.data.annotations || [];
+        setAnnotations(prev => previous.concat(prev));
+        setCurrentIndex(index => index + previous.length);
+        setPreviousBefore(response.data.previous_before);
+      } catch (error) {
+        console.error("Erreur lors de la récupération des annotations :", error);
+      } finally {
+        setLoadingMore(false);
+      }
+    };
+    fetchPreviousPage();
+  }, [project.id, currentIndex, previousBefore, loadingMore]);
+
   if (loading) return <Loading />;
 
   return (
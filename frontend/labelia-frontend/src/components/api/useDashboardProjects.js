@@ -0,0 +1,100 @@
+import React from "react";
+import axiosClient from "./axiosClient";
+
+/**
+ * applyProjectEvent
+ *
+ * Applique un évènement du flux '/dashboard/events' à la liste des projets.
+ *
+ * @param {Array} projects - Liste actuelle des projets
+ * @param {Object} event - Évènement reçu ("project" ou "deleted")
+ *
+ * @returns {Array} La nouvelle liste des projets
+ */
+export function applyProjectEvent(projects, event) {
+  if (event.type === "deleted") {
+    return projects.filter(project => project.id !== event.id);
+  }
+  const { type, ...project } = event;
+  if (projects.some(p => p.id === project.id)) {
+    return projects.map(p => p.id === project.id ? project : p);
+  }
+  return [...projects, project];
+}
+
+const DashboardProjectsContext = React.createContext([[], () => {}]);
+
+/**
+ * DashboardProjectsProvider
+ *
+ * Liste des projets de l'utilisateur, tenue à jour en temps réel et partagée par
+ * les composants de la page (Sidebar, DashboardNotEmpty) : un seul flux est ouvert par page.
+ *
+ * Logique principale :
+ * - Récupère les projets depuis l'API '/dashboard' au montage
+ * - Ouvre le flux Server-Sent Events '/dashboard/events' : création, progression,
+ *   changement de statut et suppression des projets sont appliqués sans nouvelle requête
+ * - Recharge la liste sur un évènement "resync" et après une reconnexion du flux
+ *   (évènements manqués pendant la coupure)
+ *
+ * Usage:
+ * <DashboardProjectsProvider>
+ *      <Dashboard />
+ * </DashboardProjectsProvider>
+ *
+ * @param {Object} props
+ * @param {React.ReactNode} props.children - Composants qui lisent la liste avec useDashboardProjects
+ *
+ * @returns {JSX.Element} Les enfants, avec accès à la liste des projets
+ */
+export function DashboardProjectsProvider({ children }) {
+  const [projects, setProjects] = React.useState([]);
+
+  React.useEffect(() => {
+    const load = () => {
+      axiosClient.get("/dashboard")
+        .then(res => setProjects(res.data.has_projects ? res.data.projects : []))
+        .catch(err => console.error("Erreur récupération projets :", err));
+    };
+    load();
+
+    // EventSource se reconnecte seul après une coupure (délai "retry" envoyé par le serveur)
+    const source = new EventSource(`${axiosClient.defaults.baseURL}/dashboard/events`, { withCredentials: true });
+    let connected = false;
+    source.onopen = () => {
+      if (connected) {
+        load();
+      }
+      connected = true;
+    };
+    source.onmessage = (message) => {
+      const event = JSON.parse(message.data);
+      if (event.type === "resync") {
+        load();
+      } else {
+        setProjects(projects => applyProjectEvent(projects, event));
+      }
+    };
+
+    return () => source.close();
+  }, []);
+
+  const value = React.useMemo(() => [projects, setProjects], [projects]);
+
+  return (
+    <DashboardProjectsContext.Provider value={value}>
+      {children}
+    </DashboardProjectsContext.Provider>
+  );
+}
+
+/**
+ * useDashboardProjects
+ *
+ * Liste des projets de l'utilisateur fournie par DashboardProjectsProvider.
+ *
+ * @returns {[Array, function]} La liste des projets et sa fonction de mise à jour
+ */
+export default function useDashboardProjects() {
+  return React.useContext(DashboardProjectsContext);
+}
@@ -1,7 +1,7 @@
 import React from "react";
 import { PieChart, NotebookPen, Users, Download, FilePlus, File, X } from 'lucide-react';
 import { NavLink } from "react-router-dom";
-import axiosClient from "../api/axiosClient";
+import useDashboardProjects from "../api/useDashboardProjects";
 import "../../App.css";
 import './Sidebar.css';
 
@@ -11,8 +11,9 @@ import './Sidebar.css';
  * Barre latérale de navigation de l'application, permettant d'accéder au tableau de bord,
  * aux projets, à la création de projet, à l'équipe et à l'exportation des données.
  * 
- * Les projets de l'utilisateur sont récupérés dynamiquement depuis l'API
- * ('/dashboard') et affichés dans la section "Mes projets".
+ * Les projets de l'utilisateur sont récupérés depuis l'API ('/dashboard') puis tenus
+ * à jour par le flux '/dashboard/events', dans la liste partagée par la page
+ * (useDashboardProjects), et affichés dans la section "Mes projets".
  * 
  * @param {Object} props
  * @param {boolean} props.isOpen - Indique si la sidebar est ouverte (true) ou fermée (false)
@@ -22,23 +23,8 @@ import './Sidebar.css';
  */
 
 export default function Sidebar({ isOpen, onClose }) {
-  // List des projets de l'utilisateur.
-  const [projects, setProjects] = React.useState([]);
-
-  // Récupération des projets depuis l'API au montage du composant
-  React.useEffect(() => {
-    axiosClient.get("/dashboard", { withCredentials: true })
-      .then(res => {
-        if (res.data.has_projects) {
-          setProjects(res.data.projects);
-        } else {
-          setProjects([]);
-        }
-      })
-      .catch(err =>
-        console.error("Erreur récupération projets :", err)
-      )
-  }, []);
+  // Liste des projets de l'utilisateur, mise à jour en temps réel
+  const [projects] = useDashboardProjects();
 
   return (
     <>
@@ -3,6 +3,7 @@ import "../../App.css";
 import "./Dashboard.css";
 import { FilePlus, Trash2, Download } from 'lucide-react';
 import axiosClient from "../api/axiosClient";
+import useDashboardProjects from "../api/useDashboardProjects";
 import { NavLink, useNavigate } from "react-router-dom";
 import Popup from "../common/Popup";
 
@@ -16,7 +17,9 @@ import Popup from "../common/Popup";
  * - Un bouton pour créer un nouveau projet.
  * 
  * Logique principale : 
- * - Récupère les projets depuis l'API "/dashboard" au montage 
+ * - Lit la liste des projets partagée avec la Sidebar (useDashboardProjects), récupérée depuis
+ *   l'API "/dashboard" puis tenue à jour par le flux "/dashboard/events" : la progression et
+ *   le statut se mettent à jour en temps réel
  * - Met à jour dynamiquement la liste en cas de suppression
  * - Gère un état "projectToDelete" pour afficher une popup avant suppression
  * 
@@ -25,26 +28,13 @@ import Popup from "../common/Popup";
 
 export default function DashboardNotEmpty() {
     const [showTooltip, setShowTooltip] = React.useState(false);
-    // Liste des projets récupérés
-    const [projects, setProjects] = React.useState([]);
+    // Liste des projets, mise à jour en temps réel
+    const [projects, setProjects] = useDashboardProjects();
     // Projet sélectionné pour suppression
     const [projectToDelete, setProjectToDelete] = React.useState(null);
 
     const navigate = useNavigate();
 
-    // Chargement initial des projets depuis l'API
-    React.useEffect(() => {
-        axiosClient.get("/dashboard")
-        .then(res => {
-            if (res.data.has_projects) {
-                setProjects(res.data.projects);
-            } else {
-                setProjects([]);
-            }
-        })
-        .catch(err => console.error("Erreur de récupération projets :", err));
-    }, []);
-
     /**
      * Retourne une couleur correspondant au statut du projet
      * @param {string} status - Le statut du projet
@@ -56,6 +46,8 @@ export default function DashboardNotEmpty() {
             case 'pending': return "#F59E0B"; // orange
             case 'completed': return "#10B981"; // vert
             case 'archived': return "#6B7280"; // gris foncé
+            case 'ingesting': return "#3B82F6"; // bleu
+            case 'failed': return "#EF4444"; // rouge
             default: return "#9CA3AF"; // gris clair
         }
     };
@@ -126,7 +118,9 @@ export default function DashboardNotEmpty() {
                                     <span className="status-badge" style={{backgroundColor: getStatusColor(project.status)}}>
                                         {project.status === "pending" ? "En cours" :
                                         project.status === "completed" ? "Terminé" :
-                                        project.status === "archived" ? "Archivé" : project.status}
+                                        project.status === "archived" ? "Archivé" :
+                                        project.status === "ingesting" ? "Import en cours" :
+                                        project.status === "failed" ? "Échec de l'import" : project.status}
                                     </span>
                                 </td>
 
@@ -12,7 +12,9 @@ import "./Actions.css";
  * Composant React affichant les boutons d'action pour un projet d'annotation.
  * 
  * Affiche trois boutons principaux : 
- * 1. Voir les guidelines : télécharge et ouvre le PDF des guidelines si disponible
+ * 1. Voir les guidelines : ouvre le PDF des guidelines si disponible. Le PDF est chargé
+ *    par le lecteur du navigateur (requêtes partielles, premières pages affichées avant
+ *    la fin du téléchargement) et reste en cache tant que le fichier ne change pas.
  * 2. Consulter les notes : ouvre un popup contenant les notes HTML du projet
  * 3. Annoter : redirige l'utilisateur vers la page d'annotation.
  * 
@@ -20,7 +22,7 @@ import "./Actions.css";
  * @param {Object} props - Les propriétés du composant.
  * @param {Object} props.project - Object représentant un projet
  * @param {number} props.project.id - Identifiant unique du projet.
- * @param {string} [props.project.guidelines_file_path] - Chemin du fichier de guidelines PDF.
+ * @param {string} [props.project.guidelines_url] - Adresse du PDF des guidelines, versionnée par son contenu.
  * @param {string} [props.project.notes] - Notes associées au projet HTML
  * 
  * @example
@@ -29,7 +31,6 @@ import "./Actions.css";
  * @returns {JSX.Element} Un conteneur avec les boutons d'action et les popups associées.
  */
 export default function ActionsButtons({ project }) {
-  const [pdfBlob, setPdfBlob] = React.useState(null);
   const [pdfDisabled, setDisabled] = React.useState(false);
   const [showGuidelines, setShowGuidelines] = React.useState(false);
   const [showNotes, setShowNotes] = React.useState(false);
@@ -39,39 +40,16 @@ export default function ActionsButtons({ project }) {
    */
   React.useEffect(() => {
     // Met à jour le bouton seulement si project change
-    setDisabled(!project.guidelines_file_path);
+    setDisabled(!project.guidelines_url);
   }, [project]);
 
-  /**
-   * Télécharge le PDF des guidelines et crée un URL blob pour afficher un iframe.
-   * 
-   * @async
-   * @function fetchPDF
-   * @returns {Promise<void>}
-   */
-  const fetchPDF = async () => {
-    try {
-      const response = await axiosClient.get(
-        `/uploads/${project.guidelines_file_path.split(/[/\\]/).pop()}`,
-        { responseType: "blob" }
-      );
-      const fileURL = URL.createObjectURL(response.data);
-      setPdfBlob(fileURL);
-    } catch (err) {
-      console.error("Erreur téléchargement PDF :", err);
-    }
-  };
-
   // === Rendu composant ===
   return (
     <div className="actions-buttons-wrapper">
         <div className="actions-buttons-container">
             <ButtonSubmit
             text="Voir les guidelines"
-            onClick={async () => {
-                await fetchPDF();
-                setShowGuidelines(true);
-            }}
+            onClick={() => setShowGuidelines(true)}
             disabled={pdfDisabled}
             />
 
@@ -86,10 +64,11 @@ export default function ActionsButtons({ project }) {
                 to={`/annotations/${project.id}/annotate`}
             />
 
-            {showGuidelines && pdfBlob && (
+            {showGuidelines && project.guidelines_url && (
                 <Popup onClose={() => setShowGuidelines(false)}>
                     <iframe
-                    src={pdfBlob}
+                    title="Guidelines"
+                    src={`${axiosClient.defaults.baseURL}${project.guidelines_url}`}
                     style={{ width: '60vw', height: '80vh', border: 'none' }}
                     />
                 </Popup>
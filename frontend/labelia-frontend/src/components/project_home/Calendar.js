@@ -20,8 +20,7 @@ import 'react-tooltip/dist/react-tooltip.css';
  * @param {Object} props - Les propriétés du composant
  * @param {Object} props.project - Object représentant le projet.
  * @param {string} props.project.due_date - Date d'échéance du projet
- * @param {Array<Object>} props.project.annotations - Liste des annotations
- * @param {string} props.project.annotations[].date - Date de l'annotations
+ * @param {Object<string, number>} props.project.daily_counts - Nombre d'annotations par jour (clé au format AAAA-MM-JJ)
  * 
  * @example
  * <CalendarTracker project={project} />
@@ -31,14 +30,8 @@ import 'react-tooltip/dist/react-tooltip.css';
  */
 export default function CalendarTracker({ project }) {
 
-    // Regroupe les annotations par date
-    const annotationsByDay = project.annotations.reduce((acc, a) => {
-        if (a.date) {
-            const day = new Date(a.date).toLocaleDateString('en-CA');
-            acc[day] = (acc[day] || []).concat(a);
-        }
-        return acc;
-    }, {});
+    // Nombre d'annotations par date, calculé par le serveur
+    const annotationsByDay = project.daily_counts || {};
 
     const dueDateStr = project.due_date 
         ? new Date(project.due_date).toLocaleDateString('en-CA')
@@ -94,7 +87,7 @@ export default function CalendarTracker({ project }) {
                         ? "Aujourd'hui"
                         : dateKey === dueDateStr
                         ? "Date d'échéance"
-                        : `${annotationsByDay[dateKey].length} annotation(s)`
+                        : `${annotationsByDay[dateKey]} annotation(s)`
                     }
                 </Tooltip>
             ))}
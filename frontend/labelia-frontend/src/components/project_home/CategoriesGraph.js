@@ -14,8 +14,9 @@ import { PieChart, Pie, Cell, Tooltip } from 'recharts';
  * @param {Object} props - Les propriétés du composant.
  * @param {Object} props.project - Objet représentant le projet.
  * @param {Array<string>} props.project.categories - Liste des catégories du projet.
- * @param {Array<Object>} props.project.annotations - Liste des annotations du projet.
- * @param {string} props.project.annotations[].content - Contenu ou catégorie associée à l'annotation.
+ * @param {Object<string, number>} props.project.category_counts - Nombre d'annotations par catégorie.
+ * @param {number} props.project.total_rows - Nombre de lignes du projet.
+ * @param {number} props.project.annotated_rows - Nombre de lignes annotées.
  * 
  * @example
  * <CategoriesGraph project={project} /> 
@@ -26,12 +27,12 @@ export default function CategoriesGraph ( { project }) {
     
     // Répartition des catégories
     const categoryData = project.categories.map((cat) => {
-        const count = project.annotations.filter(a => a.content === cat).length;
+        const count = (project.category_counts || {})[cat] || 0;
         return { name: cat, value: count, color: getCategoryColor(cat)};
     });
 
     // Ajouter une catégorie pour élément non annoté
-    const nonAnnotatedCount = project.annotations.filter(a => !a.content).length;
+    const nonAnnotatedCount = (project.total_rows || 0) - (project.annotated_rows || 0);
     if (nonAnnotatedCount > 0) {
         categoryData.push({ name: "Non annoté", value: nonAnnotatedCount, color: "#E5E7EB"});
     };
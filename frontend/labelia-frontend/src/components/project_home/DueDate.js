@@ -8,11 +8,15 @@ import "./DueDate.css";
  * 
  * Le composant calcule le nombre de jours restants ou dépassés par rapport à la date actuelle et
  * applique une classe CSS correspondante pour le style due-future, due-today et due-past.
+ * Pour un projet en cours, la date de fin projetée au rythme d'annotation actuel est aussi affichée.
  * 
  * @component
  * @param {Object} props - Les propriétés du composant.
  * @param {Object} props.project - Object représentant le projet.
  * @param {string} props.project.due_date - Date d'échéance du projet au format ISO.
+ * @param {Object} [props.project.velocity] - Rythme d'annotation du projet (GET /annotations/{id}/velocity).
+ * @param {string} [props.project.velocity.projected_completion_date] - Date de fin projetée au rythme actuel.
+ * @param {boolean} [props.project.velocity.on_track] - La date de fin projetée précède la date d'échéance.
  * 
  * @example
  * <DueDate projet={project} />
@@ -45,6 +49,15 @@ export default function DueDate({ project }) {
         statusClass = "due-past";
     }
 
+    // Date de fin projetée au rythme des derniers jours (projet en cours uniquement)
+    const velocity = project.status !== "completed" ? project.velocity : null;
+    let projection = null;
+    if (velocity) {
+        projection = velocity.projected_completion_date
+            ? `Fin estimée le ${new Intl.DateTimeFormat('fr-FR', { day: '2-digit', month: 'long', year: 'numeric' }).format(new Date(velocity.projected_completion_date))} (${velocity.rolling_average} lignes/jour).`
+            : "Aucune annotation récente pour estimer la date de fin.";
+    }
+
     return (
         <div className={`due-date-container ${statusClass}`}>
             <div className="due-date-text">
@@ -53,6 +66,9 @@ export default function DueDate({ project }) {
             <div className="due-date-message">
                 {message}
             </div>
+            {projection && <div className={`due-date-projection ${velocity.on_track ? "due-future" : "due-past"}`}>
+                {projection}
+            </div>}
         </div>
     )
 }
\ No newline at end of file
@@ -5,17 +5,14 @@ import './MeanAnnotations.css';
  * 
  * Composant React affichant le nombre moyen d'annotations par jour pour un projet donné.
  * 
- * Le calcul est effectué en divisant le nombre total d'annotations effectuées par le nombre
- * de jours écoulés depuis la première annotation du projet. Si aucune date n'est présente
- * le calcul utilise la date actuelle comme référence.
+ * Le calcul est effectué par le serveur en divisant le nombre total d'annotations effectuées
+ * par le nombre de jours écoulés depuis la première annotation du projet. La valeur est
+ * enregistrée une fois le projet terminé.
  * 
  * @component
  * @param {Object} props - Les propriétés du composant
  * @param {Object} props.project - Object représentant le projet.
- * @param {Array<Object>} props.project.annotations - Tableau des annotations du projet
- * @param {string} [props.project.annotations[].content] - Contenu de l'annotations
- * @param {string} [props.project.annotations[].date] - Date de l'annotation au format ISO
- * @param {string} [props.project.status] - Le status du projet (terminé ou en cours)
+ * @param {number} props.project.mean_annotations - Nombre moyen d'annotations par jour
  * 
  * @example
  * <MeanAnnotations project={project} />
@@ -23,27 +20,10 @@ import './MeanAnnotations.css';
  * @returns {JSX.Element} Un composant affichant le nombre moyen d'annotations par jour.
  */
 
-function computeMeanAnnotations(annotations) {
-    const totalAnnotations = annotations.filter(a => a.content).length;
-    const annotatedDates = annotations
-        .filter(a => a.date)
-        .map(a => new Date(a.date));
-    const firstDate = annotatedDates.length ? new Date(Math.min(...annotatedDates)) : new Date();
-    const daysElapsed = Math.max((new Date() - firstDate) / (1000 * 60 * 60 * 24), 1);
-    return Math.round(totalAnnotations / daysElapsed);
-}
-
 export default function MeanAnnotations({ project }) {
-    let meanAnnotations;
-
-    if (project.status === "pending") {
-        meanAnnotations = computeMeanAnnotations(project.annotations);
-    } else {
-        meanAnnotations = project.mean_annotations;
-    }
     return (
         <p className='mean-annotations'>
-            {meanAnnotations}
+            {project.mean_annotations}
         </p>
     );
 }
\ No newline at end of file
@@ -28,11 +28,12 @@ import { CircleQuestionMark } from "lucide-react";
  * @param {Object} props - Les propriétés du composant
  * @param {Object} props.project - Object représentant le projet
  * @param {string} props.project.project_name - Nom du projet
- * @param {Array<Object>} props.project.annotations - Tableau des annotations du projet
+ * @param {Object<string, number>} props.project.category_counts - Nombre d'annotations par catégorie
+ * @param {Object<string, number>} props.project.daily_counts - Nombre d'annotations par jour
  * @param {Array<string>} props.project.categories - Tableau des catégories du projet
  * @param {string} props.project.due_date - Date d'échéance du projet au format ISO.
  * @param {number} props.project.completion - Pourcentage de complétion du projet
- * @param {string} [props.project.guidelines_file_path] - Chemin du fichier de guidelines
+ * @param {string} [props.project.guidelines_url] - Adresse du PDF des guidelines (GET /annotations/{id}/guidelines)
  * @param {string} [props.project.notes] - Notes associées au projet.
  * 
  * @example
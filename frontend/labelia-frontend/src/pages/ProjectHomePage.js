@@ -11,7 +11,8 @@ import LoadingPage from "./LoadingPage";
  * 
  * Cette page : 
  * - Récupère l'identifiant du projet depuis l'URL via useParams
- * - Fait un appel API pour charger les données du projet (noms, annotations, catégories, etc...)
+ * - Fait un appel API pour charger les données du projet (noms, statistiques, catégories, etc...)
+ * et son rythme d'annotation (date de fin projetée)
  * - Affiche un écran de chargement ou un message d'erreur si nécessaire.
  * - Rend le composant {@link ProjectHome} avec les données du projet une fois celles-ci disponibles 
  * 
@@ -37,8 +38,12 @@ export default function ProjectHomePage() {
          */
         const fetchProject = async () => {
             try {
-                const response = await axiosClient.get(`/annotations/${projectId}`);
-                setProject(response.data);
+                // Détails du projet et rythme d'annotation (table de cumul journalier) en parallèle
+                const [response, velocity] = await Promise.all([
+                    axiosClient.get(`/annotations/${projectId}`),
+                    axiosClient.get(`/annotations/${projectId}/velocity`).catch(() => null)
+                ]);
+                setProject({ ...response.data, velocity: velocity?.data || null });
             } catch (err) {
                 setError(err.response?.data?.detail || "Erreur lors du chargement du projet");
             } finally {
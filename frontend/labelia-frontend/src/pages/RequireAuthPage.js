@@ -2,6 +2,7 @@ import React from 'react';
 import axiosClient from '../components/api/axiosClient';
 import TopbarLoginSignup from '../components/login_signup/TopbarLoginSignup';
 import Protection from '../components/protected_page/Protection';
+import { DashboardProjectsProvider } from '../components/api/useDashboardProjects';
 
 /**
  * RequireAuth
@@ -9,6 +10,7 @@ import Protection from '../components/protected_page/Protection';
  * Vérifie si l'utilisateur est authentifié avant de rendre le contenu enfant. 
  * Si l'utilisateur n'est pas authentifié, affiche la page de protection avec la topbar
  * et le composant Protection.
+ * Le contenu protégé a accès à la liste des projets tenue à jour (DashboardProjectsProvider).
  * 
  * Usage:
  * <RequireAuth>
@@ -68,8 +70,8 @@ export default function RequireAuth ( { children }) {
         )
     }
 
-    // Si authentifié, afficher les enfant
+    // Si authentifié, afficher les enfant avec la liste des projets partagée
     return (
-        <>{ children }</>
+        <DashboardProjectsProvider>{ children }</DashboardProjectsProvider>
     )
 }
\ No newline at end of file